@@ -0,0 +1,11 @@
+#!/usr/bin/env python3
+"""
+Seed (or reconcile) the per-day analytics counters in `stats_daily`
+from the existing reports and cleanings collections.
+Usage: python backfill_daily_stats.py
+"""
+from services.stats_service import backfill_daily_stats
+
+print("📊 Rebuilding daily analytics counters...")
+result = backfill_daily_stats()
+print(f"✅ Corrected {result['days']} day documents")
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Backfill the `geohash` field on existing reports so they are visible to
+geohash radius queries (/location/nearby-reports).
+Usage: python backfill_geohash.py
+"""
+from services.firebase_service import get_firestore_client
+from services.location_service import encode_geohash
+
+db = get_firestore_client()
+
+print("🧭 Backfilling report geohashes...")
+reports = db.collection('reports').select(['latitude', 'longitude', 'geohash']).stream()
+batch = db.batch()
+count = 0
+for doc in reports:
+    data = doc.to_dict() or {}
+    lat = data.get('latitude')
+    lon = data.get('longitude')
+    if lat is None or lon is None:
+        continue
+    geohash = encode_geohash(float(lat), float(lon))
+    if data.get('geohash') == geohash:
+        continue
+    batch.update(doc.reference, {'geohash': geohash})
+    count += 1
+    if count % 500 == 0:
+        batch.commit()
+        batch = db.batch()
+batch.commit()
+print(f'✅ Updated {count} reports')
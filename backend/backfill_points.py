@@ -0,0 +1,11 @@
+#!/usr/bin/env python3
+"""
+Seed (or reconcile) the points ledger in `points_ledger` and the running
+totals on `users` from the existing reports and cleanings collections.
+Usage: python backfill_points.py
+"""
+from services.points_service import reconcile_points
+
+print("🏅 Rebuilding points ledger and user totals...")
+result = reconcile_points()
+print(f"✅ Awarded {result['awarded']}, reversed {result['reversed']}, updated {result['users']} users")
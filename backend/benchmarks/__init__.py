@@ -0,0 +1 @@
+# Offline benchmarks for backend hot paths (run from backend/: python -m benchmarks.<name>)
@@ -0,0 +1,101 @@
+"""
+Benchmark: geohash radius query vs brute-force scan over synthetic reports.
+
+The geohash path mirrors /location/nearby-reports: the Firestore index is
+simulated with a sorted list of geohashes and bisect range lookups, then the
+candidates are refined with the vectorized haversine.
+
+Usage (from backend/): python -m benchmarks.bench_nearby_reports [--reports 100000]
+"""
+import argparse
+import bisect
+import random
+import time
+
+import numpy as np
+
+from benchmarks.datasets import LAT_RANGE, LON_RANGE
+from services.location_service import (
+    encode_geohash,
+    geohash_query_bounds,
+    haversine_distance,
+    haversine_distances,
+)
+
+
+def make_reports(n: int, seed: int = 42):
+    rng = random.Random(seed)
+    lats = np.array([rng.uniform(*LAT_RANGE) for _ in range(n)])
+    lons = np.array([rng.uniform(*LON_RANGE) for _ in range(n)])
+    hashes = [encode_geohash(lat, lon) for lat, lon in zip(lats, lons)]
+    order = sorted(range(n), key=hashes.__getitem__)
+    return {
+        "lats": lats,
+        "lons": lons,
+        "sorted_hashes": [hashes[i] for i in order],
+        "sorted_idx": np.array(order),
+    }
+
+
+def brute_force_loop(data, lat, lon, radius):
+    """Old check_duplicate_location approach: python haversine per report."""
+    return sorted(
+        i for i, (rlat, rlon) in enumerate(zip(data["lats"], data["lons"]))
+        if haversine_distance(lat, lon, rlat, rlon) <= radius
+    )
+
+
+def brute_force_numpy(data, lat, lon, radius):
+    distances = haversine_distances(lat, lon, data["lats"], data["lons"])
+    return sorted(np.flatnonzero(distances <= radius).tolist())
+
+
+def geohash_query(data, lat, lon, radius):
+    candidates = []
+    for start, end in geohash_query_bounds(lat, lon, radius):
+        lo = bisect.bisect_left(data["sorted_hashes"], start)
+        hi = bisect.bisect_right(data["sorted_hashes"], end)
+        candidates.append(data["sorted_idx"][lo:hi])
+    idx = np.concatenate(candidates) if candidates else np.array([], dtype=int)
+    if idx.size == 0:
+        return [], 0
+    distances = haversine_distances(lat, lon, data["lats"][idx], data["lons"][idx])
+    return sorted(idx[distances <= radius].tolist()), int(idx.size)
+
+
+def time_queries(fn, queries, data, radius):
+    start = time.perf_counter()
+    results = [fn(data, lat, lon, radius) for lat, lon in queries]
+    return (time.perf_counter() - start) / len(queries) * 1000, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--reports", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--radius", type=float, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--skip-loop", action="store_true", help="skip the slow python-loop baseline")
+    args = parser.parse_args()
+
+    print(f"Generating {args.reports} synthetic reports...")
+    data = make_reports(args.reports)
+    rng = random.Random(7)
+    queries = [(rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE)) for _ in range(args.queries)]
+
+    for radius in args.radius:
+        np_ms, np_results = time_queries(brute_force_numpy, queries, data, radius)
+        gh_ms, gh_results = time_queries(geohash_query, queries, data, radius)
+        assert [r for r, _ in gh_results] == np_results, "geohash query disagrees with brute force"
+        scanned = np.mean([n for _, n in gh_results])
+        found = np.mean([len(r) for r in np_results])
+
+        print(f"\nradius={radius:.0f}m  (avg {found:.1f} matches, {scanned:.0f} candidates read via geohash)")
+        if not args.skip_loop:
+            loop_ms, _ = time_queries(brute_force_loop, queries[:5], data, radius)
+            print(f"  brute force (python loop): {loop_ms:9.3f} ms/query")
+        print(f"  brute force (numpy scan):  {np_ms:9.3f} ms/query  ({args.reports} docs read)")
+        print(f"  geohash range + refine:    {gh_ms:9.3f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark: cold start of the FastAPI app.
+
+1. Import time per module for `import main` (python -X importtime), plus the
+   heavy libraries that must stay off the startup path.
+2. Time from spawning uvicorn to the first 200 from /health.
+
+Usage (from backend/): python -m benchmarks.bench_startup [--top 15] [--runs 3]
+"""
+import argparse
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("cv2", "onnxruntime", "numpy", "PIL", "cloudinary")
+IMPORTTIME_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def import_times():
+    """Return ({module: cumulative_us}, total_us) for `import main`."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "YOLO_WARMUP": "0"},
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        m = IMPORTTIME_RE.match(line)
+        if m:
+            times[m.group(4)] = int(m.group(2))
+    return times, times.get("main", 0)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_to_first_health(timeout: float = 60.0) -> float:
+    """Seconds from process spawn until /health returns 200."""
+    port = free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as resp:
+                    if resp.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.02)
+        raise TimeoutError("/health did not answer in time")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--top", type=int, default=15, help="modules to list by cumulative import time")
+    parser.add_argument("--runs", type=int, default=3, help="cold starts to measure")
+    args = parser.parse_args()
+
+    times, total = import_times()
+    print(f"import main: {total / 1000:.1f} ms cumulative\n")
+    print("Top-level modules by cumulative import time:")
+    top_level = {name: us for name, us in times.items() if "." not in name or name.startswith(("routes.", "services."))}
+    for name, us in sorted(top_level.items(), key=lambda kv: -kv[1])[: args.top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    print("\nHeavy modules imported at startup:")
+    loaded = [m for m in HEAVY_MODULES if m in times]
+    print("  " + (", ".join(f"{m} ({times[m] / 1000:.1f} ms)" for m in loaded) if loaded else "none"))
+
+    runs = [time_to_first_health() for _ in range(args.runs)]
+    print(f"\nTime to first /health: median {statistics.median(runs) * 1000:.0f} ms "
+          f"(runs: {', '.join(f'{r * 1000:.0f}' for r in runs)} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Benchmark: YOLO pre/post-processing, previous implementation vs reused buffers.
+
+Preprocessing is timed on synthetic RGB photos at a few camera resolutions.
+Post-processing is timed on synthetic YOLOv8 output (84 x 8400) with
+clustered candidate boxes. Latency is the median per image. Peak memory is
+the extra traced memory (tracemalloc) allocated during one call. With
+--model, the full _run_yolo path is timed too (needs the ONNX weights).
+
+Usage (from backend/): python -m benchmarks.bench_yolo_pipeline [--runs 50] [--model]
+"""
+import argparse
+import statistics
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from benchmarks.datasets import make_predictions
+from services import image_verification as iv
+from services.model_manager import get_model_manager
+
+SIZES = [(480, 640), (1200, 1600), (3024, 4032)]
+
+
+# --- previous implementation (kept here as the baseline) ---------------------
+
+def legacy_letterbox(image, size=iv.YOLO_INPUT_SIZE):
+    h, w = image.shape[:2]
+    scale = size / max(h, w)
+    new_w, new_h = int(round(w * scale)), int(round(h * scale))
+    resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    pad_w, pad_h = size - new_w, size - new_h
+    top, bottom = pad_h // 2, pad_h - pad_h // 2
+    left, right = pad_w // 2, pad_w - pad_w // 2
+    padded = cv2.copyMakeBorder(resized, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114))
+    return padded, scale, (left, top)
+
+
+def legacy_preprocess(image):
+    img, scale, pad = legacy_letterbox(image)
+    img = img.astype(np.float32) / 255.0
+    img = np.transpose(img, (2, 0, 1))
+    img = np.expand_dims(img, axis=0)
+    return img, scale, pad
+
+
+def legacy_iou(box, boxes):
+    x1 = np.maximum(box[0], boxes[:, 0])
+    y1 = np.maximum(box[1], boxes[:, 1])
+    x2 = np.minimum(box[2], boxes[:, 2])
+    y2 = np.minimum(box[3], boxes[:, 3])
+    inter = np.maximum(0, x2 - x1) * np.maximum(0, y2 - y1)
+    area1 = (box[2] - box[0]) * (box[3] - box[1])
+    area2 = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return inter / (area1 + area2 - inter + 1e-6)
+
+
+def legacy_nms(boxes, scores, iou_thr):
+    idxs = scores.argsort()[::-1]
+    keep = []
+    while idxs.size > 0:
+        i = idxs[0]
+        keep.append(i)
+        if idxs.size == 1:
+            break
+        ious = legacy_iou(boxes[i], boxes[idxs[1:]])
+        idxs = idxs[1:][ious < iou_thr]
+    return keep
+
+
+def legacy_postprocess(preds, scale, pad):
+    pad_x, pad_y = pad
+    boxes = preds[:4, :]
+    scores = preds[4:, :]
+    class_scores = scores.max(axis=0)
+    class_ids = scores.argmax(axis=0)
+    mask = class_scores >= iv.YOLO_CONF_THRESHOLD
+    if not np.any(mask):
+        return []
+    boxes = boxes[:, mask]
+    class_scores = class_scores[mask]
+    class_ids = class_ids[mask]
+    x, y, w, h = boxes
+    boxes_xyxy = np.stack([
+        (x - w / 2 - pad_x) / scale, (y - h / 2 - pad_y) / scale,
+        (x + w / 2 - pad_x) / scale, (y + h / 2 - pad_y) / scale,
+    ], axis=1)
+    keep = legacy_nms(boxes_xyxy, class_scores, iv.YOLO_IOU_THRESHOLD)
+    return [
+        {"box": boxes_xyxy[i].tolist(), "score": float(class_scores[i]), "class_id": int(class_ids[i])}
+        for i in keep
+    ]
+
+
+# --- synthetic inputs ---------------------------------------------------------
+
+def make_image(h, w, seed=0):
+    rng = np.random.default_rng(seed)
+    image = rng.integers(0, 255, (h, w, 3), dtype=np.uint8)
+    return cv2.GaussianBlur(image, (9, 9), 0)
+
+
+# --- measurement --------------------------------------------------------------
+
+def measure(fn, runs):
+    """(median ms, peak extra traced KiB for one call)"""
+    fn()  # warm caches / thread-local buffers
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(times), (peak - before) / 1024
+
+
+def report(name, legacy, current):
+    (lt, lm), (ct, cm) = legacy, current
+    print(f"  {name:<22} legacy {lt:7.2f} ms {lm:9.0f} KiB | "
+          f"current {ct:7.2f} ms {cm:9.0f} KiB | {lt / ct:4.1f}x faster")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--model", action="store_true", help="also time the full _run_yolo path")
+    args = parser.parse_args()
+
+    print("Preprocessing (letterbox + normalize + layout):")
+    for h, w in SIZES:
+        image = make_image(h, w)
+        legacy = measure(lambda: legacy_preprocess(image), args.runs)
+        current = measure(lambda: iv._preprocess(image), args.runs)
+        report(f"{w}x{h}", legacy, current)
+
+    print("\nPost-processing (decode + NMS):")
+    for objects in (5, 20, 60):
+        preds = make_predictions(objects=objects)
+        scale, pad = 0.4, (0, 80)
+        legacy = measure(lambda: legacy_postprocess(preds, scale, pad), args.runs)
+        current = measure(lambda: iv._postprocess(preds, scale, pad), args.runs)
+        report(f"{objects} objects", legacy, current)
+        print(f"  {'':<22} detections kept: legacy {len(legacy_postprocess(preds, scale, pad))}, "
+              f"current {len(iv._postprocess(preds, scale, pad))} (class-aware)")
+
+    if args.model:
+        print("\nFull _run_yolo:")
+        session = get_model_manager().get_session()
+        name = session.get_inputs()[0].name
+        for h, w in SIZES:
+            image = make_image(h, w)
+
+            def legacy_run():
+                tensor, scale, pad = legacy_preprocess(image)
+                return legacy_postprocess(session.run(None, {name: tensor})[0][0], scale, pad)
+
+            report(f"{w}x{h}", measure(legacy_run, args.runs), measure(lambda: iv._run_yolo(image), args.runs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Calibration: full-resolution heuristics vs the shared analysis pyramid.
+
+For every sample image it computes the clutter metrics both ways:
+- legacy: Canny, variance and Laplacian on the full image
+- current: clutter_metrics on an ImagePyramid
+
+It reports:
+- per-indicator and decision agreement (is_garbage, tier-1 reject) using
+  the thresholds in services.image_verification
+- the thresholds that would maximise indicator agreement
+- CPU time per image
+
+Cleaning verification is checked the same way on before/after pairs:
+legacy full-resolution deltas vs cleaning_deltas on stored thumbnails.
+YOLO is not involved.
+
+Sample set: --images DIR (jpg/png/webp photos). Without it, procedurally
+generated phone-sized scenes are used (textured ground plus clutter shapes,
+camera noise, JPEG). Real photos give the meaningful numbers.
+
+Usage (from backend/): python -m benchmarks.calibrate_analysis_resolution [--images DIR] [--count 30]
+"""
+import argparse
+import os
+import statistics
+import time
+
+import cv2
+import numpy as np
+
+from benchmarks.datasets import synthetic_scene
+from services import image_verification as iv
+from services.image_features import clutter_metrics, extract_image_features
+from services.image_pyramid import ImagePyramid
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+# --- previous full-resolution implementation (baseline) ----------------------
+
+def legacy_metrics(image):
+    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    edges = cv2.Canny(gray, 50, 150)
+    return (
+        float(np.sum(edges > 0) / edges.size),
+        float(np.var(image)),
+        float(cv2.Laplacian(gray, cv2.CV_64F).var()),
+    )
+
+
+def legacy_cleaning_deltas(before, after):
+    if before.shape != after.shape:
+        after = cv2.resize(after, (before.shape[1], before.shape[0]), interpolation=cv2.INTER_LINEAR)
+    before_gray = cv2.cvtColor(before, cv2.COLOR_RGB2GRAY)
+    after_gray = cv2.cvtColor(after, cv2.COLOR_RGB2GRAY)
+    diff = cv2.absdiff(before_gray, after_gray)
+    similarity = 100 - (np.sum(diff) / (diff.shape[0] * diff.shape[1] * 255) * 100)
+    before_edges = cv2.Canny(before_gray, 50, 150)
+    after_edges = cv2.Canny(after_gray, 50, 150)
+    return (
+        float(similarity), float(100 - similarity),
+        float(np.sum(before_edges > 0) / before_edges.size),
+        float(np.sum(after_edges > 0) / after_edges.size),
+    )
+
+
+def cleaned(deltas):
+    _, difference, before_ed, after_ed = deltas
+    return difference > iv.CLEANING_MIN_DIFFERENCE or after_ed < before_ed * iv.CLEANING_EDGE_RATIO
+
+
+# --- sample set ---------------------------------------------------------------
+
+def synthetic_samples(count, h, w):
+    """Each scene is paired with its cleaned and uncleaned re-shots and with the previous (different) site."""
+    previous = None
+    for i in range(count):
+        before, after_cleaned, after_not_cleaned = synthetic_scene(i, h, w)
+        afters = (after_cleaned, after_not_cleaned) + ((previous,) if previous is not None else ())
+        yield f"scene-{i}", before, afters
+        previous = before
+
+
+def load_images(folder):
+    for name in sorted(os.listdir(folder)):
+        if name.lower().endswith(IMAGE_EXTENSIONS):
+            image = cv2.imread(os.path.join(folder, name), cv2.IMREAD_COLOR)
+            if image is not None:
+                yield name, cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+
+# --- calibration ------------------------------------------------------------
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def best_threshold(values, targets):
+    """Threshold on `values` maximising agreement of (value > t) with boolean `targets`."""
+    values = np.asarray(values)
+    targets = np.asarray(targets)
+    candidates = np.concatenate([[values.min() - 1], np.unique(values)])
+    agreement = [np.mean((values > t) == targets) for t in candidates]
+    best = int(np.argmax(agreement))
+    return float(candidates[best]), float(agreement[best])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--images", help="folder of sample photos (default: synthetic scenes)")
+    parser.add_argument("--count", type=int, default=30, help="synthetic scenes to generate")
+    parser.add_argument("--size", default="4032x3024", help="synthetic scene size WxH")
+    args = parser.parse_args()
+
+    thresholds = (iv.EDGE_DENSITY_THRESHOLD, iv.COLOR_VARIANCE_THRESHOLD, iv.LAPLACIAN_THRESHOLD)
+    names = ("edge density", "color variance", "laplacian var")
+
+    legacy_rows, current_rows, legacy_ms, current_ms = [], [], [], []
+    clean_legacy, clean_current, clean_legacy_ms, clean_current_ms = [], [], [], []
+    diff_legacy, diff_current = [], []
+
+    if args.images:
+        samples = ((name, image, None) for name, image in load_images(args.images))
+        print(f"Sample set: {args.images}")
+    else:
+        w, h = (int(v) for v in args.size.lower().split("x"))
+        samples = synthetic_samples(args.count, h, w)
+        print(f"Sample set: {args.count} synthetic {w}x{h} scenes (pass --images for real photos)")
+
+    for name, image, afters in samples:
+        legacy, ms = timed(legacy_metrics, image)
+        legacy_rows.append(legacy)
+        legacy_ms.append(ms)
+        current, ms = timed(lambda img: clutter_metrics(ImagePyramid(img)), image)
+        current_rows.append(current)
+        current_ms.append(ms)
+
+        if afters:
+            features = extract_image_features(ImagePyramid(image))
+            for after in afters:
+                deltas, ms = timed(legacy_cleaning_deltas, image, after)
+                clean_legacy.append(cleaned(deltas))
+                clean_legacy_ms.append(ms)
+                diff_legacy.append(deltas[1])
+                deltas, ms = timed(iv.cleaning_deltas, features, after)
+                clean_current.append(cleaned(deltas))
+                clean_current_ms.append(ms)
+                diff_current.append(deltas[1])
+
+    if not legacy_rows:
+        print("No images found")
+        return
+
+    legacy_rows = np.array(legacy_rows)
+    current_rows = np.array(current_rows)
+    legacy_ind = legacy_rows > np.array(thresholds)
+    current_ind = current_rows > np.array(thresholds)
+
+    print(f"\nClutter heuristic ({len(legacy_rows)} images):")
+    for k, name in enumerate(names):
+        fit, fit_agree = best_threshold(current_rows[:, k], legacy_ind[:, k])
+        print(f"  {name:<15} threshold {thresholds[k]:>8g}  agreement {np.mean(current_ind[:, k] == legacy_ind[:, k]):6.1%}"
+              f"  | best fit {fit:10.4g} ({fit_agree:.1%})  | legacy positives {legacy_ind[:, k].mean():.0%}")
+
+    legacy_score = legacy_ind.sum(axis=1)
+    current_score = current_ind.sum(axis=1)
+    print(f"  is_garbage (score >= 2) agreement: {np.mean((legacy_score >= 2) == (current_score >= 2)):.1%}")
+    print(f"  tier-1 reject (score == 0) agreement: {np.mean((legacy_score == 0) == (current_score == 0)):.1%}")
+    print(f"  CPU per image: legacy {statistics.median(legacy_ms):.1f} ms, current {statistics.median(current_ms):.1f} ms "
+          f"({statistics.median(legacy_ms) / statistics.median(current_ms):.1f}x less)")
+
+    if clean_legacy:
+        print(f"\nCleaning deltas ({len(clean_legacy)} before/after pairs):")
+        print(f"  is_cleaned agreement (CV rule): {np.mean(np.array(clean_legacy) == np.array(clean_current)):.1%}"
+              f"  | legacy cleaned {np.mean(clean_legacy):.0%}")
+        legacy_diff = np.array(diff_legacy) > iv.CLEANING_MIN_DIFFERENCE
+        fit, fit_agree = best_threshold(diff_current, legacy_diff)
+        print(f"  difference > {iv.CLEANING_MIN_DIFFERENCE}% agreement: {np.mean(legacy_diff == (np.array(diff_current) > iv.CLEANING_MIN_DIFFERENCE)):.1%}"
+              f"  | best fit {fit:.1f}% ({fit_agree:.1%})  | legacy positives {legacy_diff.mean():.0%}")
+        print(f"  CPU per verification: legacy {statistics.median(clean_legacy_ms):.1f} ms (both images), "
+              f"current {statistics.median(clean_current_ms):.1f} ms (after image vs stored thumbnail)")
+
+
+if __name__ == "__main__":
+    main()
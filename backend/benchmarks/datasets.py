@@ -0,0 +1,170 @@
+"""
+Deterministic synthetic inputs shared by the benchmarks.
+
+Everything is generated from fixed seeds, so every run (and every machine)
+benchmarks exactly the same data without shipping binary fixtures:
+- phone-like photos (textured ground plus clutter, blur, noise, JPEG)
+- YOLOv8-shaped model output with clustered candidate boxes
+- report/cleaning documents as the analytics endpoints stream them
+- coordinates around the Brahmaputra corridor
+"""
+from datetime import date, datetime, timedelta, timezone
+import random
+
+import cv2
+import numpy as np
+
+# Rough extent of the Brahmaputra corridor through Guwahati (+ the 2km geofence)
+LAT_RANGE = (26.14, 26.21)
+LON_RANGE = (91.61, 91.78)
+
+# (name, height, width) of the bundled photo set
+IMAGE_SIZES = [("640x480", 480, 640), ("1600x1200", 1200, 1600), ("4032x3024", 3024, 4032)]
+
+WASTE_TYPES = ("plastic", "organic", "mixed", "toxic", "sewage")
+
+
+# --- photos -------------------------------------------------------------------
+
+def fractal_texture(rng, h, w, beta):
+    """Zero-mean, unit-std 1/f^beta noise with detail down to pixel scale."""
+    out = np.zeros((h, w), dtype=np.float32)
+    cells = 1
+    while cells <= max(h, w):
+        gh = max(2, int(np.ceil(h * cells / max(h, w))))
+        gw = max(2, int(np.ceil(w * cells / max(h, w))))
+        layer = rng.standard_normal((gh, gw)).astype(np.float32)
+        interp = cv2.INTER_CUBIC if cells <= 64 else cv2.INTER_LINEAR
+        out += cv2.resize(layer, (w, h), interpolation=interp) / cells ** beta
+        cells *= 2
+    return out / (out.std() + 1e-6)
+
+
+def finish_photo(rng, image):
+    """Focus blur, sensor noise and JPEG round-trip, like a phone capture."""
+    blur = rng.uniform(0, 2.0)
+    if blur > 0.3:
+        image = cv2.GaussianBlur(image, (0, 0), blur)
+    image = np.clip(image + rng.normal(0, rng.uniform(0, 10), image.shape), 0, 255).astype(np.uint8)
+    encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, int(rng.integers(70, 95))])[1]
+    return cv2.imdecode(encoded, cv2.IMREAD_COLOR)
+
+
+def synthetic_scene(seed, h, w):
+    """(before, after_cleaned, after_not_cleaned) for one procedurally generated site."""
+    rng = np.random.default_rng(seed)
+    base = np.array(rng.uniform(40, 200, 3), dtype=np.float32)
+    texture = fractal_texture(rng, h, w, rng.uniform(0.0, 0.9)) * rng.uniform(10, 90)
+    ground = np.clip(base + texture[..., None] * rng.uniform(0.6, 1.4, 3), 0, 255).astype(np.uint8)
+
+    cluttered = ground.copy()
+    for _ in range(int(rng.integers(0, 150))):
+        color = tuple(int(v) for v in rng.integers(0, 255, 3))
+        cx, cy = int(rng.integers(0, w)), int(rng.integers(0, h))
+        r = int(rng.integers(10, 300)) * max(h, w) // 4032 + 2
+        kind = rng.integers(0, 3)
+        if kind == 0:
+            cv2.circle(cluttered, (cx, cy), r, color, -1)
+        elif kind == 1:
+            cv2.rectangle(cluttered, (cx, cy), (cx + r, cy + int(r * rng.uniform(0.3, 2))), color, -1)
+        else:
+            pts = (np.array([cx, cy]) + rng.integers(-r, r, (int(rng.integers(3, 7)), 2))).astype(np.int32)
+            cv2.fillPoly(cluttered, [pts], color)
+
+    exposure = rng.uniform(0.9, 1.1)
+    shift = np.float32([[1, 0, rng.uniform(-8, 8)], [0, 1, rng.uniform(-8, 8)]])
+    reshoot = lambda img: cv2.warpAffine(cv2.convertScaleAbs(img, alpha=exposure), shift, (w, h), borderMode=cv2.BORDER_REFLECT)
+    return finish_photo(rng, cluttered), finish_photo(rng, reshoot(ground)), finish_photo(rng, reshoot(cluttered))
+
+
+def image_set(seed: int = 7) -> list:
+    """The bundled photo set: [(name, RGB array, JPEG bytes)] for each IMAGE_SIZES entry."""
+    images = []
+    for i, (name, h, w) in enumerate(IMAGE_SIZES):
+        photo = synthetic_scene(seed + i, h, w)[0]
+        jpeg = cv2.imencode(".jpg", photo, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+        images.append((name, cv2.cvtColor(photo, cv2.COLOR_BGR2RGB), jpeg))
+    return images
+
+
+# --- model output -------------------------------------------------------------
+
+def make_predictions(objects=20, per_object=15, anchors=8400, seed=0):
+    """YOLOv8-shaped output with `objects` clusters of overlapping candidate boxes."""
+    rng = np.random.default_rng(seed)
+    preds = np.zeros((84, anchors), dtype=np.float32)
+    preds[4:] = rng.uniform(0, 0.05, (80, anchors))
+    slots = rng.choice(anchors, objects * per_object, replace=False).reshape(objects, per_object)
+    for obj in slots:
+        cx, cy = rng.uniform(60, 580, 2)
+        size = rng.uniform(20, 120)
+        class_id = rng.integers(0, 80)
+        preds[0, obj] = cx + rng.normal(0, 3, obj.size)
+        preds[1, obj] = cy + rng.normal(0, 3, obj.size)
+        preds[2, obj] = size * rng.uniform(0.9, 1.1, obj.size)
+        preds[3, obj] = size * rng.uniform(0.9, 1.1, obj.size)
+        preds[4 + class_id, obj] = rng.uniform(0.4, 0.95, obj.size)
+    return preds
+
+
+# --- coordinates and documents ------------------------------------------------
+
+def make_coordinates(n: int, seed: int = 42, margin: float = 0.03):
+    """(lats, lons) arrays uniformly spread over the corridor plus `margin` degrees (some fall outside the geofence)"""
+    rng = np.random.default_rng(seed)
+    lats = rng.uniform(LAT_RANGE[0] - margin, LAT_RANGE[1] + margin, n)
+    lons = rng.uniform(LON_RANGE[0] - margin, LON_RANGE[1] + margin, n)
+    return lats, lons
+
+
+def make_documents(n_reports: int, seed: int = 42, users: int = None) -> tuple:
+    """
+    (reports, cleanings) as the analytics routes see them (doc.to_dict()).
+    Users follow a skewed activity distribution; about 40% of reports are
+    cleaned, each with one cleaning document; a few reports are anonymous.
+    """
+    rng = random.Random(seed)
+    users = users or max(10, n_reports // 20)
+    user_ids = [f"user-{i:06d}" for i in range(users)]
+    user_types = ["ngo" if i % 10 == 0 else "individual" for i in range(users)]
+    weights = [1.0 / (i + 1) ** 0.8 for i in range(users)]
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    reports, cleanings = [], []
+    picks = rng.choices(range(users), weights=weights, k=n_reports)
+    for i, u in enumerate(picks):
+        anonymous = rng.random() < 0.02
+        cleaned = rng.random() < 0.4
+        created = start + timedelta(minutes=rng.randrange(0, 2 * 365 * 24 * 60))
+        reports.append({
+            "userId": None if anonymous else user_ids[u],
+            "userName": None if anonymous else f"User {u}",
+            "userType": user_types[u],
+            "wasteType": rng.choice(WASTE_TYPES),
+            "status": "cleaned" if cleaned else "active",
+            "latitude": rng.uniform(*LAT_RANGE),
+            "longitude": rng.uniform(*LON_RANGE),
+            "createdAt": created.isoformat(),
+        })
+        if cleaned:
+            c = rng.choices(range(users), weights=weights)[0]
+            cleanings.append({
+                "reportId": f"report-{i}",
+                "userId": user_ids[c],
+                "userName": f"User {c}",
+                "userType": user_types[c],
+                "pointsAwarded": rng.choice((10, 20, 30, 50)),
+                "cleanedAt": (created + timedelta(days=rng.randrange(0, 30))).isoformat(),
+            })
+    return reports, cleanings
+
+
+def make_daily_counts(start: date, days: int, seed: int = 42) -> dict:
+    """stats_daily-style {"YYYY-MM-DD": {"reports": n, "cleanings": n}} with a few missing days"""
+    rng = random.Random(seed)
+    counts = {}
+    for d in range(days):
+        if rng.random() < 0.9:
+            day = start + timedelta(days=d)
+            counts[day.isoformat()] = {"reports": rng.randrange(0, 60), "cleanings": rng.randrange(0, 30)}
+    return counts
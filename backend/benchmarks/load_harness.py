@@ -0,0 +1,457 @@
+"""
+Load test: realistic report/cleaning/leaderboard traffic against the API.
+
+By default a uvicorn server is spawned with the in-process stand-ins
+(FIRESTORE_BACKEND=memory, CLOUDINARY_BACKEND=local) and injected latency
+for Firestore and Cloudinary calls, so the run needs no credentials and
+touches no shared data. `--url` targets an already running server instead
+(its configured backends are used as-is - seeding writes real documents).
+
+The harness seeds reports through the API (upload-image + report, then a
+share of them cleaned), then runs `--concurrency` keep-alive clients that
+pick endpoints from a weighted traffic mix for `--duration` seconds and
+reports per-endpoint count, errors, business rejections (HTTP 200 with
+success=false), throughput and p50/p95/p99 latency.
+
+Usage (from backend/):
+    python -m benchmarks.load_harness                                  # 30s, 32 clients
+    python -m benchmarks.load_harness --duration 60 --concurrency 64 --workers 2
+    python -m benchmarks.load_harness --firestore-latency-ms 40 --cloudinary-latency-ms 300
+    python -m benchmarks.load_harness --mix leaderboard_users=50 available_cleanings=50
+    python -m benchmarks.load_harness --url http://127.0.0.1:5000 --seed-reports 0
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlencode, urlsplit
+
+import cv2
+
+from benchmarks.bench_startup import BACKEND_DIR, free_port
+from benchmarks.datasets import LAT_RANGE, LON_RANGE, WASTE_TYPES, synthetic_scene
+
+# name -> weight; each name is a scenario method on LoadClient
+DEFAULT_MIX = {
+    "leaderboard_users": 20,
+    "leaderboard_cleaning": 10,
+    "leaderboard_ngos": 5,
+    "global_stats": 10,
+    "user_stats": 10,
+    "available_cleanings": 20,
+    "check_geofence": 5,
+    "check_location": 5,
+    "create_report": 5,
+    "mark_cleaned": 3,
+}
+
+
+# --- minimal HTTP/1.1 client (keep-alive, Content-Length or chunked bodies) ---
+
+class HttpConnection:
+    def __init__(self, host: str, port: int):
+        self.host, self.port = host, port
+        self._reader = self._writer = None
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._reader = self._writer = None
+
+    async def request(self, method: str, path: str, json_body=None) -> tuple:
+        """(status, body bytes); reconnects once if the kept-alive socket was closed"""
+        body = json.dumps(json_body).encode() if json_body is not None else b""
+        head = (
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: keep-alive\r\n"
+            + ("Content-Type: application/json\r\n" if json_body is not None else "")
+            + "\r\n"
+        ).encode()
+        for attempt in (0, 1):
+            if self._writer is None:
+                self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+            try:
+                self._writer.write(head + body)
+                await self._writer.drain()
+                return await self._read_response()
+            except (ConnectionError, asyncio.IncompleteReadError):
+                await self.close()
+                if attempt:
+                    raise
+
+    async def _read_response(self) -> tuple:
+        status_line = await self._reader.readuntil(b"\r\n")
+        status = int(status_line.split()[1])
+        headers = {}
+        while (line := await self._reader.readuntil(b"\r\n")) != b"\r\n":
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while (size := int((await self._reader.readuntil(b"\r\n")).split(b";")[0], 16)):
+                chunks.append(await self._reader.readexactly(size))
+                await self._reader.readexactly(2)
+            await self._reader.readuntil(b"\r\n")
+            body = b"".join(chunks)
+        else:
+            body = await self._reader.readexactly(int(headers.get("content-length", 0)))
+        if headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, body
+
+
+# --- workload -----------------------------------------------------------------
+
+def make_photos(count: int, seed: int = 1000) -> list:
+    """[(before_b64, after_cleaned_b64)] data URIs from distinct synthetic scenes"""
+    encode = lambda img: "data:image/jpeg;base64," + base64.b64encode(
+        cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 85])[1].tobytes()).decode()
+    photos = []
+    for i in range(count):
+        before, after_cleaned, _ = synthetic_scene(seed + i, 480, 640)
+        photos.append((encode(before), encode(after_cleaned)))
+    return photos
+
+
+def geofence_points(count: int, seed: int = 7) -> list:
+    """Points inside the Brahmaputra geofence, one per ~150 m grid cell so duplicate-location checks pass"""
+    from services.geofence_service import is_within_brahmaputra_geofence
+
+    rng = random.Random(seed)
+    cell = 0.0015  # degrees, ~150 m
+    used = set()
+    points = []
+    for _ in range(count * 50):
+        if len(points) >= count:
+            break
+        lat, lon = rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE)
+        key = (int(lat / cell), int(lon / cell))
+        if any((key[0] + dy, key[1] + dx) in used for dy in (-1, 0, 1) for dx in (-1, 0, 1)):
+            continue
+        if not is_within_brahmaputra_geofence(lat, lon)["allowed"]:
+            continue
+        used.add(key)
+        points.append((round(lat, 6), round(lon, 6)))
+    return points
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}  # endpoint -> [latency ms]
+        self.errors = {}
+        self.rejected = {}
+
+    def record(self, endpoint: str, ms: float, ok: bool, rejected: bool = False):
+        self.samples.setdefault(endpoint, []).append(ms)
+        if not ok:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+        elif rejected:
+            self.rejected[endpoint] = self.rejected.get(endpoint, 0) + 1
+
+    def summary(self, elapsed: float) -> dict:
+        def pct(sorted_ms, p):
+            return round(sorted_ms[min(len(sorted_ms) - 1, int(len(sorted_ms) * p))], 2)
+
+        rows = {}
+        for endpoint, ms in sorted(self.samples.items()):
+            ms = sorted(ms)
+            rows[endpoint] = {
+                "count": len(ms),
+                "errors": self.errors.get(endpoint, 0),
+                "rejected": self.rejected.get(endpoint, 0),
+                "rps": round(len(ms) / elapsed, 2),
+                "p50_ms": pct(ms, 0.50),
+                "p95_ms": pct(ms, 0.95),
+                "p99_ms": pct(ms, 0.99),
+                "max_ms": round(ms[-1], 2),
+            }
+        return rows
+
+
+class LoadClient:
+    """One keep-alive connection; scenarios share the report pool across clients"""
+
+    def __init__(self, host, port, state, recorder: Recorder, rng: random.Random):
+        self.conn = HttpConnection(host, port)
+        self.state = state
+        self.recorder = recorder
+        self.rng = rng
+
+    async def call(self, endpoint: str, method: str, path: str, body=None, params=None):
+        if params:
+            path = f"{path}?{urlencode(params)}"
+        start = time.perf_counter()
+        try:
+            status, raw = await self.conn.request(method, path, body)
+        except (OSError, asyncio.IncompleteReadError):
+            if self.recorder is not None:
+                self.recorder.record(endpoint, (time.perf_counter() - start) * 1000, ok=False)
+            return None
+        elapsed = (time.perf_counter() - start) * 1000
+        data = None
+        if status < 300:
+            try:
+                data = json.loads(raw)
+            except ValueError:
+                pass
+        rejected = isinstance(data, dict) and data.get("success") is False
+        if self.recorder is not None:
+            self.recorder.record(endpoint, elapsed, ok=status < 300, rejected=rejected)
+        return data
+
+    def user(self):
+        return self.rng.choice(self.state["users"])
+
+    def point(self):
+        return self.rng.choice(self.state["points"])
+
+    # --- scenarios ---
+
+    async def leaderboard_users(self):
+        await self.call("GET /analytics/leaderboard/users", "GET", "/analytics/leaderboard/users", params={"category": "reporting"})
+
+    async def leaderboard_cleaning(self):
+        await self.call("GET /analytics/leaderboard/users?category=cleaning", "GET", "/analytics/leaderboard/users", params={"category": "cleaning"})
+
+    async def leaderboard_ngos(self):
+        await self.call("GET /analytics/leaderboard/ngos", "GET", "/analytics/leaderboard/ngos")
+
+    async def global_stats(self):
+        await self.call("GET /analytics/global", "GET", "/analytics/global")
+
+    async def user_stats(self):
+        await self.call("GET /analytics/user/{id}", "GET", f"/analytics/user/{self.user()['userId']}")
+
+    async def available_cleanings(self):
+        lat, lon = self.point()
+        await self.call("GET /cleaning/available", "GET", "/cleaning/available",
+                        params={"userType": "individual", "userLat": lat, "userLon": lon, "limit": 20})
+
+    async def check_geofence(self):
+        lat, lon = self.point()
+        await self.call("GET /reporting/check-geofence", "GET", "/reporting/check-geofence",
+                        params={"latitude": lat, "longitude": lon})
+
+    async def check_location(self):
+        lat, lon = self.point()
+        await self.call("POST /reporting/check-location", "POST", "/reporting/check-location",
+                        params={"latitude": lat, "longitude": lon})
+
+    async def create_report(self):
+        """New report with raw image data: garbage verification + upload + write"""
+        if not self.state["free_points"]:
+            return await self.check_location()  # every grid cell has an active report
+        lat, lon = self.state["free_points"].pop()
+        photo = self.rng.randrange(len(self.state["photos"]))
+        user = self.user()
+        data = await self.call("POST /reporting/report", "POST", "/reporting/report", body={
+            "latitude": lat, "longitude": lon, "wasteType": self.rng.choice(WASTE_TYPES),
+            "imageBase64": self.state["photos"][photo][0], **user,
+        })
+        if data and data.get("success"):
+            self.state["active"].append((data["reportId"], photo, (lat, lon)))
+
+    async def seed_report(self):
+        """Seeding path: upload first, then create the report from the URL (as the web client does)"""
+        if not self.state["free_points"]:
+            return
+        lat, lon = self.state["free_points"].pop()
+        photo = self.rng.randrange(len(self.state["photos"]))
+        upload = await self.call("POST /reporting/upload-image", "POST", "/reporting/upload-image",
+                                 body={"image_base64": self.state["photos"][photo][0]})
+        if not upload or not upload.get("success"):
+            return
+        data = await self.call("POST /reporting/report (imageUrl)", "POST", "/reporting/report", body={
+            "latitude": lat, "longitude": lon, "wasteType": self.rng.choice(WASTE_TYPES),
+            "imageUrl": upload["url"], "imagePublicId": upload["public_id"], **self.user(),
+        })
+        if data and data.get("success"):
+            self.state["active"].append((data["reportId"], photo, (lat, lon)))
+
+    async def mark_cleaned(self):
+        if not self.state["active"]:
+            return
+        report_id, photo, point = self.state["active"].pop(self.rng.randrange(len(self.state["active"])))
+        data = await self.call("POST /cleaning/mark-cleaned", "POST", "/cleaning/mark-cleaned", body={
+            "reportId": report_id, "afterImageBase64": self.state["photos"][photo][1], **self.user(),
+        })
+        if data and data.get("success"):
+            self.state["free_points"].insert(0, point)  # cleaned reports drop their location
+
+
+def make_users(count: int) -> list:
+    users = []
+    for i in range(count):
+        ngo = i % 10 == 0
+        users.append({
+            "userId": f"load-{'ngo' if ngo else 'user'}-{i:04d}",
+            "userName": f"Load {'NGO' if ngo else 'User'} {i}",
+            "userType": "ngo" if ngo else "individual",
+        })
+    return users
+
+
+async def wait_until_up(host, port, timeout: float = 60.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        conn = HttpConnection(host, port)
+        try:
+            status, _ = await conn.request("GET", "/health")
+            if status == 200:
+                return
+        except OSError:
+            await asyncio.sleep(0.1)
+        finally:
+            await conn.close()
+    raise TimeoutError("server did not answer /health in time")
+
+
+async def run(args, host, port) -> dict:
+    print(f"Generating {args.images} synthetic photos...")
+    photos = make_photos(args.images)
+    points = geofence_points(args.seed_reports + 1000)
+    state = {
+        "photos": photos,
+        "points": points,
+        "free_points": list(reversed(points)),
+        "users": make_users(args.users),
+        "active": [],
+    }
+    await wait_until_up(host, port)
+
+    if args.seed_reports:
+        print(f"Seeding {args.seed_reports} reports...")
+        seeders = [LoadClient(host, port, state, None, random.Random(i)) for i in range(min(8, args.seed_reports))]
+        for n in range(0, args.seed_reports, len(seeders)):
+            batch = seeders[:min(len(seeders), args.seed_reports - n)]
+            await asyncio.gather(*(c.seed_report() for c in batch))
+        cleaned = int(len(state["active"]) * args.seed_cleaned)
+        for n in range(0, cleaned, len(seeders)):
+            await asyncio.gather(*(c.mark_cleaned() for c in seeders[:min(len(seeders), cleaned - n)]))
+        for c in seeders:
+            await c.conn.close()
+        print(f"  {len(state['active'])} active reports, {cleaned} marked cleaned")
+
+    mix = dict(DEFAULT_MIX)
+    for spec in args.mix or ():
+        name, _, weight = spec.partition("=")
+        if name not in DEFAULT_MIX:
+            raise SystemExit(f"unknown scenario {name!r}; choose from {', '.join(DEFAULT_MIX)}")
+        mix[name] = float(weight)
+    names = [n for n, w in mix.items() if w > 0]
+    weights = [mix[n] for n in names]
+
+    recorder = Recorder()
+    deadline = time.perf_counter() + args.duration
+
+    async def worker(i):
+        client = LoadClient(host, port, state, recorder, random.Random(args.seed + i))
+        try:
+            while time.perf_counter() < deadline:
+                await getattr(client, client.rng.choices(names, weights)[0])()
+        finally:
+            await client.conn.close()
+
+    print(f"Running {args.concurrency} clients for {args.duration:.0f}s...")
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+
+    rows = recorder.summary(elapsed)
+    total = sum(r["count"] for r in rows.values())
+    return {
+        "meta": {
+            "duration_s": round(elapsed, 2),
+            "concurrency": args.concurrency,
+            "workers": args.workers if not args.url else None,
+            "firestore_latency_ms": args.firestore_latency_ms,
+            "cloudinary_latency_ms": args.cloudinary_latency_ms,
+            "requests": total,
+            "rps": round(total / elapsed, 2),
+            "mix": mix,
+        },
+        "endpoints": rows,
+    }
+
+
+def spawn_server(args, port: int):
+    env = {
+        **os.environ,
+        "FIRESTORE_BACKEND": "memory",
+        "CLOUDINARY_BACKEND": "local",
+        "LOCAL_MEDIA_DIR": tempfile.mkdtemp(prefix="luit-load-media-"),
+        "LOCAL_MEDIA_BASE_URL": f"http://127.0.0.1:{port}",
+        "FIRESTORE_FAKE_LATENCY_MS": str(args.firestore_latency_ms),
+        "CLOUDINARY_FAKE_LATENCY_MS": str(args.cloudinary_latency_ms),
+        "LOG_LEVEL": os.environ.get("LOG_LEVEL", "WARNING"),
+    }
+    if args.workers > 1:
+        # Each worker process would hold its own in-memory database
+        print("note: --workers > 1 gives every worker a separate in-memory Firestore")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+
+
+def print_report(result: dict):
+    meta = result["meta"]
+    print(f"\n{meta['requests']} requests in {meta['duration_s']}s = {meta['rps']} req/s "
+          f"(concurrency {meta['concurrency']})\n")
+    print(f"  {'endpoint':<48} {'count':>6} {'err':>5} {'rej':>5} {'req/s':>7} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for endpoint, r in result["endpoints"].items():
+        print(f"  {endpoint:<48} {r['count']:>6} {r['errors']:>5} {r['rejected']:>5} {r['rps']:>7.1f} "
+              f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f}")
+    print("\n  (latencies in ms; rej = HTTP 200 with success=false)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", help="target a running server instead of spawning one")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of mixed traffic")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent keep-alive clients")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the spawned server")
+    parser.add_argument("--firestore-latency-ms", type=float, default=20.0, help="injected latency per Firestore call")
+    parser.add_argument("--cloudinary-latency-ms", type=float, default=150.0, help="injected latency per Cloudinary call")
+    parser.add_argument("--seed-reports", type=int, default=200, help="reports created before the timed run")
+    parser.add_argument("--seed-cleaned", type=float, default=0.25, help="share of seeded reports marked cleaned")
+    parser.add_argument("--users", type=int, default=50, help="distinct users (every 10th is an NGO)")
+    parser.add_argument("--images", type=int, default=64, help="distinct synthetic photos to cycle through")
+    parser.add_argument("--mix", nargs="+", metavar="SCENARIO=WEIGHT", help=f"override weights ({', '.join(DEFAULT_MIX)})")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the clients")
+    parser.add_argument("--output", help="also write the results as JSON")
+    args = parser.parse_args()
+
+    proc = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+    else:
+        host, port = "127.0.0.1", free_port()
+        proc = spawn_server(args, port)
+    try:
+        result = asyncio.run(run(args, host, port))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    print_report(result)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    return 1 if any(r["errors"] for r in result["endpoints"].values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,300 @@
+"""
+Offline benchmark suite for the backend hot paths, with baseline comparison.
+
+Groups:
+  image      decode, letterbox, preprocess, NMS, clutter heuristics and feature
+             extraction on the bundled synthetic photo set; ONNX inference when
+             the model file is already on disk (never downloaded here)
+  geo        geofence check, scalar/vectorized haversine, geohash encode and
+             query bounds
+  analytics  global summary over synthetic in-memory datasets, the points
+             ledger work behind leaderboards and per-user totals (building
+             award entries, batching totals increments, reconciliation sums),
+             plus time-series bucketing
+
+Nothing touches the network, Firestore or Cloudinary. Results are written as
+JSON; with a baseline file present each case is compared against it and the
+run exits non-zero on a regression. Timings are normalized by a fixed
+reference workload measured in the same run, so a baseline recorded on a
+faster or slower machine still gives comparable ratios.
+
+Usage (from backend/):
+    python -m benchmarks.suite                      # default scale, compare with benchmarks/baseline.json
+    python -m benchmarks.suite --scale full         # analytics up to 1M documents
+    python -m benchmarks.suite --only geo analytics
+    python -m benchmarks.suite --update-baseline    # record a new baseline
+"""
+import argparse
+from datetime import date, datetime, timezone
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, "results", "latest.json")
+
+# Document counts for the analytics group
+SCALES = {
+    "quick": [10_000],
+    "default": [10_000, 100_000],
+    "full": [10_000, 100_000, 1_000_000],
+}
+
+_cases = []
+
+
+def case(group: str):
+    """Register a case generator: yields (name, fn, items) tuples; fn() is what gets timed."""
+    def register(setup):
+        _cases.append((group, setup))
+        return setup
+    return register
+
+
+# --- image --------------------------------------------------------------------
+
+@case("image")
+def image_cases(scale):
+    from benchmarks.datasets import image_set, make_predictions
+    from services import image_verification as iv
+    from services.image_features import clutter_metrics, extract_image_features
+    from services.image_pyramid import ImagePyramid
+
+    canvas = np.empty((iv.YOLO_INPUT_SIZE, iv.YOLO_INPUT_SIZE, 3), dtype=np.uint8)
+    for name, image, jpeg in image_set():
+        yield f"image.decode[{name}]", lambda jpeg=jpeg: iv.decode_image_bytes(jpeg), 1
+        yield f"image.letterbox[{name}]", lambda image=image: iv._letterbox_into(image, canvas), 1
+        yield f"image.preprocess[{name}]", lambda image=image: iv._preprocess(image), 1
+        yield f"image.heuristics[{name}]", lambda image=image: clutter_metrics(ImagePyramid(image)), 1
+        yield f"image.features[{name}]", lambda image=image: extract_image_features(ImagePyramid(image)), 1
+
+    for objects in (20, 60):
+        preds = make_predictions(objects=objects)
+        yield f"image.nms[{objects} objects]", lambda preds=preds: iv._postprocess(preds, 0.4, (0, 80)), 1
+
+    from services.model_manager import YOLO_MODEL_PATH, _create_session
+    if os.path.exists(YOLO_MODEL_PATH):
+        session = _create_session(YOLO_MODEL_PATH)
+        tensor, _, _ = iv._preprocess(image_set()[0][1])
+        feed = {session.get_inputs()[0].name: tensor.copy()}
+        yield "image.inference[yolov8n]", lambda: session.run(None, feed), 1
+    else:
+        yield "image.inference[yolov8n]", None, "model file not on disk (YOLO_ONNX_PATH)"
+
+
+# --- geo ----------------------------------------------------------------------
+
+@case("geo")
+def geo_cases(scale):
+    from benchmarks.datasets import make_coordinates
+    from services.geofence_service import is_within_brahmaputra_geofence
+    from services.location_service import (
+        encode_geohash,
+        geohash_query_bounds,
+        haversine_distance,
+        haversine_distances,
+    )
+
+    lats, lons = make_coordinates(10_000)
+    points = list(zip(lats.tolist(), lons.tolist()))
+    origin = points[0]
+
+    def geofence():
+        for lat, lon in points:
+            is_within_brahmaputra_geofence(lat, lon)
+
+    def haversine_scalar():
+        for lat, lon in points:
+            haversine_distance(origin[0], origin[1], lat, lon)
+
+    def geohash_encode():
+        for lat, lon in points:
+            encode_geohash(lat, lon)
+
+    def query_bounds():
+        for i, (lat, lon) in enumerate(points[:1000]):
+            geohash_query_bounds(lat, lon, (100, 500, 2000)[i % 3])
+
+    yield "geo.geofence[10k points]", geofence, len(points)
+    yield "geo.haversine_scalar[10k points]", haversine_scalar, len(points)
+    big_lats, big_lons = make_coordinates(1_000_000, seed=7)
+    yield "geo.haversine_vectorized[1M points]", lambda: haversine_distances(origin[0], origin[1], big_lats, big_lons), len(big_lats)
+    yield "geo.geohash_encode[10k points]", geohash_encode, len(points)
+    yield "geo.query_bounds[1k queries]", query_bounds, 1000
+
+
+# --- analytics ----------------------------------------------------------------
+
+@case("analytics")
+def analytics_cases(scale):
+    from benchmarks.datasets import make_daily_counts, make_documents
+    from services.analytics_service import summarize_reports
+    from services.points_service import _ledger_totals, _totals_update, cleaning_award, report_award
+    from services.stats_service import build_series, sum_counts
+
+    def award_entries(reports, cleanings):
+        entries = [report_award(f"report-{i}", r) for i, r in enumerate(reports)]
+        entries += [cleaning_award(c["reportId"], c) for c in cleanings]
+        return [entry for entry in entries if entry]
+
+    for n in SCALES[scale]:
+        label = f"{n // 1000}k" if n < 1_000_000 else f"{n // 1_000_000}M"
+        reports, cleanings = make_documents(n)
+        entries = award_entries(reports, cleanings)
+
+        yield f"analytics.global_summary[{label} reports]", lambda r=reports: summarize_reports(r), len(reports)
+        yield (f"points.award_entries[{label} reports]",
+               lambda r=reports, c=cleanings: award_entries(r, c), len(reports) + len(cleanings))
+        yield f"points.ledger_totals[{label} reports]", lambda e=entries: _ledger_totals(e), len(entries)
+        del reports, cleanings, entries
+
+    # One report batch commit: totals increments for up to 50 awards
+    batch_entries = award_entries(*make_documents(50))
+    yield "points.totals_update[50 awards]", lambda: _totals_update(batch_entries), len(batch_entries)
+
+    start, end = date(2023, 1, 1), date(2025, 12, 31)
+    counts = make_daily_counts(start, (end - start).days + 1)
+    for granularity in ("daily", "weekly", "monthly"):
+        yield (f"stats.build_series[3y {granularity}]",
+               lambda g=granularity: build_series(counts, start, end, g), len(counts))
+    yield "stats.sum_counts[3y]", lambda: sum_counts(counts, start, end), len(counts)
+
+
+# --- measurement --------------------------------------------------------------
+
+def reference_workload():
+    """Fixed mixed Python/numpy work used to normalize timings across machines."""
+    total = 0
+    for i in range(200_000):
+        total += i * i % 7
+    a = np.arange(1_000_000, dtype=np.float64)
+    return total + float(np.sqrt(a).sum())
+
+
+def measure(fn, min_time: float, min_runs: int = 5, max_runs: int = 200) -> dict:
+    fn()  # warm caches, thread-local buffers and lazy imports
+    times = []
+    deadline = time.perf_counter() + min_time
+    while len(times) < min_runs or (time.perf_counter() < deadline and len(times) < max_runs):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return {
+        "median_ms": round(statistics.median(times), 4),
+        "p95_ms": round(times[min(len(times) - 1, int(len(times) * 0.95))], 4),
+        "min_ms": round(times[0], 4),
+        "runs": len(times),
+    }
+
+
+def run_suite(groups, scale: str, min_time: float) -> dict:
+    import cv2
+
+    reference = measure(reference_workload, min_time)
+    print(f"reference workload: {reference['median_ms']:.2f} ms")
+    results = {}
+    for group, setup in _cases:
+        if groups and group not in groups:
+            continue
+        print(f"\n[{group}]")
+        for name, fn, items in setup(scale):
+            if fn is None:
+                results[name] = {"group": group, "skipped": items}
+                print(f"  {name:<46} skipped ({items})")
+                continue
+            stats = measure(fn, min_time)
+            stats["group"] = group
+            stats["items"] = items
+            stats["items_per_s"] = round(items / (stats["median_ms"] / 1000), 1) if stats["median_ms"] else None
+            results[name] = stats
+            print(f"  {name:<46} {stats['median_ms']:10.3f} ms  (p95 {stats['p95_ms']:.3f}, {stats['runs']} runs)")
+
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "scale": scale,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "opencv": cv2.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor() or platform.machine(),
+            "cpus": os.cpu_count(),
+            "reference_ms": reference["median_ms"],
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float, normalize: bool = True) -> list:
+    """[(name, ratio, status)] for cases present in both runs; ratio > 1 means slower than baseline"""
+    factor = 1.0
+    if normalize and baseline["meta"].get("reference_ms") and current["meta"].get("reference_ms"):
+        factor = baseline["meta"]["reference_ms"] / current["meta"]["reference_ms"]
+    rows = []
+    for name, cur in current["results"].items():
+        base = baseline["results"].get(name)
+        if not base or "median_ms" not in base or "median_ms" not in cur or not base["median_ms"]:
+            continue
+        ratio = cur["median_ms"] * factor / base["median_ms"]
+        if ratio > 1 + tolerance:
+            status = "REGRESSION"
+        elif ratio < 1 / (1 + tolerance):
+            status = "faster"
+        else:
+            status = "ok"
+        rows.append((name, ratio, status))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--only", nargs="+", choices=sorted({g for g, _ in _cases}), help="groups to run")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="default", help="analytics dataset sizes")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds of timed runs per case")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="where to write the JSON results")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before a case counts as a regression")
+    parser.add_argument("--no-normalize", action="store_true", help="compare raw timings (same machine only)")
+    parser.add_argument("--update-baseline", action="store_true", help="write the results to --baseline")
+    args = parser.parse_args()
+
+    current = run_suite(args.only, args.scale, args.min_time)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(current, f, indent=2, sort_keys=True)
+    print(f"\nResults written to {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    rows = compare(current, baseline, args.tolerance, normalize=not args.no_normalize)
+    print(f"\nAgainst baseline ({baseline['meta'].get('created')}, tolerance {args.tolerance:.0%}):")
+    for name, ratio, status in rows:
+        print(f"  {name:<46} {ratio:6.2f}x  {status}")
+    regressions = [name for name, _, status in rows if status == "REGRESSION"]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
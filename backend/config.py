@@ -1,6 +1,8 @@
 from pydantic_settings import BaseSettings
 from pydantic import Field
 from functools import lru_cache
+import os
+import tempfile
 
 class Settings(BaseSettings):
     # Firebase - explicitly map to uppercase env vars
@@ -18,11 +20,65 @@ class Settings(BaseSettings):
     cloudinary_api_key: str = Field(default="", alias="CLOUDINARY_API_KEY")
     cloudinary_api_secret: str = Field(default="", alias="CLOUDINARY_API_SECRET")
     
+    # Storage backends: "memory" / "local" swap in the in-process stand-ins
+    # (services/memory_firestore.py, services/local_media.py) for local runs and load tests
+    firestore_backend: str = Field(default="firebase", alias="FIRESTORE_BACKEND")        # firebase | memory
+    cloudinary_backend: str = Field(default="cloudinary", alias="CLOUDINARY_BACKEND")    # cloudinary | local
+    local_media_dir: str = Field(default=os.path.join(tempfile.gettempdir(), "luit-local-media"), alias="LOCAL_MEDIA_DIR")
+    local_media_base_url: str = Field(default="", alias="LOCAL_MEDIA_BASE_URL")          # default http://localhost:{backend_port}
+    # Injected per-call latency for the stand-ins (milliseconds, jitter as a +/- fraction)
+    firestore_fake_latency_ms: float = Field(default=0.0, alias="FIRESTORE_FAKE_LATENCY_MS")
+    cloudinary_fake_latency_ms: float = Field(default=0.0, alias="CLOUDINARY_FAKE_LATENCY_MS")
+    fake_latency_jitter: float = Field(default=0.2, alias="FAKE_LATENCY_JITTER")
+    
+    # Idempotency-Key handling for report/cleaning submissions (services/idempotency.py)
+    idempotency_ttl_seconds: float = Field(default=86400, alias="IDEMPOTENCY_TTL_SECONDS")
+    idempotency_backend: str = Field(default="auto", alias="IDEMPOTENCY_BACKEND")      # auto (firestore with 2+ workers) | memory | firestore
+
+    # Stored photo encoding (services/image_encoding.py); also advertised at GET /config/client
+    image_max_dimension: int = Field(default=1600, alias="IMAGE_MAX_DIMENSION")       # longest side, px
+    image_format: str = Field(default="webp", alias="IMAGE_FORMAT")                    # webp | jpeg
+    image_quality: int = Field(default=80, alias="IMAGE_QUALITY")
+    client_image_quality: float = Field(default=0.8, alias="CLIENT_IMAGE_QUALITY")     # canvas toDataURL quality
+    client_max_image_kb: int = Field(default=700, alias="CLIENT_MAX_IMAGE_KB")
+
+    # Background jobs (services/scheduler.py, services/jobs.py)
+    scheduler_enabled: bool = Field(default=True, alias="SCHEDULER_ENABLED")
+    scheduler_stats_cron: str = Field(default="17 3 * * *", alias="SCHEDULER_STATS_CRON")      # UTC
+    scheduler_points_cron: str = Field(default="27 3 * * *", alias="SCHEDULER_POINTS_CRON")    # UTC
+
+    # Orphaned image sweep (services/cloudinary_sweep.py)
+    cloudinary_sweep_cron: str = Field(default="43 4 * * *", alias="CLOUDINARY_SWEEP_CRON")        # UTC
+    cloudinary_sweep_prefix: str = Field(default="luit/reports", alias="CLOUDINARY_SWEEP_PREFIX")
+    cloudinary_sweep_grace_hours: float = Field(default=24, alias="CLOUDINARY_SWEEP_GRACE_HOURS")  # skip younger assets
+    cloudinary_sweep_max_deletes: int = Field(default=5000, alias="CLOUDINARY_SWEEP_MAX_DELETES")  # per run
+    cloudinary_admin_api_interval_seconds: float = Field(default=1.0, alias="CLOUDINARY_ADMIN_API_INTERVAL_SECONDS")
+
+    # Batch report ingestion (POST /reporting/report/batch)
+    report_batch_max_items: int = Field(default=50, alias="REPORT_BATCH_MAX_ITEMS")
+    report_batch_verify_concurrency: int = Field(default=0, alias="REPORT_BATCH_VERIFY_CONCURRENCY")  # 0 = CPU count
+    report_batch_upload_concurrency: int = Field(default=4, alias="REPORT_BATCH_UPLOAD_CONCURRENCY")
+
     # Backend
     backend_port: int = 5000
     backend_env: str = "development"
     frontend_url: str = "http://localhost:3000"
     
+    # Reject report photos within this many pHash bits of an active report's photo
+    photo_duplicate_max_distance: int = Field(default=6, alias="PHOTO_DUPLICATE_MAX_DISTANCE")
+    photo_index_refresh_seconds: int = Field(default=300, alias="PHOTO_INDEX_REFRESH_SECONDS")  # per-process rebuild; 0 disables
+    
+    # Garbage verification cascade
+    # Tier 0: cheap rejections before any model work
+    verify_max_image_mb: float = Field(default=10.0, alias="VERIFY_MAX_IMAGE_MB")
+    verify_min_image_kb: float = Field(default=2.0, alias="VERIFY_MIN_IMAGE_KB")
+    verify_dark_mean_max: float = Field(default=20.0, alias="VERIFY_DARK_MEAN_MAX")    # mean luminance (0-255)
+    verify_blank_std_max: float = Field(default=6.0, alias="VERIFY_BLANK_STD_MAX")     # luminance std-dev
+    verify_thumbnail_size: int = Field(default=256, alias="VERIFY_THUMBNAIL_SIZE")    # long side for the dark/blank check
+    # Tier 1: clutter heuristic score (0-3 indicators) from the shared analysis pyramid
+    verify_tier1_reject_max_score: int = Field(default=-1, alias="VERIFY_TIER1_REJECT_MAX_SCORE")  # -1 disables; 0 rejects clutter-free photos before YOLO
+    verify_tier1_accept_min_score: int = Field(default=4, alias="VERIFY_TIER1_ACCEPT_MIN_SCORE")  # 4 disables
+    
     class Config:
         env_file = ".env"
         populate_by_name = True  # Allow both field name and alias
@@ -0,0 +1,163 @@
+"""
+Gunicorn config for the multi-worker deployment mode.
+
+    gunicorn -c gunicorn.conf.py main:app
+
+Runs a single uvicorn worker by default. With WEB_CONCURRENCY=auto the
+worker count is sized from the CPUs and memory actually available to the
+container (cgroup limits, not the host's). When more than one worker is
+started, a single inference server (services/inference_server.py) owns the
+YOLO model and every worker sends its inference calls there over a Unix
+socket, so the model weights and ONNX Runtime buffers exist once instead of
+once per worker. The master restarts the inference server if it exits.
+
+Some state is still per worker, so only scale out knowing that:
+    - the response cache: invalidate_analytics() only clears the worker that
+      handled the write; other workers serve entries until their TTL (<= 5 min)
+    - the duplicate-photo index: reports from other workers are picked up by
+      the periodic rebuild (PHOTO_INDEX_REFRESH_SECONDS)
+
+Env:
+    PORT                    listen port (default 8000)
+    WEB_CONCURRENCY         worker count, or "auto" to size from CPU/memory (default 1)
+    MAX_WORKERS             upper bound for the computed count (default 8)
+    WORKER_MEMORY_MB        budget per API worker (default 300)
+    INFERENCE_MEMORY_MB     budget for the inference server (default 450)
+    INFERENCE_SERVER        auto (only with 2+ workers) | 1 | 0 (default auto)
+    INFERENCE_SOCKET_PATH   Unix socket path (default /tmp/luit-inference.sock)
+    GUNICORN_TIMEOUT        worker timeout in seconds (default 120)
+"""
+import os
+import subprocess
+import sys
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+MEMORY_RESERVE_MB = 150  # master process, page cache, headroom
+
+
+def _cpu_count() -> int:
+    """CPUs this process may use: affinity mask capped by the cgroup v2/v1 CPU quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = None
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            limit, period = f.read().split()
+            if limit != "max":
+                quota = int(limit) / int(period)
+    except (OSError, ValueError):
+        try:
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                limit = int(f.read())
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = int(f.read())
+            if limit > 0:
+                quota = limit / period
+        except (OSError, ValueError):
+            pass
+    if quota:
+        cpus = min(cpus, max(1, int(quota + 0.5)))
+    return max(1, cpus)
+
+
+def _memory_limit_mb() -> int:
+    """Memory available to the container: cgroup limit if set, else physical RAM."""
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+            if value != "max" and int(value) < 1 << 60:  # v1 reports "unlimited" as a huge number
+                return int(value) // (1024 * 1024)
+        except (OSError, ValueError):
+            continue
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+    except (OSError, ValueError):
+        return 1024
+
+
+def _worker_count() -> tuple:
+    """(workers, reason)"""
+    concurrency = os.getenv("WEB_CONCURRENCY", "1")
+    if concurrency != "auto":
+        return max(1, int(concurrency)), "WEB_CONCURRENCY"
+    cpus = _cpu_count()
+    memory_mb = _memory_limit_mb()
+    worker_mb = int(os.getenv("WORKER_MEMORY_MB", "300"))
+    inference_mb = int(os.getenv("INFERENCE_MEMORY_MB", "450"))
+    # Requests mostly wait on Firestore/Cloudinary once inference is off-process: 2 per core + 1
+    by_cpu = 2 * cpus + 1
+    by_memory = (memory_mb - MEMORY_RESERVE_MB - inference_mb) // worker_mb
+    workers = max(1, min(by_cpu, by_memory, int(os.getenv("MAX_WORKERS", "8"))))
+    return workers, f"{cpus} CPU, {memory_mb} MB (by cpu {by_cpu}, by memory {by_memory})"
+
+
+workers, _sizing = _worker_count()
+os.environ["GUNICORN_WORKERS"] = str(workers)  # read by services.idempotency (IDEMPOTENCY_BACKEND=auto)
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+preload_app = False  # each worker imports the app after fork; heavy modules stay lazy
+
+_mode = os.getenv("INFERENCE_SERVER", "auto")
+use_inference_server = _mode == "1" or (_mode == "auto" and workers > 1)
+inference_socket = os.getenv("INFERENCE_SOCKET_PATH", "/tmp/luit-inference.sock")
+if use_inference_server:
+    # Read by services.model_manager in every worker (inherited at fork)
+    os.environ["INFERENCE_SOCKET"] = inference_socket
+
+_inference = {"proc": None, "stopping": False}
+
+
+def _spawn_inference_server():
+    env = {k: v for k, v in os.environ.items() if k != "INFERENCE_SOCKET"}
+    return subprocess.Popen(
+        [sys.executable, "-m", "services.inference_server", "--socket", inference_socket],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+
+
+def _supervise(server):
+    """Restart the inference server if it dies (backoff up to 30s)"""
+    delay = 1.0
+    while not _inference["stopping"]:
+        proc = _inference["proc"]
+        started = time.monotonic()
+        code = proc.wait()
+        if _inference["stopping"]:
+            return
+        server.log.error(f"Inference server exited with code {code}; restarting in {delay:.0f}s")
+        time.sleep(delay)
+        delay = 1.0 if time.monotonic() - started > 60 else min(delay * 2, 30.0)
+        _inference["proc"] = _spawn_inference_server()
+
+
+def on_starting(server):
+    server.log.info(f"Starting {workers} worker(s): {_sizing}")
+    if not use_inference_server:
+        server.log.info("Inference server disabled; each worker loads the YOLO model in-process")
+        return
+    from services.inference_server import wait_for_server
+
+    _inference["proc"] = _spawn_inference_server()
+    if not wait_for_server(inference_socket, timeout=30):
+        server.log.warning(f"Inference server not answering on {inference_socket} yet; workers will retry")
+    threading.Thread(target=_supervise, args=(server,), name="inference-supervisor", daemon=True).start()
+
+
+def on_exit(server):
+    _inference["stopping"] = True
+    proc = _inference["proc"]
+    if proc is not None and proc.poll() is None:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
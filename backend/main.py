@@ -1,16 +1,53 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
+import asyncio
 import os
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+load_dotenv()
+
+# Configure logging (LOG_LEVEL=DEBUG shows per-image verification details)
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
 logger = logging.getLogger(__name__)
 
-load_dotenv()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load + warm the YOLO model and photo hash index off the request path; /health answers
+    # immediately, /ready turns 200 once the model is live. Heavy imports (cv2, onnxruntime,
+    # numpy) happen inside this background thread.
+    warmup_task = None
+    watch_task = None
+    if os.getenv("YOLO_WARMUP", "1") != "0":
+        def warmup():
+            from services.model_manager import get_model_manager
+            from services.phash_index import get_photo_index
+            try:
+                get_model_manager().load()
+            except Exception:
+                pass  # logged by the manager; /ready reports the failure
+            get_photo_index()
+        warmup_task = asyncio.create_task(asyncio.to_thread(warmup))
+
+        from services.model_manager import watch_model_file
+        watch_task = asyncio.create_task(watch_model_file())
+    app.state.warmup_task = warmup_task
 
-app = FastAPI(title="LUIT Backend", version="1.0.0")
+    # Periodic maintenance (stats/points reconciliation, image sweep, cache warming)
+    from config import get_settings
+    scheduler = None
+    if get_settings().scheduler_enabled:
+        from services.scheduler import start_scheduler
+        scheduler = start_scheduler(app)
+    yield
+    if watch_task:
+        watch_task.cancel()
+    if scheduler:
+        from services.scheduler import stop_scheduler
+        await stop_scheduler()
+
+app = FastAPI(title="LUIT Backend", version="1.0.0", lifespan=lifespan)
  
 # Initialize Firebase Admin SDK before importing any routes that use Firestore/Auth
 try:
@@ -21,6 +58,19 @@ except Exception as e:
     logger.error(f"❌ Firebase initialization failed: {e}")
     # Proceeding allows health endpoint to work; Firestore routes will raise until fixed
 
+# Response cache for read-heavy analytics/leaderboard endpoints.
+# Added before CORS so CORS stays the outermost middleware.
+from services.response_cache import ResponseCacheMiddleware
+app.add_middleware(ResponseCacheMiddleware)
+
+# Idempotency-Key replay/coalescing for report and cleaning submissions
+from services.idempotency import IdempotencyMiddleware
+app.add_middleware(IdempotencyMiddleware)
+
+# Request timing (luit_http_request_duration_seconds); outside the response cache so hits are timed too
+from services.metrics import RequestTimingMiddleware
+app.add_middleware(RequestTimingMiddleware)
+
 # CORS Configuration - Allow specific origins
 allowed_origins = [
     "https://luit.vercel.app",
@@ -45,7 +95,7 @@ logger.info("✅ CORS enabled for origins: " + ", ".join(allowed_origins))
 @app.get("/health")
 def health_check():
     """Health check endpoint for uptime monitoring and keep-alive"""
-    logger.info("🏥 Health check called")
+    logger.debug("🏥 Health check called")
     return {
         "status": "healthy", 
         "message": "LUIT Backend is running", 
@@ -53,6 +103,34 @@ def health_check():
         "admin_enabled": True
     }
 
+@app.get("/ready")
+def readiness_check():
+    """Readiness probe: 503 until the YOLO model is loaded and warmed up"""
+    from fastapi.responses import JSONResponse
+    from services.model_manager import get_model_manager
+
+    model = get_model_manager().status()
+    if not model["ready"]:
+        return JSONResponse(status_code=503, content={"status": "not_ready", "model": model})
+    return {"status": "ready", "model": model}
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint (per-process counters and histograms)"""
+    from fastapi.responses import Response
+    from services.metrics import CONTENT_TYPE, render_metrics
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE)
+
+@app.get("/config/client")
+def client_config():
+    """Settings the frontend needs before capturing photos (max size, quality)"""
+    from fastapi.responses import JSONResponse
+    from services.image_encoding import client_image_config
+    return JSONResponse(
+        content={"image": client_image_config()},
+        headers={"Cache-Control": "public, max-age=3600"},
+    )
+
 @app.get("/")
 def root():
     return {"message": "Welcome to LUIT API"}
@@ -67,6 +145,12 @@ app.include_router(analytics.router)
 app.include_router(location.router)
 app.include_router(admin.router)
 
+# CLOUDINARY_BACKEND=local: serve the images the local stand-in stores
+from config import get_settings
+if get_settings().cloudinary_backend == "local":
+    from services.local_media import router as local_media_router
+    app.include_router(local_media_router)
+
 logger.info("✅ All routes registered")
 
 if __name__ == "__main__":
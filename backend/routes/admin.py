@@ -1,18 +1,44 @@
 from fastapi import APIRouter, HTTPException
-from firebase_admin import firestore, auth
+from firebase_admin import auth
+from pydantic import BaseModel
+from typing import Optional
+from services.firebase_service import get_firestore_client
+from services.cloudinary_service import thumbnail_url
+from services.stats_service import backfill_daily_stats, safe_record_daily_event
+from services.response_cache import invalidate_analytics
+from services.phash_index import reset_photo_index, unindex_report_photo
+from services.points_service import LEDGER_COLLECTION, reconcile_points, safe_revoke_award
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/admin", tags=["admin"])
-db = firestore.client()
+
+def rebuild_daily_stats():
+    """Recompute analytics day counters after bulk deletes"""
+    try:
+        backfill_daily_stats()
+    except Exception as e:
+        logger.warning(f"Could not rebuild daily stats: {str(e)}")
+
+def rebuild_points():
+    """Reverse the awards of deleted reports/cleanings and recompute user totals after bulk deletes"""
+    try:
+        reconcile_points()
+    except Exception as e:
+        logger.warning(f"Could not rebuild points: {str(e)}")
 
 @router.get("/reports")
 async def get_all_reports():
     """Get all reports for admin view"""
     try:
+        db = get_firestore_client()
         reports_ref = db.collection('reports')
         reports = []
         for doc in reports_ref.stream():
             report_data = doc.to_dict()
             report_data['id'] = doc.id
+            report_data['thumbnailUrl'] = thumbnail_url(report_data)
             reports.append(report_data)
         return reports
     except Exception as e:
@@ -22,6 +48,7 @@ async def get_all_reports():
 async def get_all_cleanings():
     """Get all cleanings for admin view"""
     try:
+        db = get_firestore_client()
         cleanings_ref = db.collection('cleanings')
         cleanings = []
         for doc in cleanings_ref.stream():
@@ -39,6 +66,7 @@ async def get_all_users():
     reflect immediately and login remains consistent.
     """
     try:
+        db = get_firestore_client()
         users_list = []
 
         # Read canonical profiles from Firestore
@@ -46,16 +74,14 @@ async def get_all_users():
         for doc in users_ref.stream():
             user = doc.to_dict() or {}
             uid = doc.id
-            # Count activity
-            reports_count = sum(1 for _ in db.collection('reports').where('userId', '==', uid).stream())
-            cleanings_count = sum(1 for _ in db.collection('cleanings').where('userId', '==', uid).stream())
             users_list.append({
                 'id': uid,
                 'name': user.get('name') or user.get('email', 'Unknown'),
                 'email': user.get('email', ''),
                 'userType': 'individual',
-                'reportsCount': reports_count,
-                'cleaningsCount': cleanings_count,
+                'reportsCount': user.get('reportsCount', 0),
+                'cleaningsCount': user.get('cleaningsCount', 0),
+                'points': user.get('points', 0),
                 'createdAt': str(user.get('createdAt'))
             })
 
@@ -67,21 +93,21 @@ async def get_all_users():
 async def get_all_ngos():
     """Get all NGOs from Firestore with activity counts."""
     try:
+        db = get_firestore_client()
         ngos_list = []
 
         ngos_ref = db.collection('users').where('userType', '==', 'ngo')
         for doc in ngos_ref.stream():
             ngo = doc.to_dict() or {}
             uid = doc.id
-            reports_count = sum(1 for _ in db.collection('reports').where('userId', '==', uid).stream())
-            cleanings_count = sum(1 for _ in db.collection('cleanings').where('userId', '==', uid).stream())
             ngos_list.append({
                 'id': uid,
                 'name': ngo.get('ngoName') or ngo.get('name') or 'Unknown NGO',
                 'email': ngo.get('email', ''),
                 'userType': 'ngo',
-                'reportsCount': reports_count,
-                'cleaningsCount': cleanings_count,
+                'reportsCount': ngo.get('reportsCount', 0),
+                'cleaningsCount': ngo.get('cleaningsCount', 0),
+                'points': ngo.get('points', 0),
                 'createdAt': str(ngo.get('createdAt'))
             })
 
@@ -93,10 +119,11 @@ async def get_all_ngos():
 async def clear_all_reports():
     """Delete all reports from database and their images from Cloudinary"""
     try:
+        db = get_firestore_client()
+        from services.image_features import delete_reports
         from services.cloudinary_service import delete_image_from_cloudinary
         reports_ref = db.collection('reports')
-        batch = db.batch()
-        count = 0
+        deleted = []
         
         for doc in reports_ref.stream():
             report_data = doc.to_dict()
@@ -109,15 +136,13 @@ async def clear_all_reports():
                 except Exception as img_err:
                     logger.warning(f"Could not delete image {public_id}: {str(img_err)}")
             
-            batch.delete(doc.reference)
-            count += 1
-            
-            # Firestore batch limit is 500
-            if count % 500 == 0:
-                batch.commit()
-                batch = db.batch()
+            deleted.append(doc.reference)
         
-        batch.commit()
+        count = delete_reports(deleted)
+        rebuild_daily_stats()
+        rebuild_points()
+        reset_photo_index()
+        invalidate_analytics()
         return {"message": f"Cleared {count} reports and their images"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -126,6 +151,7 @@ async def clear_all_reports():
 async def clear_all_cleanings():
     """Delete all cleanings and reset user points"""
     try:
+        db = get_firestore_client()
         # Clear cleanings
         cleanings_ref = db.collection('cleanings')
         batch = db.batch()
@@ -141,42 +167,12 @@ async def clear_all_cleanings():
         
         batch.commit()
         
-        # Reset user points
-        users_ref = db.collection('users')
-        user_batch = db.batch()
-        user_count = 0
-        
-        for doc in users_ref.stream():
-            user_batch.update(doc.reference, {
-                'points': 0,
-                'cleaningsCount': 0
-            })
-            user_count += 1
-            
-            if user_count % 500 == 0:
-                user_batch.commit()
-                user_batch = db.batch()
-        
-        user_batch.commit()
-        
-        # Reset NGO points
-        ngos_ref = db.collection('ngos')
-        ngo_batch = db.batch()
-        ngo_count = 0
-        
-        for doc in ngos_ref.stream():
-            ngo_batch.update(doc.reference, {
-                'points': 0,
-                'cleaningsCount': 0
-            })
-            ngo_count += 1
-            
-            if ngo_count % 500 == 0:
-                ngo_batch.commit()
-                ngo_batch = db.batch()
-        
-        ngo_batch.commit()
+        # Reverse the cleaning awards and rebuild user and NGO totals from the ledger
+        rebuild_points()
         
+        rebuild_daily_stats()
+        reset_photo_index()
+        invalidate_analytics()
         return {"message": f"Cleared {count} cleanings and reset all points"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -185,6 +181,8 @@ async def clear_all_cleanings():
 async def clear_all_users():
     """Delete all user documents from Firestore and related user data and images"""
     try:
+        db = get_firestore_client()
+        from services.image_features import delete_reports
         from services.cloudinary_service import delete_image_from_cloudinary
         
         # 1) Delete all documents in 'users' collection
@@ -203,8 +201,7 @@ async def clear_all_users():
 
         # 2) Delete all non-NGO reports and their images
         reports_ref = db.collection('reports')
-        reports_batch = db.batch()
-        reports_count = 0
+        deleted = []
 
         for doc in reports_ref.stream():
             report_data = doc.to_dict()
@@ -216,13 +213,9 @@ async def clear_all_users():
                     except Exception as img_err:
                         logger.warning(f"Could not delete image {public_id}: {str(img_err)}")
                 
-                reports_batch.delete(doc.reference)
-                reports_count += 1
-                if reports_count % 500 == 0:
-                    reports_batch.commit()
-                    reports_batch = db.batch()
+                deleted.append(doc.reference)
 
-        reports_batch.commit()
+        reports_count = delete_reports(deleted)
 
         # 3) Delete all non-NGO cleanings
         cleanings_ref = db.collection('cleanings')
@@ -240,6 +233,10 @@ async def clear_all_users():
 
         cleanings_batch.commit()
 
+        rebuild_daily_stats()
+        rebuild_points()
+        reset_photo_index()
+        invalidate_analytics()
         return {
             "message": (
                 f"Cleared {users_count} user profiles, "
@@ -253,13 +250,13 @@ async def clear_all_users():
 async def clear_all_ngos():
     """Delete all NGO data from reports and cleanings, and their images"""
     try:
+        db = get_firestore_client()
+        from services.image_features import delete_reports
         from services.cloudinary_service import delete_image_from_cloudinary
         
-        count = 0
-        
         # Delete all NGO reports and their images
         reports_ref = db.collection('reports')
-        batch = db.batch()
+        deleted = []
         
         for doc in reports_ref.stream():
             report_data = doc.to_dict()
@@ -271,14 +268,9 @@ async def clear_all_ngos():
                     except Exception as img_err:
                         logger.warning(f"Could not delete image {public_id}: {str(img_err)}")
                 
-                batch.delete(doc.reference)
-                count += 1
-                
-                if count % 500 == 0:
-                    batch.commit()
-                    batch = db.batch()
+                deleted.append(doc.reference)
         
-        batch.commit()
+        count = delete_reports(deleted)
         
         # Delete NGO cleanings
         cleanings_ref = db.collection('cleanings')
@@ -297,6 +289,10 @@ async def clear_all_ngos():
         
         cleaning_batch.commit()
         
+        rebuild_daily_stats()
+        rebuild_points()
+        reset_photo_index()
+        invalidate_analytics()
         return {"message": f"Cleared {count} NGO records with images and {cleaning_count} cleanings"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -305,6 +301,8 @@ async def clear_all_ngos():
 async def delete_report(report_id: str):
     """Delete a single report by ID and its associated image from Cloudinary"""
     try:
+        db = get_firestore_client()
+        from services.image_features import delete_reports
         # Get report data to retrieve public_id before deletion
         report_doc = db.collection('reports').document(report_id).get()
         if report_doc.exists:
@@ -320,8 +318,13 @@ async def delete_report(report_id: str):
                     logger.warning(f"Could not delete image: {str(img_err)}")
                     # Continue with report deletion even if image delete fails
         
-        # Delete the report from Firestore
-        db.collection('reports').document(report_id).delete()
+        # Delete the report (and its image feature record) from Firestore
+        delete_reports([db.collection('reports').document(report_id)])
+        unindex_report_photo(report_id)
+        if report_doc.exists:
+            safe_record_daily_event('reports', report_data.get('createdAt'), -1)
+            safe_revoke_award(f"report_{report_id}")
+        invalidate_analytics()
         return {"message": f"Deleted report {report_id} and associated image"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -330,7 +333,15 @@ async def delete_report(report_id: str):
 async def delete_cleaning(cleaning_id: str):
     """Delete a single cleaning by ID"""
     try:
+        db = get_firestore_client()
+        cleaning_doc = db.collection('cleanings').document(cleaning_id).get()
         db.collection('cleanings').document(cleaning_id).delete()
+        if cleaning_doc.exists:
+            cleaning_data = cleaning_doc.to_dict() or {}
+            safe_record_daily_event('cleanings', cleaning_data.get('cleanedAt') or cleaning_data.get('createdAt'), -1)
+            if cleaning_data.get('reportId'):
+                safe_revoke_award(f"cleaning_{cleaning_data['reportId']}")
+        invalidate_analytics()
         return {"message": f"Deleted cleaning {cleaning_id}"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -339,21 +350,24 @@ async def delete_cleaning(cleaning_id: str):
 async def delete_user(user_id: str):
     """Delete all data for a single user (reports and cleanings)"""
     try:
-        count = 0
-        
+        db = get_firestore_client()
+        from services.image_features import delete_reports
         # Delete user's reports
         reports = db.collection('reports').where('userId', '==', user_id).stream()
+        count = delete_reports(doc.reference for doc in reports)
+        
         batch = db.batch()
-        for doc in reports:
+        # Delete user's cleanings
+        cleanings = db.collection('cleanings').where('userId', '==', user_id).stream()
+        for doc in cleanings:
             batch.delete(doc.reference)
             count += 1
             if count % 500 == 0:
                 batch.commit()
                 batch = db.batch()
         
-        # Delete user's cleanings
-        cleanings = db.collection('cleanings').where('userId', '==', user_id).stream()
-        for doc in cleanings:
+        # Delete points ledger entries (the profile with the running totals goes below)
+        for doc in db.collection(LEDGER_COLLECTION).where('userId', '==', user_id).stream():
             batch.delete(doc.reference)
             count += 1
             if count % 500 == 0:
@@ -370,6 +384,9 @@ async def delete_user(user_id: str):
 
         batch.commit()
         
+        rebuild_daily_stats()
+        reset_photo_index()
+        invalidate_analytics()
         return {"message": f"Deleted user {user_id} and {count} associated records"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -378,21 +395,24 @@ async def delete_user(user_id: str):
 async def delete_ngo(ngo_id: str):
     """Delete all data for a single NGO (reports and cleanings)"""
     try:
-        count = 0
-        
+        db = get_firestore_client()
+        from services.image_features import delete_reports
         # Delete NGO's reports
         reports = db.collection('reports').where('userId', '==', ngo_id).stream()
+        count = delete_reports(doc.reference for doc in reports)
+        
         batch = db.batch()
-        for doc in reports:
+        # Delete NGO's cleanings
+        cleanings = db.collection('cleanings').where('userId', '==', ngo_id).stream()
+        for doc in cleanings:
             batch.delete(doc.reference)
             count += 1
             if count % 500 == 0:
                 batch.commit()
                 batch = db.batch()
         
-        # Delete NGO's cleanings
-        cleanings = db.collection('cleanings').where('userId', '==', ngo_id).stream()
-        for doc in cleanings:
+        # Delete points ledger entries (the profile with the running totals goes below)
+        for doc in db.collection(LEDGER_COLLECTION).where('userId', '==', ngo_id).stream():
             batch.delete(doc.reference)
             count += 1
             if count % 500 == 0:
@@ -408,6 +428,83 @@ async def delete_ngo(ngo_id: str):
 
         batch.commit()
         
+        rebuild_daily_stats()
+        reset_photo_index()
+        invalidate_analytics()
         return {"message": f"Deleted NGO {ngo_id} and {count} associated records"}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+# Operational stats
+@router.get("/verification-stats")
+async def get_verification_stats():
+    """Per-tier exit counts of the garbage verification cascade (this process, since start/reset)"""
+    from services.verification_stats import get_cascade_stats
+    return get_cascade_stats()
+
+@router.delete("/verification-stats")
+async def clear_verification_stats():
+    """Reset the verification cascade counters"""
+    from services.verification_stats import reset_cascade_stats
+    reset_cascade_stats()
+    return {"message": "Verification stats reset"}
+
+# Model management
+class ModelReloadRequest(BaseModel):
+    filename: Optional[str] = None  # ONNX file in the models directory; default reloads the current file
+
+@router.get("/model")
+async def get_model_status():
+    """YOLO model state, generation and load/warmup timings"""
+    from services.model_manager import get_model_manager
+    return get_model_manager().status()
+
+@router.post("/model/reload")
+async def reload_model(request: Optional[ModelReloadRequest] = None):
+    """Load + warm a model file and hot-swap it in; in-flight verifications finish on the old one"""
+    import asyncio
+    import os
+    from services.model_manager import get_model_manager
+
+    manager = get_model_manager()
+    path = manager.path
+    if request and request.filename:
+        if os.path.basename(request.filename) != request.filename or not request.filename.endswith(".onnx"):
+            raise HTTPException(status_code=400, detail="filename must be an .onnx file name in the models directory")
+        path = os.path.join(os.path.dirname(manager.path), request.filename)
+        if not os.path.exists(path):
+            raise HTTPException(status_code=400, detail=f"Model file not found: {request.filename}")
+    try:
+        return await asyncio.to_thread(manager.load, path)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Model reload failed: {e}")
+
+# Background jobs
+@router.get("/jobs")
+async def get_jobs():
+    """Scheduled maintenance jobs with their triggers, last run and next run (this worker)"""
+    from services.scheduler import get_scheduler
+    scheduler = get_scheduler()
+    if scheduler is None:
+        return {"enabled": False, "jobs": []}
+    return {"enabled": True, **scheduler.status()}
+
+@router.post("/jobs/{name}/run")
+async def run_job(name: str):
+    """Run a job now, ignoring its schedule (cluster jobs still take the lease)"""
+    from services.scheduler import get_scheduler
+    scheduler = get_scheduler()
+    if scheduler is None or name not in scheduler.jobs:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {name}")
+    return await scheduler.run_job(scheduler.jobs[name], force=True)
+
+# Orphaned image sweep
+@router.post("/cloudinary/sweep")
+async def sweep_cloudinary(dryRun: bool = True):
+    """Delete uploaded images no report references (dry run by default: only counts them)"""
+    import asyncio
+    from services.cloudinary_sweep import sweep_orphaned_images
+    try:
+        return await asyncio.to_thread(sweep_orphaned_images, dryRun)
+    except Exception as e:
+        logger.error(f"❌ Cloudinary sweep failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Cloudinary sweep failed: {e}")
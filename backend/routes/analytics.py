@@ -1,34 +1,28 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from services.firebase_service import get_firestore_client
-from google.cloud.firestore import FieldFilter
-from datetime import datetime, timedelta, timezone
+from services.analytics_service import WASTE_TYPES, summarize_reports
+from services.leaderboards import get_leaderboard
+from services.points_service import get_user_totals
+from services.stats_service import build_series, get_daily_counts, period_start, sum_counts
+from datetime import date, datetime, timedelta, timezone
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
+MAX_SERIES_DAYS = 3 * 366
+
+def _stream_dicts(query):
+    return (doc.to_dict() for doc in query.stream())
+
 @router.get("/user/{userId}")
 async def get_user_analytics(userId: str):
-    """Get user analytics - reports and cleanings count"""
+    """Get user analytics - reports and cleanings count (running totals on the user document)"""
     try:
-        db = get_firestore_client()
-        
-        # Count reports by user
-        reports = db.collection("reports").where(filter=FieldFilter("userId", "==", userId)).stream()
-        reports_count = sum(1 for _ in reports)
-        
-        # Count cleanings by user
-        cleanings = db.collection("cleanings").where(filter=FieldFilter("userId", "==", userId)).stream()
-        cleanings_count = sum(1 for _ in cleanings)
-        
-        # Calculate total points
-        cleanings_list = db.collection("cleanings").where(filter=FieldFilter("userId", "==", userId)).stream()
-        total_points = sum(c.to_dict().get("pointsAwarded", 0) for c in cleanings_list)
-        total_points += reports_count * 10  # 10 points per report
-        
+        totals = get_user_totals(userId)
         return {
             "userId": userId,
-            "reportsCount": reports_count,
-            "cleaningsCount": cleanings_count,
-            "totalPoints": total_points,
+            "reportsCount": totals["reportsCount"],
+            "cleaningsCount": totals["cleaningsCount"],
+            "totalPoints": totals["points"],
             "userRank": 0
         }
     except Exception as e:
@@ -42,25 +36,14 @@ async def get_user_analytics(userId: str):
 
 @router.get("/ngo/{ngoId}")
 async def get_ngo_analytics(ngoId: str):
-    """Get NGO analytics"""
+    """Get NGO analytics (running totals on the user document)"""
     try:
-        db = get_firestore_client()
-        
-        reports = db.collection("reports").where(filter=FieldFilter("userId", "==", ngoId)).stream()
-        reports_count = sum(1 for _ in reports)
-        
-        cleanings = db.collection("cleanings").where(filter=FieldFilter("userId", "==", ngoId)).stream()
-        cleanings_count = sum(1 for _ in cleanings)
-        
-        cleanings_list = db.collection("cleanings").where(filter=FieldFilter("userId", "==", ngoId)).stream()
-        total_points = sum(c.to_dict().get("pointsAwarded", 0) for c in cleanings_list)
-        total_points += reports_count * 10
-        
+        totals = get_user_totals(ngoId)
         return {
             "ngoId": ngoId,
-            "reportsCount": reports_count,
-            "cleaningsCount": cleanings_count,
-            "totalPoints": total_points,
+            "reportsCount": totals["reportsCount"],
+            "cleaningsCount": totals["cleaningsCount"],
+            "totalPoints": totals["points"],
             "ngoRank": 0
         }
     except Exception as e:
@@ -72,45 +55,30 @@ async def get_ngo_analytics(ngoId: str):
             "ngoRank": 0
         }
 
+@router.get("/dashboard/{userId}")
+async def get_dashboard(userId: str, userType: str = None, neighbours: int = 2):
+    """Everything a user/NGO dashboard shows in one request: stats, overall rank with
+    neighbouring leaderboard entries, and the global report totals
+    """
+    from services.dashboard import build_dashboard
+    try:
+        return await build_dashboard(userId, userType, max(0, min(neighbours, 10)))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/global")
 async def get_global_analytics():
     """Get global platform analytics"""
     try:
         db = get_firestore_client()
-        
-        # Count all reports
-        all_reports = db.collection("reports").stream()
-        reports_list = [r.to_dict() for r in all_reports]
-        total_reports = len(reports_list)
-        
-        # Count cleaned reports
-        cleaned_reports = [r for r in reports_list if r.get("status") == "cleaned"]
-        total_cleanings = len(cleaned_reports)
-        
-        # Count active (not cleaned) reports
-        active_reports = total_reports - total_cleanings
-        
-        # Waste breakdown
-        waste_breakdown = {
-            "plastic": 0,
-            "organic": 0,
-            "mixed": 0,
-            "toxic": 0,
-            "sewage": 0
-        }
-        
-        for report in reports_list:
-            waste_type = report.get("wasteType", "")
-            if waste_type in waste_breakdown:
-                waste_breakdown[waste_type] += 1
-        
+        summary = summarize_reports(_stream_dicts(db.collection("reports")))
         return {
-            "totalReports": total_reports,
-            "totalCleanings": total_cleanings,
-            "activeReports": active_reports,
+            "totalReports": summary["totalReports"],
+            "totalCleanings": summary["totalCleanings"],
+            "activeReports": summary["activeReports"],
             "usersCount": 0,
             "ngosCount": 0,
-            "wasteBreakdown": waste_breakdown
+            "wasteBreakdown": summary["wasteBreakdown"]
         }
     except Exception as e:
         return {
@@ -119,92 +87,14 @@ async def get_global_analytics():
             "activeReports": 0,
             "usersCount": 0,
             "ngosCount": 0,
-            "wasteBreakdown": {
-                "plastic": 0,
-                "organic": 0,
-                "mixed": 0,
-                "toxic": 0,
-                "sewage": 0
-            }
+            "wasteBreakdown": dict.fromkeys(WASTE_TYPES, 0)
         }
 
 @router.get("/leaderboard/users")
 async def get_users_leaderboard(category: str = "reporting", limit: int = 20):
     """Get user leaderboard - reporting or cleaning"""
     try:
-        db = get_firestore_client()
-        
-        if category == "reporting":
-            # Get all users with their reports count
-            reports = db.collection("reports").where(filter=FieldFilter("userType", "==", "individual")).stream()
-            user_stats = {}
-            
-            for report in reports:
-                data = report.to_dict()
-                user_id = data.get("userId")
-                user_name = data.get("userName", "Anonymous")
-                
-                # Skip if no userId (unlogged-in users)
-                if user_id and user_id.strip():
-                    if user_id not in user_stats:
-                        user_stats[user_id] = {"id": user_id, "name": user_name, "points": 0, "city": ""}
-                    user_stats[user_id]["points"] += 10  # 10 points per report
-            
-            leaderboard = sorted(user_stats.values(), key=lambda x: x["points"], reverse=True)[:limit]
-            
-        elif category == "cleaning":
-            # Get all users with their cleanings points
-            cleanings = db.collection("cleanings").where(filter=FieldFilter("userType", "==", "individual")).stream()
-            user_stats = {}
-            
-            for cleaning in cleanings:
-                data = cleaning.to_dict()
-                user_id = data.get("userId")
-                user_name = data.get("userName", "Anonymous")
-                points = data.get("pointsAwarded", 0)
-                
-                # Skip if no userId (unlogged-in users)
-                if user_id and user_id.strip():
-                    if user_id not in user_stats:
-                        user_stats[user_id] = {"id": user_id, "name": user_name, "points": 0, "city": ""}
-                    user_stats[user_id]["points"] += points
-            
-            leaderboard = sorted(user_stats.values(), key=lambda x: x["points"], reverse=True)[:limit]
-        
-        elif category == "overall":
-            # Combine reporting and cleaning points
-            user_stats = {}
-            
-            # Add reporting points
-            reports = db.collection("reports").where(filter=FieldFilter("userType", "==", "individual")).stream()
-            for report in reports:
-                data = report.to_dict()
-                user_id = data.get("userId")
-                user_name = data.get("userName", "Anonymous")
-                
-                if user_id and user_id.strip():
-                    if user_id not in user_stats:
-                        user_stats[user_id] = {"id": user_id, "name": user_name, "points": 0, "city": ""}
-                    user_stats[user_id]["points"] += 10
-            
-            # Add cleaning points
-            cleanings = db.collection("cleanings").where(filter=FieldFilter("userType", "==", "individual")).stream()
-            for cleaning in cleanings:
-                data = cleaning.to_dict()
-                user_id = data.get("userId")
-                user_name = data.get("userName", "Anonymous")
-                points = data.get("pointsAwarded", 0)
-                
-                if user_id and user_id.strip():
-                    if user_id not in user_stats:
-                        user_stats[user_id] = {"id": user_id, "name": user_name, "points": 0, "city": ""}
-                    user_stats[user_id]["points"] += points
-            
-            leaderboard = sorted(user_stats.values(), key=lambda x: x["points"], reverse=True)[:limit]
-        else:
-            leaderboard = []
-        
-        return {"leaderboard": leaderboard}
+        return {"leaderboard": get_leaderboard("individual", category, limit)}
     except Exception as e:
         return {"leaderboard": []}
 
@@ -212,147 +102,57 @@ async def get_users_leaderboard(category: str = "reporting", limit: int = 20):
 async def get_ngos_leaderboard(category: str = "reporting", limit: int = 20):
     """Get NGO leaderboard - reporting or cleaning"""
     try:
-        db = get_firestore_client()
-        
-        if category == "reporting":
-            reports = db.collection("reports").where(filter=FieldFilter("userType", "==", "ngo")).stream()
-            ngo_stats = {}
-            
-            for report in reports:
-                data = report.to_dict()
-                ngo_id = data.get("userId")
-                ngo_name = data.get("userName", "Anonymous NGO")
-                
-                # Skip if no userId
-                if ngo_id and ngo_id.strip():
-                    if ngo_id not in ngo_stats:
-                        ngo_stats[ngo_id] = {"id": ngo_id, "name": ngo_name, "points": 0, "city": ""}
-                    ngo_stats[ngo_id]["points"] += 10
-            
-            leaderboard = sorted(ngo_stats.values(), key=lambda x: x["points"], reverse=True)[:limit]
-            
-        elif category == "cleaning":
-            cleanings = db.collection("cleanings").where(filter=FieldFilter("userType", "==", "ngo")).stream()
-            ngo_stats = {}
-            
-            for cleaning in cleanings:
-                data = cleaning.to_dict()
-                ngo_id = data.get("userId")
-                ngo_name = data.get("userName", "Anonymous NGO")
-                points = data.get("pointsAwarded", 0)
-                
-                # Skip if no userId
-                if ngo_id and ngo_id.strip():
-                    if ngo_id not in ngo_stats:
-                        ngo_stats[ngo_id] = {"id": ngo_id, "name": ngo_name, "points": 0, "city": ""}
-                    ngo_stats[ngo_id]["points"] += points
-            
-            leaderboard = sorted(ngo_stats.values(), key=lambda x: x["points"], reverse=True)[:limit]
-        
-        elif category == "overall":
-            # Combine reporting and cleaning points for NGOs
-            ngo_stats = {}
-            
-            # Add reporting points
-            reports = db.collection("reports").where(filter=FieldFilter("userType", "==", "ngo")).stream()
-            for report in reports:
-                data = report.to_dict()
-                ngo_id = data.get("userId")
-                ngo_name = data.get("userName", "Anonymous NGO")
-                
-                if ngo_id and ngo_id.strip():
-                    if ngo_id not in ngo_stats:
-                        ngo_stats[ngo_id] = {"id": ngo_id, "name": ngo_name, "points": 0, "city": ""}
-                    ngo_stats[ngo_id]["points"] += 10
-            
-            # Add cleaning points
-            cleanings = db.collection("cleanings").where(filter=FieldFilter("userType", "==", "ngo")).stream()
-            for cleaning in cleanings:
-                data = cleaning.to_dict()
-                ngo_id = data.get("userId")
-                ngo_name = data.get("userName", "Anonymous NGO")
-                points = data.get("pointsAwarded", 0)
-                
-                if ngo_id and ngo_id.strip():
-                    if ngo_id not in ngo_stats:
-                        ngo_stats[ngo_id] = {"id": ngo_id, "name": ngo_name, "points": 0, "city": ""}
-                    ngo_stats[ngo_id]["points"] += points
-            
-            leaderboard = sorted(ngo_stats.values(), key=lambda x: x["points"], reverse=True)[:limit]
-        else:
-            leaderboard = []
-        
-        return {"leaderboard": leaderboard}
+        return {"leaderboard": get_leaderboard("ngo", category, limit)}
     except Exception as e:
         return {"leaderboard": []}
 
 @router.get("/time-buckets")
 async def get_time_buckets():
     """Counts of reports and cleanings for current week, month, and year.
-    Uses createdAt/cleanedAt when present, otherwise falls back to document create_time.
+    Sums the per-day counter documents maintained on write (see stats_service).
     """
     try:
-        db = get_firestore_client()
+        today = datetime.now(timezone.utc).date()
+        week_start = period_start(today, "weekly")
+        month_start = today.replace(day=1)
+        year_start = today.replace(month=1, day=1)
 
-        now = datetime.now(timezone.utc)
-        week_start = (now - timedelta(days=now.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
-        month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        year_start = now.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
-
-        def as_dt(val, fallback: datetime):
-            try:
-                if val is None:
-                    return fallback
-                if isinstance(val, datetime):
-                    return val if val.tzinfo else val.replace(tzinfo=timezone.utc)
-                if isinstance(val, (int, float)):
-                    # Support epoch millis
-                    return datetime.fromtimestamp(val / 1000.0, tz=timezone.utc)
-                if isinstance(val, str):
-                    try:
-                        dt = datetime.fromisoformat(val)
-                        return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
-                    except Exception:
-                        return fallback
-                return fallback
-            except Exception:
-                return fallback
-
-        def count_buckets(docs, get_time_field, fallback_time):
-            w = m = y = 0
-            for d in docs:
-                data = d.to_dict() or {}
-                t = get_time_field(data)
-                dt = as_dt(t, fallback_time(d))
-                if dt >= week_start:
-                    w += 1
-                if dt >= month_start:
-                    m += 1
-                if dt >= year_start:
-                    y += 1
-            return w, m, y
-
-        reports_docs = list(db.collection('reports').stream())
-        cleanings_docs = list(db.collection('cleanings').stream())
-
-        r_w, r_m, r_y = count_buckets(
-            reports_docs,
-            lambda x: x.get('createdAt'),
-            lambda d: (getattr(d, 'create_time', now))
-        )
-
-        c_w, c_m, c_y = count_buckets(
-            cleanings_docs,
-            lambda x: x.get('cleanedAt') or x.get('createdAt'),
-            lambda d: (getattr(d, 'create_time', now))
-        )
+        # Early January weeks can start in the previous year
+        counts = get_daily_counts(min(week_start, year_start), today)
+        week = sum_counts(counts, week_start, today)
+        month = sum_counts(counts, month_start, today)
+        year = sum_counts(counts, year_start, today)
 
         return {
-            'reports': { 'week': r_w, 'month': r_m, 'year': r_y },
-            'cleanings': { 'week': c_w, 'month': c_m, 'year': c_y }
+            'reports': { 'week': week['reports'], 'month': month['reports'], 'year': year['reports'] },
+            'cleanings': { 'week': week['cleanings'], 'month': month['cleanings'], 'year': year['cleanings'] }
         }
     except Exception as e:
         return {
             'reports': { 'week': 0, 'month': 0, 'year': 0 },
             'cleanings': { 'week': 0, 'month': 0, 'year': 0 }
         }
+
+@router.get("/time-series")
+async def get_time_series(start: str = None, end: str = None, granularity: str = "daily"):
+    """Reports and cleanings per day/week/month between start and end (YYYY-MM-DD, inclusive).
+    Defaults to the last 30 days.
+    """
+    try:
+        end_date = date.fromisoformat(end) if end else datetime.now(timezone.utc).date()
+        start_date = date.fromisoformat(start) if start else end_date - timedelta(days=29)
+        if start_date > end_date:
+            raise ValueError("start must not be after end")
+        if (end_date - start_date).days > MAX_SERIES_DAYS:
+            raise ValueError(f"Date range too large (max {MAX_SERIES_DAYS} days)")
+
+        counts = get_daily_counts(start_date, end_date)
+        return {
+            "granularity": granularity,
+            "start": start_date.isoformat(),
+            "end": end_date.isoformat(),
+            "series": build_series(counts, start_date, end_date, granularity),
+            "totals": sum_counts(counts, start_date, end_date)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -3,11 +3,11 @@ from pydantic import BaseModel, EmailStr
 from typing import Literal, Optional
 from firebase_admin import auth, firestore
 from firebase_admin.auth import UserNotFoundError
+from services.firebase_service import get_firestore_client
 import requests
 import os
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
-db = firestore.client()
 
 # Firebase Web API Key
 FIREBASE_WEB_API_KEY = os.getenv("FIREBASE_WEB_API_KEY", "")
@@ -30,6 +30,7 @@ class LoginRequest(BaseModel):
 async def register(request: RegisterRequest):
     """Register new user or NGO with Firebase Auth"""
     try:
+        db = get_firestore_client()
         if request.userType == "individual" and not request.name:
             raise HTTPException(status_code=400, detail="Name is required for individual registration")
         if request.userType == "ngo" and not request.ngoName:
@@ -91,6 +92,7 @@ async def register(request: RegisterRequest):
 async def login(request: LoginRequest):
     """Login user or NGO with Firebase Auth"""
     try:
+        db = get_firestore_client()
         # For now, we need to get email from identifier
         # In production, you'd query Firestore to find user by name/ngoName
         # For this MVP, we'll accept email as identifier
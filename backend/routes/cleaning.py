@@ -1,8 +1,11 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, BackgroundTasks
 from pydantic import BaseModel
-from services.image_verification import verify_cleaning_image
-from services.cloudinary_service import upload_image_to_cloudinary, delete_image_from_cloudinary
-from services.firebase_service import get_document, update_document, add_document
+from typing import Optional
+from services.cloudinary_service import upload_image_to_cloudinary, delete_image_from_cloudinary, thumbnail_url
+from services.firebase_service import get_document
+from services.points_service import cleaning_points, close_report
+from services.stats_service import safe_record_daily_event
+from services.response_cache import invalidate_analytics
 from datetime import datetime
 import logging
 
@@ -12,8 +15,8 @@ router = APIRouter(prefix="/cleaning", tags=["cleaning"])
 
 class CleaningRequest(BaseModel):
     reportId: str
-    beforeImageBase64: str
     afterImageBase64: str
+    beforeImageBase64: Optional[str] = None  # legacy clients; the server loads the report image itself
     userId: str
     userType: str
     userName: str = "Anonymous"
@@ -22,26 +25,46 @@ class CleaningRequest(BaseModel):
 async def verify_cleaning(request: CleaningRequest):
     """Verify if area is cleaned"""
     try:
-        result = await verify_cleaning_image(request.beforeImageBase64, request.afterImageBase64)
+        from services.image_verification import verify_cleaning_for_report
+        report = get_document("reports", request.reportId)
+        if not report:
+            raise ValueError("Report not found")
+        result = await verify_cleaning_for_report(request.reportId, report, request.afterImageBase64, request.beforeImageBase64)
         return result
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+async def discard_before_image(report_id: str, image_url: Optional[str], image_public_id: Optional[str]):
+    """Delete a cleaned report's before image from Cloudinary, the image cache and the feature store"""
+    if image_public_id:
+        try:
+            logger.debug("🗑️  Deleting before image from Cloudinary: %s", image_public_id)
+            await delete_image_from_cloudinary(image_public_id)
+            logger.debug("✅ Before image deleted successfully")
+        except Exception as e:
+            logger.error(f"❌ Could not delete before image: {str(e)}")
+    
+    from services.image_cache import evict_image
+    from services.image_features import delete_report_features
+    evict_image(image_url)
+    delete_report_features(report_id)
+
 @router.post("/mark-cleaned")
-async def mark_cleaned(request: CleaningRequest):
+async def mark_cleaned(request: CleaningRequest, background_tasks: BackgroundTasks):
     """Mark report as cleaned"""
     try:
-        # Verify cleaning first
-        verification = await verify_cleaning_image(request.beforeImageBase64, request.afterImageBase64)
-        if not verification['is_cleaned']:
-            return {"success": False, "message": verification['message']}
-        
         # Get report details
         report = get_document("reports", request.reportId)
         if not report:
             return {"success": False, "message": "Report not found"}
         
-        # Delete before image from Cloudinary if it exists
+        # Verify cleaning first (before image is loaded server-side from the report)
+        from services.image_verification import verify_cleaning_for_report
+        verification = await verify_cleaning_for_report(request.reportId, report, request.afterImageBase64, request.beforeImageBase64)
+        if not verification['is_cleaned']:
+            return {"success": False, "message": verification['message']}
+        
+        # Before image to delete from Cloudinary once the report is closed
         image_public_id = report.get('imagePublicId')
         
         # If imagePublicId is None but imageUrl exists, extract public_id from URL
@@ -61,27 +84,12 @@ async def mark_cleaned(request: CleaningRequest):
                             public_id_with_ext = path_parts[1]
                             # Remove file extension
                             image_public_id = public_id_with_ext.rsplit('.', 1)[0]
-                            logger.info(f"📝 Extracted public_id from URL: {image_public_id}")
+                            logger.debug("📝 Extracted public_id from URL: %s", image_public_id)
             except Exception as e:
                 logger.error(f"❌ Could not extract public_id from URL: {str(e)}")
         
-        if image_public_id:
-            try:
-                logger.info(f"🗑️  Deleting before image from Cloudinary: {image_public_id}")
-                await delete_image_from_cloudinary(image_public_id)
-                logger.info(f"✅ Before image deleted successfully")
-            except Exception as e:
-                logger.error(f"❌ Could not delete before image: {str(e)}")
-        
         # Calculate points based on waste type
-        points_map = {
-            "plastic": 10,
-            "organic": 20,
-            "mixed": 30,
-            "toxic": 50,
-            "sewage": 100
-        }
-        points_awarded = points_map.get(report.get('wasteType'), 10)
+        points_awarded = cleaning_points(report.get('wasteType'))
         
         # Update report as cleaned - remove location and images
         update_data = {
@@ -91,12 +99,13 @@ async def mark_cleaned(request: CleaningRequest):
             "cleanedAt": datetime.now().isoformat(),
             "latitude": None,
             "longitude": None,
+            "geohash": None,
             "imageUrl": None,
             "imagePublicId": None,
+            "imageHash": None,
             "afterImageUrl": None,
             "afterImagePublicId": None
         }
-        update_document("reports", request.reportId, update_data)
         
         # Record cleaning activity
         cleaning_record = {
@@ -106,9 +115,18 @@ async def mark_cleaned(request: CleaningRequest):
             "userName": request.userName,
             "wasteType": report.get('wasteType'),
             "pointsAwarded": points_awarded,
-            "cleanedAt": datetime.now().isoformat()
+            "cleanedAt": update_data["cleanedAt"]
         }
-        add_document("cleanings", cleaning_record)
+        # Report update, cleaning record and points award commit together, so a
+        # report cleaned concurrently is not awarded twice
+        if not close_report(request.reportId, update_data, cleaning_record):
+            return {"success": False, "message": "This report has already been cleaned"}
+        from services.phash_index import unindex_report_photo
+        unindex_report_photo(request.reportId)
+        # Only now that the report is closed is the before image no longer needed
+        background_tasks.add_task(discard_before_image, request.reportId, report.get('imageUrl'), image_public_id)
+        safe_record_daily_event("cleanings", cleaning_record["cleanedAt"])
+        invalidate_analytics()
         
         return {
             "success": True,
@@ -119,26 +137,43 @@ async def mark_cleaned(request: CleaningRequest):
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/available")
-async def get_available_cleanings(wasteType: str = None, userType: str = None, userLat: float | None = None, userLon: float | None = None):
-    """Get available cleanings to participate in"""
+async def get_available_cleanings(
+    wasteType: str = None,
+    userType: str = None,
+    userLat: float | None = None,
+    userLon: float | None = None,
+    maxDistanceKm: float | None = None,
+    limit: int | None = None,
+    offset: int = 0
+):
+    """Get available cleanings to participate in, closest first when the user location is known"""
+    if maxDistanceKm is not None and (userLat is None or userLon is None):
+        raise HTTPException(status_code=400, detail="maxDistanceKm requires userLat and userLon")
+    
     try:
         from services.firebase_service import get_firestore_client
+        from services.location_service import haversine_distances
         from google.cloud.firestore import FieldFilter
+        import numpy as np
+        
+        offset = max(0, offset)
+        if limit is not None:
+            limit = max(1, limit)
         
         db = get_firestore_client()
         
-        # Query active reports (status = "active") using filter keyword argument
+        # Query active reports, pushing the waste type filter down to Firestore
         query = db.collection("reports").where(filter=FieldFilter("status", "==", "active"))
-        reports = query.stream()
+        if wasteType:
+            if userType == "individual" and wasteType == "sewage":
+                return {"success": True, "cleanings": [], "total": 0, "hasMore": False}
+            query = query.where(filter=FieldFilter("wasteType", "==", wasteType))
+        query = query.select(["imageUrl", "imagePublicId", "wasteType", "latitude", "longitude"])
         
-        cleanings = []
-        for report in reports:
+        ids, rows, lats, lons = [], [], [], []
+        for report in query.stream():
             report_data = report.to_dict()
             
-            # Filter by waste type if specified
-            if wasteType and report_data.get("wasteType") != wasteType:
-                continue
-            
             # Individuals shouldn't see sewage
             if userType == "individual" and report_data.get("wasteType") == "sewage":
                 continue
@@ -148,47 +183,54 @@ async def get_available_cleanings(wasteType: str = None, userType: str = None, u
                 continue
             if report_data.get("latitude") is None or report_data.get("longitude") is None:
                 continue
+            try:
+                lat = float(report_data["latitude"])
+                lon = float(report_data["longitude"])
+            except (TypeError, ValueError):
+                continue
             
-            # Add to cleanings list with calculated distance (uses userLat/userLon if provided)
-            def haversine(lat1, lon1, lat2, lon2):
-                from math import radians, sin, cos, sqrt, atan2
-                R = 6371.0  # Earth radius in km
-                dlat = radians(lat2 - lat1)
-                dlon = radians(lon2 - lon1)
-                a = sin(dlat/2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon/2)**2
-                c = 2 * atan2(sqrt(a), sqrt(1 - a))
-                return R * c
-
-            report_lat = report_data.get("latitude", 0)
-            report_lon = report_data.get("longitude", 0)
-            distance_km = 0
-            if userLat is not None and userLon is not None:
-                try:
-                    distance_km = haversine(float(userLat), float(userLon), float(report_lat), float(report_lon))
-                except Exception:
-                    distance_km = 0
-            cleaning = {
-                "id": report.id,
+            ids.append(report.id)
+            rows.append(report_data)
+            lats.append(lat)
+            lons.append(lon)
+        
+        # Distances for the whole candidate set in one vectorized pass
+        if userLat is not None and userLon is not None and rows:
+            distances_km = haversine_distances(float(userLat), float(userLon), lats, lons) / 1000.0
+            order = np.flatnonzero(distances_km <= maxDistanceKm) if maxDistanceKm is not None else np.arange(len(rows))
+            total = len(order)
+            
+            # Only fully sort the slice that is actually returned (top-k)
+            k = len(order) if limit is None else min(len(order), offset + limit)
+            if 0 < k < len(order):
+                order = order[np.argpartition(distances_km[order], k - 1)[:k]]
+            order = order[np.argsort(distances_km[order], kind="stable")]
+        else:
+            distances_km = np.zeros(len(rows))
+            order = np.arange(len(rows))
+            total = len(order)
+        
+        page = order[offset:] if limit is None else order[offset:offset + limit]
+        
+        cleanings = []
+        for i in page:
+            report_data = rows[i]
+            cleanings.append({
+                "id": ids[i],
                 "imageUrl": report_data.get("imageUrl", ""),
+                "thumbnailUrl": thumbnail_url(report_data),
                 "wasteType": report_data.get("wasteType", "unknown"),
-                "latitude": report_lat,
-                "longitude": report_lon,
-                "distanceKm": round(distance_km, 2),
-                "points": get_points_for_waste_type(report_data.get("wasteType", ""))
-            }
-            cleanings.append(cleaning)
+                "latitude": report_data.get("latitude", 0),
+                "longitude": report_data.get("longitude", 0),
+                "distanceKm": round(float(distances_km[i]), 2),
+                "points": cleaning_points(report_data.get("wasteType", ""))
+            })
         
-        return {"success": True, "cleanings": cleanings}
+        return {
+            "success": True,
+            "cleanings": cleanings,
+            "total": total,
+            "hasMore": offset + len(cleanings) < total
+        }
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
-
-def get_points_for_waste_type(waste_type: str) -> int:
-    """Get points for cleaning a specific waste type"""
-    points_map = {
-        "plastic": 10,
-        "organic": 20,
-        "mixed": 30,
-        "toxic": 50,
-        "sewage": 100
-    }
-    return points_map.get(waste_type, 10)
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from services.location_service import check_duplicate_location
+from services.location_service import check_duplicate_location, query_reports_within_radius
+from services.geofence_service import is_within_brahmaputra_geofence
 
 router = APIRouter(prefix="/location", tags=["location"])
 
@@ -18,12 +19,63 @@ async def check_duplicate(request: CheckDuplicateRequest):
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+# Upper bound on search radius keeps the geohash cells (and candidate sets) bounded
+MAX_NEARBY_RADIUS_METERS = 50000
+
 @router.get("/nearby-reports")
-async def get_nearby_reports(latitude: float, longitude: float, radius: int = 100):
-    """Get all reports within radius (in meters)"""
+async def get_nearby_reports(
+    latitude: float,
+    longitude: float,
+    radius: int = 100,
+    limit: int = 50,
+    status: str = "active",
+    fields: str | None = None
+):
+    """Get reports within radius (in meters), closest first.
+    `status` filters by report status ("any" disables the filter) and
+    `fields` is a comma-separated projection of report fields.
+    """
+    try:
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise ValueError("Invalid coordinates")
+        radius = max(1, min(radius, MAX_NEARBY_RADIUS_METERS))
+        limit = max(1, min(limit, 500))
+        field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+        
+        reports = query_reports_within_radius(
+            latitude,
+            longitude,
+            radius,
+            status=None if status == "any" else status,
+            limit=limit,
+            fields=field_list
+        )
+        return {"reports": reports, "count": len(reports), "radius": radius}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/status")
+async def get_location_status(latitude: float, longitude: float, radius: int = 100):
+    """Geofence result plus validated nearby active reports in one round-trip.
+    Used by the reporting screen on every GPS tick.
+    """
     try:
-        # Query Firebase for nearby reports
-        return {"reports": []}
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise ValueError("Invalid coordinates")
+        radius = max(1, min(radius, MAX_NEARBY_RADIUS_METERS))
+        
+        geofence = is_within_brahmaputra_geofence(latitude, longitude)
+        # Outside the geofence nothing can be reported, so skip the Firestore reads
+        duplicate = {
+            'is_duplicate': False,
+            'nearby_reports': [],
+            'distance_to_closest': None,
+            'radius_checked': radius
+        }
+        if geofence['allowed']:
+            duplicate = await check_duplicate_location(latitude, longitude, radius)
+        
+        return {"geofence": geofence, **duplicate}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -1,12 +1,20 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
-from pydantic import BaseModel
-from typing import Literal, Optional
-from services.image_verification import verify_garbage_image
-from services.location_service import check_duplicate_location
-from services.cloudinary_service import upload_image_to_cloudinary
-from services.firebase_service import add_document, query_documents, get_document
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, BackgroundTasks
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from typing import List, Literal, Optional
+from services.location_service import check_duplicate_location, encode_geohash
+from services.cloudinary_service import upload_image_to_cloudinary, image_variant_urls
+from services.firebase_service import query_documents, get_document
 from services.geofence_service import is_within_brahmaputra_geofence
+from services.stats_service import safe_record_daily_event
+from services.points_service import add_report, report_points
+from services.response_cache import invalidate_analytics
 from datetime import datetime
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/reporting", tags=["reporting"])
 
@@ -21,6 +29,15 @@ class ReportRequest(BaseModel):
     userName: Optional[str] = None
     userType: Optional[str] = "individual"  # individual, ngo, or anonymous
 
+class BatchReportItem(BaseModel):
+    latitude: float
+    longitude: float
+    wasteType: Literal["plastic", "organic", "mixed", "toxic", "sewage"]
+    clientId: Optional[str] = None     # echoed back so offline clients can match results
+    userId: Optional[str] = None
+    userName: Optional[str] = None
+    userType: Optional[str] = "individual"
+
 class VerifyImageRequest(BaseModel):
     image_base64: str
 
@@ -76,8 +93,14 @@ async def verify_image(request: VerifyImageRequest):
         if not request.image_base64:
             raise ValueError("No image data provided")
         
-        result = await verify_garbage_image(request.image_base64)
+        from services.image_features import remember_verified_features
+        from services.image_verification import verify_garbage_image
+        result = await verify_garbage_image(request.image_base64, with_features=True)
         
+        # Kept for the report submitted with this photo's uploaded URL (no second YOLO run)
+        features = result.pop('features', None)
+        if features:
+            remember_verified_features(features)
         return result
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Image verification failed: {str(e)}")
@@ -101,7 +124,7 @@ async def check_geofence(latitude: float, longitude: float):
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/report")
-async def create_report(request: ReportRequest):
+async def create_report(request: ReportRequest, background_tasks: BackgroundTasks):
     """Create new garbage report"""
     try:
         # Check geofence: must be within 2km of Brahmaputra River
@@ -112,6 +135,8 @@ async def create_report(request: ReportRequest):
         # Resolve image source
         image_url = None
         image_public_id = None
+        image_features = None  # precomputed analysis of the photo, stored next to the report
+        image_hash = None
 
         # Prefer explicit imageUrl from client (already uploaded)
         if request.imageUrl:
@@ -124,9 +149,12 @@ async def create_report(request: ReportRequest):
                 image_public_id = request.imagePublicId
             else:
                 # Verify garbage only when raw image data is provided
-                garbage_check = await verify_garbage_image(request.imageBase64)
+                from services.image_verification import verify_garbage_image
+                garbage_check = await verify_garbage_image(request.imageBase64, with_features=True)
                 if not garbage_check['is_garbage']:
                     return {"success": False, "message": garbage_check['message']}
+                image_features = garbage_check.pop('features', None)
+                image_hash = garbage_check.get('imageHash')
                 
                 # Auto-detect waste type from image if not provided
                 detected_waste_type = garbage_check.get('wasteType', 'mixed')
@@ -142,6 +170,21 @@ async def create_report(request: ReportRequest):
         else:
             raise ValueError("No image provided for report")
 
+        # Already-uploaded photo (the frontend flow): hash it for the duplicate
+        # check, and reuse the features /verify-image built for it when held here
+        if image_hash is None:
+            from services.image_verification import prepare_uploaded_image
+            try:
+                prepared = await asyncio.to_thread(prepare_uploaded_image, image_url)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not hash uploaded report photo {image_url}: {e}")
+            else:
+                if prepared['duplicateOf']:
+                    logger.warning(f"⚠️ Uploaded photo matches active report {prepared['duplicateOf']}")
+                    return {"success": False, "message": "This photo has already been reported", "is_duplicate": True}
+                image_hash = prepared['imageHash']
+                image_features = prepared['features']
+
         # Check for duplicate location
         location_check = await check_duplicate_location(request.latitude, request.longitude)
         if location_check['is_duplicate']:
@@ -151,9 +194,11 @@ async def create_report(request: ReportRequest):
         report_data = {
             "latitude": request.latitude,
             "longitude": request.longitude,
+            "geohash": encode_geohash(request.latitude, request.longitude),
             "wasteType": request.wasteType,
             "imageUrl": image_url,
             "imagePublicId": image_public_id,
+            "imageHash": image_hash,
             "userId": request.userId,
             "userName": request.userName or "Anonymous",
             "userType": request.userType or "individual",
@@ -162,19 +207,70 @@ async def create_report(request: ReportRequest):
             "verified": True
         }
         
-        # Add to Firestore
-        report_id = add_document("reports", report_data)
+        # Add to Firestore (with the reporter's points award)
+        report_id = add_report(report_data)
+        if image_hash:
+            from services.phash_index import index_report_photo
+            index_report_photo(report_id, image_hash)
+        safe_record_daily_event("reports", report_data["createdAt"])
+        invalidate_analytics()
+        
+        # Persist the image feature record off the request path so cleaning
+        # verification only has to analyse the after image
+        if image_features:
+            from services.image_features import save_report_features
+            background_tasks.add_task(save_report_features, report_id, image_features)
+        else:
+            from services.image_verification import precompute_report_features
+            background_tasks.add_task(precompute_report_features, report_id, image_url)
         
         return {
             "success": True,
             "message": "Report submitted successfully",
             "reportId": report_id,
-            "points": 10,
+            "points": report_points(report_data),
             "imageUrl": image_url
         }
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/report/batch")
+async def create_report_batch(reports: str = Form(...), images: List[UploadFile] = File(...)):
+    """
+    Create many reports in one multipart request (offline submissions).
+    `reports` is a JSON array of report items; `images` holds one photo per
+    item, in the same order. Results stream back as NDJSON, one line per item
+    ({index, clientId, success, reportId | message}) as soon as it is decided,
+    followed by a summary line ({done, total, accepted, rejected}).
+    """
+    from config import get_settings
+    from services.report_batch import ingest_reports
+
+    try:
+        items = TypeAdapter(List[BatchReportItem]).validate_json(reports)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid reports: {e.errors(include_url=False)}")
+    max_items = get_settings().report_batch_max_items
+    if not items:
+        raise HTTPException(status_code=400, detail="No reports provided")
+    if len(items) > max_items:
+        raise HTTPException(status_code=400, detail=f"Too many reports in one batch (max {max_items})")
+    if len(images) != len(items):
+        raise HTTPException(status_code=400, detail=f"Expected {len(items)} images, received {len(images)}")
+
+    # Read the uploads now: the form is closed once this handler returns
+    image_bytes = [await image.read() for image in images]
+
+    async def results():
+        try:
+            async for result in ingest_reports([item.model_dump() for item in items], image_bytes):
+                yield json.dumps(result) + "\n"
+        except Exception as e:
+            logger.exception(f"❌ Report batch failed: {str(e)}")
+            yield json.dumps({"done": True, "error": str(e)}) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
 @router.get("/reports")
 async def get_reports(wasteType: str = None, limit: int = 20):
     """Get all reports, optionally filtered by waste type"""
@@ -198,6 +294,8 @@ async def get_report(reportId: str):
             raise HTTPException(status_code=404, detail="Report not found")
         # Include the document ID in the response
         report['id'] = reportId
+        if report.get('imageUrl'):
+            report['imageVariants'] = image_variant_urls(report['imageUrl'], report.get('imagePublicId'))
         return {"success": True, "report": report}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,31 @@
+"""
+Pure aggregation behind the global analytics endpoint.
+
+The route streams Firestore documents and passes plain dicts in, so the same
+code runs against synthetic in-memory datasets (benchmarks/suite.py). Per-user
+stats and leaderboards read the running totals kept by services.points_service.
+"""
+from typing import Iterable
+
+REPORT_POINTS = 10  # points per report
+WASTE_TYPES = ("plastic", "organic", "mixed", "toxic", "sewage")
+
+
+def summarize_reports(reports: Iterable[dict]) -> dict:
+    """Totals and waste-type breakdown over all reports"""
+    total_reports = 0
+    total_cleanings = 0
+    waste_breakdown = dict.fromkeys(WASTE_TYPES, 0)
+    for report in reports:
+        total_reports += 1
+        if report.get("status") == "cleaned":
+            total_cleanings += 1
+        waste_type = report.get("wasteType", "")
+        if waste_type in waste_breakdown:
+            waste_breakdown[waste_type] += 1
+    return {
+        "totalReports": total_reports,
+        "totalCleanings": total_cleanings,
+        "activeReports": total_reports - total_cleanings,
+        "wasteBreakdown": waste_breakdown,
+    }
@@ -1,74 +1,97 @@
-import cloudinary
-import cloudinary.uploader
 from config import get_settings
+from functools import lru_cache
+import asyncio
 import base64
-import io
-from PIL import Image
+import logging
 import tempfile
 import os
+import time
 
-settings = get_settings()
+from services.metrics import CLOUDINARY_SECONDS
 
-print(f"\n🔧 CLOUDINARY CONFIG:")
-print(f"   Cloud Name: {settings.cloudinary_cloud_name}")
-print(f"   API Key: {'SET' if settings.cloudinary_api_key else 'MISSING'}")
-print(f"   API Secret: {'SET' if settings.cloudinary_api_secret else 'MISSING'}\n")
+logger = logging.getLogger(__name__)
 
-# Configure Cloudinary
-cloudinary.config(
-    cloud_name=settings.cloudinary_cloud_name,
-    api_key=settings.cloudinary_api_key,
-    api_secret=settings.cloudinary_api_secret
-)
+@lru_cache()
+def _cloudinary():
+    """Import and configure the Cloudinary SDK on first use (keeps it off the startup path)"""
+    settings = get_settings()
+    if settings.cloudinary_backend == "local":
+        from services.local_media import get_local_media
+        logger.info(f"🔧 Cloudinary backend: local ({settings.local_media_dir})")
+        return get_local_media()
+
+    import cloudinary
+    import cloudinary.uploader
+
+    logger.info(
+        f"🔧 Cloudinary config: cloud={settings.cloudinary_cloud_name}, "
+        f"api key {'SET' if settings.cloudinary_api_key else 'MISSING'}, "
+        f"api secret {'SET' if settings.cloudinary_api_secret else 'MISSING'}"
+    )
+
+    # Configure Cloudinary
+    cloudinary.config(
+        cloud_name=settings.cloudinary_cloud_name,
+        api_key=settings.cloudinary_api_key,
+        api_secret=settings.cloudinary_api_secret
+    )
+    return cloudinary
 
 async def upload_image_to_cloudinary(image_base64: str, folder: str = "luit") -> dict:
     """
     Upload base64 image to Cloudinary
     """
+    logger.debug("📤 Upload started: %.2f KB input", len(image_base64) / 1024)
     try:
-        print(f"\n📤 UPLOAD STARTED")
-        print(f"   Input size: {len(image_base64) / 1024:.2f} KB")
-        
         # Remove data URI prefix if present
         if ',' in image_base64:
             image_base64 = image_base64.split(',')[1]
-            print(f"   Removed data URI prefix")
         
         # Decode base64 to bytes
-        print(f"   Decoding base64...")
         image_bytes = base64.b64decode(image_base64)
-        print(f"   ✓ Decoded: {len(image_bytes)} bytes")
-        
-        # Validate image
-        print(f"   Validating image...")
-        img = Image.open(io.BytesIO(image_bytes))
-        print(f"   ✓ Format: {img.format}, Size: {img.size}")
+    except Exception as e:
+        logger.exception(f"❌ UPLOAD FAILED: {str(e)}")
+        return {
+            'success': False,
+            'url': None,
+            'public_id': None,
+            'message': f'Upload failed: {str(e)}'
+        }
+    # Re-encode and upload in a worker thread, off the event loop
+    return await asyncio.to_thread(upload_image_bytes, image_bytes, folder)
+
+def upload_image_bytes(image_bytes: bytes, folder: str = "luit") -> dict:
+    """
+    Upload encoded image bytes to Cloudinary (blocking; batch callers use worker threads).
+    The image is re-encoded to the canonical size/format first (services.image_encoding).
+    """
+    start = time.perf_counter()
+    try:
+        # Validate and re-encode (EXIF orientation applied, metadata dropped)
+        from services.image_encoding import canonicalize_image
+        encoded, extension = canonicalize_image(image_bytes)
         
         # Save to temp file
-        print(f"   Creating temp file...")
-        with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as tmp:
-            tmp.write(image_bytes)
+        with tempfile.NamedTemporaryFile(suffix=extension, delete=False) as tmp:
+            tmp.write(encoded)
             tmp_path = tmp.name
         
-        print(f"   ✓ Temp file: {tmp_path}")
-        
         # Upload to Cloudinary
-        print(f"   Uploading to Cloudinary...")
-        result = cloudinary.uploader.upload(
-            tmp_path,
-            folder=folder,
-            resource_type="image"
-        )
-        
-        # Delete temp file
         try:
-            os.unlink(tmp_path)
-        except:
-            pass
+            result = _cloudinary().uploader.upload(
+                tmp_path,
+                folder=folder,
+                resource_type="image"
+            )
+        finally:
+            # Delete temp file
+            try:
+                os.unlink(tmp_path)
+            except:
+                pass
         
-        print(f"   ✓ Response: {result['public_id']}")
-        print(f"   ✓ URL: {result['secure_url']}")
-        print(f"✅ UPLOAD SUCCESS\n")
+        CLOUDINARY_SECONDS.observe(time.perf_counter() - start, op="upload", outcome="success")
+        logger.debug("✅ Upload success: %s", result['public_id'])
         
         return {
             'success': True,
@@ -78,10 +101,8 @@ async def upload_image_to_cloudinary(image_base64: str, folder: str = "luit") ->
         }
     
     except Exception as e:
-        print(f"❌ UPLOAD FAILED: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        print()
+        CLOUDINARY_SECONDS.observe(time.perf_counter() - start, op="upload", outcome="error")
+        logger.exception(f"❌ UPLOAD FAILED: {str(e)}")
         return {
             'success': False,
             'url': None,
@@ -91,10 +112,11 @@ async def upload_image_to_cloudinary(image_base64: str, folder: str = "luit") ->
 
 async def delete_image_from_cloudinary(public_id: str) -> dict:
     """Delete image from Cloudinary"""
+    start = time.perf_counter()
     try:
-        print(f"\n🗑️  DELETING: {public_id}")
-        result = cloudinary.uploader.destroy(public_id)
-        print(f"✅ DELETED\n")
+        result = await asyncio.to_thread(_cloudinary().uploader.destroy, public_id)
+        CLOUDINARY_SECONDS.observe(time.perf_counter() - start, op="delete", outcome="success")
+        logger.debug("🗑️  Deleted %s", public_id)
         
         return {
             'success': True,
@@ -102,16 +124,65 @@ async def delete_image_from_cloudinary(public_id: str) -> dict:
         }
     
     except Exception as e:
-        print(f"❌ DELETE FAILED: {str(e)}\n")
+        CLOUDINARY_SECONDS.observe(time.perf_counter() - start, op="delete", outcome="error")
+        logger.error(f"❌ DELETE FAILED: {str(e)}")
         return {
             'success': False,
             'message': f'Delete failed: {str(e)}'
         }
 
-async def get_image_url(public_id: str) -> str:
-    """Generate secure URL for Cloudinary image"""
+# Delivery variants, built into the URL as Cloudinary transformations (f_auto/q_auto
+# let the CDN pick the format and quality per browser)
+IMAGE_VARIANTS = {
+    "thumbnail": {"width": 480, "height": 360, "crop": "fill", "gravity": "auto"},
+    "medium": {"width": 1024, "height": 1024, "crop": "limit"},
+    "full": {},
+}
+
+def _parse_upload_url(url: str) -> tuple:
+    """(public_id, version, format) from a .../image/upload/v{version}/{public_id}.{format} URL, or Nones"""
+    if not url or '/upload/' not in url:
+        return None, None, None
+    path = url.split('?', 1)[0].split('/upload/', 1)[1]
+    version = None
+    head, _, rest = path.partition('/')
+    if rest and head[:1] == 'v' and head[1:].isdigit():
+        version, path = head[1:], rest
+    public_id, dot, image_format = path.rpartition('.')
+    if not dot:
+        return path, version, None
+    return public_id, version, image_format
+
+def image_variant_url(public_id: str, variant: str = "full", version=None, image_format: str = None) -> str:
+    """Delivery URL of an image variant; built locally, no API call"""
+    options = {"fetch_format": "auto", "quality": "auto", **IMAGE_VARIANTS[variant]}
+    resource = _cloudinary().CloudinaryResource(public_id, format=image_format, version=version)
+    return resource.build_url(secure=True, **options)
+
+def image_variant_urls(image_url: str, public_id: str = None, variants=tuple(IMAGE_VARIANTS)) -> dict:
+    """
+    {variant: url} for a stored report image. Uses the public id and version from
+    the stored URL; URLs that are not Cloudinary uploads are returned unchanged.
+    """
+    url_public_id, version, image_format = _parse_upload_url(image_url)
+    public_id = public_id or url_public_id
+    if not public_id or (url_public_id and url_public_id != public_id):
+        return {variant: image_url for variant in variants}
+    try:
+        return {variant: image_variant_url(public_id, variant, version, image_format) for variant in variants}
+    except Exception as e:
+        logger.warning(f"⚠️ Could not build image variant URLs for {public_id}: {str(e)}")
+        return {variant: image_url for variant in variants}
+
+def thumbnail_url(report: dict) -> str:
+    """Small variant of a report's photo for list views"""
+    if not report.get('imageUrl'):
+        return report.get('imageUrl')
+    return image_variant_urls(report['imageUrl'], report.get('imagePublicId'), ("thumbnail",))["thumbnail"]
+
+async def get_image_url(public_id: str, variant: str = "full") -> str:
+    """Generate secure URL for Cloudinary image (variant: thumbnail, medium or full)"""
     try:
-        url = cloudinary.CloudinaryResource(public_id).build_url(secure=True)
-        return url
+        return image_variant_url(public_id, variant)
     except Exception as e:
         return None
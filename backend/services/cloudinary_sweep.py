@@ -0,0 +1,153 @@
+"""
+Reconciliation sweep for orphaned Cloudinary images.
+
+Photos are uploaded before their report exists (/reporting/upload-image) and
+deletes after cleaning are best effort, so assets under CLOUDINARY_SWEEP_PREFIX
+can end up referenced by no report. The sweep:
+
+1. streams `reports` with a projection (imagePublicId, imageUrl) into a set
+   of 8-byte digests of the referenced public ids (about 100 bytes per report
+   instead of the ids themselves)
+2. pages through the Cloudinary Admin API listing (500 per page); each page is
+   set-diffed and dropped, so memory does not grow with the asset count
+3. re-checks unreferenced assets older than CLOUDINARY_SWEEP_GRACE_HOURS
+   against Firestore (catches reports created during the sweep) and deletes
+   them 100 at a time
+
+Admin API calls (listing and deletes) are spaced at least
+CLOUDINARY_ADMIN_API_INTERVAL_SECONDS apart, and one run deletes at most
+CLOUDINARY_SWEEP_MAX_DELETES assets. Runs nightly as the `cloudinary_orphan_sweep`
+job and on demand via POST /admin/cloudinary/sweep (dry run by default).
+"""
+import hashlib
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 500           # Admin API maximum per listing call
+DELETE_BATCH_SIZE = 100   # Admin API maximum per delete_resources call
+RECHECK_CHUNK_SIZE = 30   # Firestore "in" filter limit
+
+
+def _digest(public_id: str) -> int:
+    return int.from_bytes(hashlib.blake2b(public_id.encode(), digest_size=8).digest(), "big")
+
+
+def referenced_public_ids() -> set:
+    """Digests of every public id a report still references"""
+    from services.cloudinary_service import _parse_upload_url
+    from services.firebase_service import get_firestore_client
+
+    db = get_firestore_client()
+    referenced = set()
+    for doc in db.collection("reports").select(["imagePublicId", "imageUrl"]).stream():
+        data = doc.to_dict() or {}
+        public_id = data.get("imagePublicId") or _parse_upload_url(data.get("imageUrl"))[0]
+        if public_id:
+            referenced.add(_digest(public_id))
+    return referenced
+
+
+def _still_unreferenced(public_ids: list) -> list:
+    """Drop ids a report started referencing after the reference set was built"""
+    from google.cloud.firestore import FieldFilter
+    from services.firebase_service import get_firestore_client
+
+    db = get_firestore_client()
+    found = set()
+    for i in range(0, len(public_ids), RECHECK_CHUNK_SIZE):
+        chunk = public_ids[i:i + RECHECK_CHUNK_SIZE]
+        query = db.collection("reports").where(filter=FieldFilter("imagePublicId", "in", chunk)).select(["imagePublicId"])
+        found.update((doc.to_dict() or {}).get("imagePublicId") for doc in query.stream())
+    return [public_id for public_id in public_ids if public_id not in found]
+
+
+def _created_at(resource: dict):
+    try:
+        return datetime.fromisoformat(resource["created_at"].replace("Z", "+00:00"))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class _RateLimiter:
+    """Spaces calls at least `interval` seconds apart"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._last = None
+
+    def wait(self):
+        if self._last is not None:
+            remaining = self.interval - (time.monotonic() - self._last)
+            if remaining > 0:
+                time.sleep(remaining)
+        self._last = time.monotonic()
+
+
+def sweep_orphaned_images(dry_run: bool = False) -> dict:
+    """Delete (or with dry_run, only count) unreferenced assets older than the grace period (blocking)"""
+    from config import get_settings
+    from services.cloudinary_service import _cloudinary
+
+    settings = get_settings()
+    api = _cloudinary().api
+    limiter = _RateLimiter(settings.cloudinary_admin_api_interval_seconds)
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.cloudinary_sweep_grace_hours)
+    max_deletes = settings.cloudinary_sweep_max_deletes
+    prefix = settings.cloudinary_sweep_prefix.rstrip("/") + "/"
+
+    referenced = referenced_public_ids()
+    stats = {"referenced": len(referenced), "scanned": 0, "pages": 0, "orphaned": 0,
+             "inGracePeriod": 0, "deleted": 0, "bytesFreed": 0, "dryRun": dry_run, "complete": True}
+    pending = {}  # public_id -> bytes, flushed at DELETE_BATCH_SIZE
+
+    def flush():
+        ids = _still_unreferenced(list(pending))
+        if ids and not dry_run:
+            limiter.wait()
+            result = api.delete_resources(ids)
+            deleted = [pid for pid, state in (result.get("deleted") or {}).items() if state == "deleted"]
+        else:
+            deleted = ids
+        stats["deleted"] += len(deleted)
+        stats["bytesFreed"] += sum(pending.get(pid, 0) for pid in deleted)
+        pending.clear()
+
+    cursor = None
+    while True:
+        limiter.wait()
+        options = {"type": "upload", "resource_type": "image", "prefix": prefix, "max_results": PAGE_SIZE}
+        if cursor:
+            options["next_cursor"] = cursor
+        page = api.resources(**options)
+        stats["pages"] += 1
+        for resource in page.get("resources", []):
+            stats["scanned"] += 1
+            public_id = resource["public_id"]
+            if _digest(public_id) in referenced:
+                continue
+            stats["orphaned"] += 1
+            created_at = _created_at(resource)
+            if created_at is None or created_at > cutoff:
+                stats["inGracePeriod"] += 1
+                continue
+            if stats["deleted"] + len(pending) >= max_deletes:
+                stats["complete"] = False
+                continue
+            pending[public_id] = resource.get("bytes", 0)
+            if len(pending) >= DELETE_BATCH_SIZE:
+                flush()
+        cursor = page.get("next_cursor")
+        if not cursor:
+            break
+    if pending:
+        flush()
+
+    logger.info(
+        f"🧹 Cloudinary sweep{' (dry run)' if dry_run else ''}: {stats['scanned']} assets, "
+        f"{stats['orphaned']} unreferenced, {stats['deleted']} {'deletable' if dry_run else 'deleted'} "
+        f"({stats['bytesFreed'] / (1024 * 1024):.1f} MB)"
+    )
+    return stats
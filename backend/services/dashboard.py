@@ -0,0 +1,71 @@
+"""
+Composite data for the user and NGO dashboards (GET /analytics/dashboard/{id}).
+
+A dashboard used to fire /analytics/user|ngo/{id}, the overall leaderboard
+(to find the viewer's rank in the top 20) and /analytics/global, and each of
+those scanned whole collections. Here everything comes from maintained
+aggregates, fetched concurrently:
+
+    profile      the running totals on users/{id} (services.points_service)
+    position     rank (count aggregation) and neighbouring leaderboard entries
+                 (services.leaderboards.leaderboard_position), once the totals
+                 are known
+    global       report counts as Firestore count aggregations, in parallel
+                 with the two above
+"""
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _profile(user_id: str) -> dict:
+    from services.firebase_service import get_firestore_client
+    from services.points_service import TOTAL_FIELDS, USERS_COLLECTION
+
+    snapshot = get_firestore_client().collection(USERS_COLLECTION).document(user_id).get(
+        field_paths=[*TOTAL_FIELDS, "userType"])
+    data = (snapshot.to_dict() if snapshot.exists else None) or {}
+    return {"userType": data.get("userType"), **{field: data.get(field) or 0 for field in TOTAL_FIELDS}}
+
+
+def _count_reports(status: str = None) -> int:
+    from google.cloud.firestore import FieldFilter
+    from services.firebase_service import get_firestore_client
+
+    query = get_firestore_client().collection("reports")
+    if status:
+        query = query.where(filter=FieldFilter("status", "==", status))
+    return query.count(alias="reports").get()[0][0].value
+
+
+async def global_summary() -> dict:
+    """Report totals without reading the report documents"""
+    total, cleaned = await asyncio.gather(
+        asyncio.to_thread(_count_reports),
+        asyncio.to_thread(_count_reports, "cleaned"),
+    )
+    return {"totalReports": total, "totalCleanings": cleaned, "activeReports": total - cleaned}
+
+
+async def build_dashboard(user_id: str, user_type: str = None, span: int = 2) -> dict:
+    """Stats, overall rank with `span` neighbours each side, and the global summary for one user or NGO"""
+    from services.leaderboards import leaderboard_position
+
+    async def standing():
+        profile = await asyncio.to_thread(_profile, user_id)
+        resolved_type = profile["userType"] or user_type or "individual"
+        position = await leaderboard_position(user_id, resolved_type, "overall", profile["points"], span)
+        return profile, resolved_type, position
+
+    (profile, resolved_type, position), summary = await asyncio.gather(standing(), global_summary())
+    return {
+        "userId": user_id,
+        "userType": resolved_type,
+        "reportsCount": profile["reportsCount"],
+        "cleaningsCount": profile["cleaningsCount"],
+        "totalPoints": profile["points"],
+        "rank": position["rank"],
+        "neighbours": {"above": position["above"], "below": position["below"]},
+        "global": summary,
+    }
@@ -1,8 +1,11 @@
 import firebase_admin
 from firebase_admin import credentials, firestore
 from config import get_settings
+import functools
 import json
 import os
+import threading
+import time
 
 # Initialize Firebase
 def init_firebase():
@@ -48,16 +51,121 @@ def init_firebase():
         print(f"ℹ️  Firebase already initialized")
         return True
 
-try:
-    init_firebase()
-except Exception as e:
-    print(f"⚠️  Firebase initialization error at startup: {str(e)}")
-    print("Firebase operations will fail until credentials are properly configured")
+# Firestore call timing (luit_firestore_seconds). The SDK's public I/O methods are
+# wrapped once; calls the SDK makes internally (DocumentReference.get -> get_all,
+# set -> WriteBatch.commit) are counted once, under the outer operation.
+_timing = threading.local()
+
+def _timed_call(fn, op):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if getattr(_timing, "active", False):
+            return fn(*args, **kwargs)
+        from services.metrics import FIRESTORE_SECONDS
+        _timing.active = True
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _timing.active = False
+            FIRESTORE_SECONDS.observe(time.perf_counter() - start, op=op)
+    return wrapper
+
+def _timed_stream(fn, op):
+    """Streams are timed inside next() only, so the caller's per-document work isn't counted"""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if getattr(_timing, "active", False):
+            return fn(*args, **kwargs)
+        return _time_iteration(fn(*args, **kwargs), op)
+    return wrapper
+
+def _time_iteration(iterator, op):
+    from services.metrics import FIRESTORE_SECONDS
+    elapsed = 0.0
+    try:
+        while True:
+            start = time.perf_counter()
+            _timing.active = True
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                _timing.active = False
+                elapsed += time.perf_counter() - start
+            yield item
+    finally:
+        FIRESTORE_SECONDS.observe(elapsed, op=op)
+
+def _instrument_classes(document, collection, batch, query, aggregation, client):
+    if getattr(document.get, "_luit_timed", False):
+        return
+    targets = [
+        (document, ("get", "set", "update", "delete", "create"), "document", _timed_call),
+        (collection, ("add",), "collection", _timed_call),
+        (batch, ("commit",), "batch", _timed_call),
+        # Query/CollectionReference .get() delegate to Query.stream
+        (query, ("stream",), "query", _timed_stream),
+        (aggregation, ("stream",), "aggregation", _timed_stream),
+        (client, ("get_all",), "client", _timed_stream),
+    ]
+    for cls, methods, prefix, wrap in targets:
+        for name in methods:
+            wrapped = wrap(getattr(cls, name), f"{prefix}.{name}")
+            wrapped._luit_timed = True
+            setattr(cls, name, wrapped)
+
+def _instrument_firestore():
+    from google.cloud.firestore_v1 import aggregation, batch, client, collection, document, query
+    _instrument_classes(document.DocumentReference, collection.CollectionReference, batch.WriteBatch,
+                        query.Query, aggregation.AggregationQuery, client.Client)
+
+_instrument_firestore()
+
+_memory_client = None
+_memory_lock = threading.Lock()
+
+def _use_memory_backend() -> bool:
+    return get_settings().firestore_backend == "memory"
+
+if _use_memory_backend():
+    print("ℹ️  FIRESTORE_BACKEND=memory: using the in-memory Firestore (data is not persisted)")
+else:
+    try:
+        init_firebase()
+    except Exception as e:
+        print(f"⚠️  Firebase initialization error at startup: {str(e)}")
+        print("Firebase operations will fail until credentials are properly configured")
 
 def get_firestore_client():
-    """Get Firestore client for database operations"""
+    """Get Firestore client for database operations (the in-memory fake when FIRESTORE_BACKEND=memory)"""
+    if _use_memory_backend():
+        global _memory_client
+        if _memory_client is None:
+            with _memory_lock:
+                if _memory_client is None:
+                    from services import memory_firestore as mf
+                    _instrument_classes(mf.DocumentReference, mf.CollectionReference, mf.WriteBatch,
+                                        mf.Query, mf.AggregationQuery, mf.MemoryFirestore)
+                    settings = get_settings()
+                    _memory_client = mf.MemoryFirestore(
+                        latency_ms=settings.firestore_fake_latency_ms,
+                        jitter=settings.fake_latency_jitter,
+                    )
+        return _memory_client
     return firestore.client()
 
+def run_in_transaction(fn, *args, **kwargs):
+    """
+    Run fn(transaction, *args, **kwargs) in a Firestore transaction and return its result.
+    Reads inside fn must go through the transaction; the whole function is retried on contention.
+    """
+    db = get_firestore_client()
+    if _use_memory_backend():
+        return db.run_transaction(fn, *args, **kwargs)
+    return firestore.transactional(fn)(db.transaction(), *args, **kwargs)
+
 def add_document(collection: str, data: dict) -> str:
     """Add document to Firestore, returns document ID"""
     db = get_firestore_client()
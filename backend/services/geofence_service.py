@@ -142,3 +142,63 @@ def is_within_brahmaputra_geofence(latitude: float, longitude: float) -> dict:
         'distance': round(min_distance, 1),
         'message': f'Outside geofence. Must be within 2km of Brahmaputra River (currently {round(min_distance, 0)}m away)'
     }
+
+
+_SEGMENTS = None
+
+
+def _segment_arrays():
+    """River segments as numpy arrays: start lat/lon, end lat/lon (cached)"""
+    global _SEGMENTS
+    if _SEGMENTS is None:
+        import numpy as np
+        path = np.asarray(BRAHMAPUTRA_RIVER_PATH, dtype=np.float64)
+        _SEGMENTS = (path[:-1, 0], path[:-1, 1], path[1:, 0], path[1:, 1])
+    return _SEGMENTS
+
+
+def distances_to_river(latitudes, longitudes):
+    """
+    Vectorized point_to_line_segment_distance: distance in meters from each
+    point to the nearest river segment, computed for all points x segments at once.
+    """
+    import numpy as np
+
+    start_lat, start_lon, end_lat, end_lon = _segment_arrays()
+    lats = np.asarray(latitudes, dtype=np.float64)[:, None]
+    lons = np.asarray(longitudes, dtype=np.float64)[:, None]
+
+    meters_per_lat = 111320
+    meters_per_lon = 111320 * np.cos(np.radians((start_lat + end_lat) / 2))
+
+    px = (lons - start_lon) * meters_per_lon
+    py = (lats - start_lat) * meters_per_lat
+    dx = (end_lon - start_lon) * meters_per_lon
+    dy = (end_lat - start_lat) * meters_per_lat
+
+    segment_length_sq = dx * dx + dy * dy
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.where(segment_length_sq > 0, (px * dx + py * dy) / segment_length_sq, 0.0)
+    t = np.clip(t, 0.0, 1.0)
+    return np.sqrt((px - t * dx) ** 2 + (py - t * dy) ** 2).min(axis=1)
+
+
+def check_geofence_batch(latitudes, longitudes) -> List[dict]:
+    """is_within_brahmaputra_geofence for many points in one vectorized pass"""
+    if len(latitudes) == 0:
+        return []
+    results = []
+    for distance in distances_to_river(latitudes, longitudes).tolist():
+        if distance <= GEOFENCE_RADIUS_METERS:
+            results.append({
+                'allowed': True,
+                'distance': round(distance, 1),
+                'message': f'Within geofence ({round(distance, 0)}m from Brahmaputra)'
+            })
+        else:
+            results.append({
+                'allowed': False,
+                'distance': round(distance, 1),
+                'message': f'Outside geofence. Must be within 2km of Brahmaputra River (currently {round(distance, 0)}m away)'
+            })
+    return results
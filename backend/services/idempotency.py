@@ -0,0 +1,418 @@
+"""
+Idempotency-Key support for the expensive write endpoints (report creation,
+batch report ingestion, mark-cleaned).
+
+Clients on flaky connections retry after a timeout while the first request is
+still running (or already finished). With an `Idempotency-Key` header:
+
+- the first request for a key runs; a successful response is stored for
+  IDEMPOTENCY_TTL_SECONDS and replayed for later requests with the same key
+  (header `Idempotent-Replayed: true`), so inference, the Cloudinary upload
+  and points are not repeated
+- duplicates arriving while it runs wait for it and get the same response; if
+  it fails (nothing stored) a waiting duplicate claims the key and runs, and
+  one still waiting after PENDING_TIMEOUT_SECONDS on a live claim gets 409
+- a key reused with a different request body gets 422. Bodies are compared by
+  content: JSON canonically, multipart forms (batch ingestion) by field values
+  and file digests, so a retry with a new multipart boundary still matches
+- failures are not stored, so the client may retry with the same key: non-2xx
+  responses and 2xx JSON bodies reporting `"success": false`
+
+Keys are scoped per path. The store is in-process memory; with
+IDEMPOTENCY_BACKEND=firestore (the default when gunicorn runs more than one
+worker) records are also written to the `idempotency_keys` collection (one
+doc per key, claimed with create() while pending) so retries that land on
+another worker or instance are covered too. Configure a Firestore TTL policy
+on `expiresAt` to purge old records.
+
+Requests without the header pass straight through.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+
+from services.metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_PATHS = ("/reporting/report", "/reporting/report/batch", "/cleaning/mark-cleaned")
+HEADER = b"idempotency-key"
+MAX_KEY_LENGTH = 255
+MAX_ENTRIES = 10_000
+MAX_BODY_BYTES = 512 * 1024        # responses larger than this are not stored
+PENDING_TIMEOUT_SECONDS = 120      # a pending Firestore claim older than this is taken over
+POLL_SECONDS = 0.5
+COLLECTION = "idempotency_keys"
+
+
+@dataclass
+class StoredResponse:
+    fingerprint: str
+    status: int
+    headers: list
+    body: bytes
+    expires_at: float  # epoch seconds
+
+
+class MemoryIdempotencyStore:
+    """Size-capped LRU of stored responses with absolute expiry"""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.time():
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: StoredResponse):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class FirestoreIdempotencyStore:
+    """Shared records in Firestore; every method is blocking (call via asyncio.to_thread)"""
+
+    def _ref(self, key: str):
+        from services.firebase_service import get_firestore_client
+        return get_firestore_client().collection(COLLECTION).document(hashlib.sha256(key.encode()).hexdigest())
+
+    @staticmethod
+    def _to_entry(data: dict):
+        if data.get("state") != "done":
+            return None
+        return StoredResponse(
+            fingerprint=data["fingerprint"],
+            status=data["status"],
+            headers=[(k.encode("latin-1"), v.encode("latin-1")) for k, v in json.loads(data["headers"])],
+            body=data["body"],
+            expires_at=data["expiresAt"].timestamp(),
+        )
+
+    def claim(self, key: str, fingerprint: str):
+        """
+        Try to become the request that runs `key`.
+        Returns ("claimed", None), ("done", StoredResponse) or ("pending", None).
+        """
+        from google.api_core.exceptions import AlreadyExists
+
+        ref = self._ref(key)
+        now = datetime.now(timezone.utc)
+        pending = {"state": "pending", "path": key.split(" ", 1)[0], "fingerprint": fingerprint,
+                   "createdAt": now, "expiresAt": now + timedelta(seconds=PENDING_TIMEOUT_SECONDS)}
+        try:
+            ref.create(pending)
+            return "claimed", None
+        except AlreadyExists:
+            pass
+        snapshot = ref.get()
+        data = snapshot.to_dict() if snapshot.exists else None
+        if data is None or data["expiresAt"] <= now:
+            ref.set(pending)  # expired record or abandoned claim: take it over
+            return "claimed", None
+        if data.get("state") == "done":
+            return "done", self._to_entry(data)
+        return "pending", None
+
+    def get(self, key: str):
+        """
+        ("done", StoredResponse), ("pending", None) while another request runs
+        the key, or ("missing", None) when there is no live record (never
+        claimed, expired, or released after a failure)
+        """
+        snapshot = self._ref(key).get()
+        if not snapshot.exists:
+            return "missing", None
+        data = snapshot.to_dict()
+        if data["expiresAt"] <= datetime.now(timezone.utc):
+            return "missing", None
+        if data.get("state") == "done":
+            return "done", self._to_entry(data)
+        return "pending", None
+
+    def complete(self, key: str, entry: StoredResponse):
+        self._ref(key).set({
+            "state": "done",
+            "path": key.split(" ", 1)[0],
+            "fingerprint": entry.fingerprint,
+            "status": entry.status,
+            "headers": json.dumps([(k.decode("latin-1"), v.decode("latin-1")) for k, v in entry.headers]),
+            "body": entry.body,
+            "createdAt": datetime.now(timezone.utc),
+            "expiresAt": datetime.fromtimestamp(entry.expires_at, timezone.utc),
+        })
+
+    def release(self, key: str):
+        self._ref(key).delete()
+
+
+def _succeeded(status: int, headers: list, body: bytes) -> bool:
+    """2xx, and not a JSON body that reports `"success": false` (those are failures the client may retry)"""
+    if not 200 <= status < 300:
+        return False
+    content_type = dict((k.lower(), v) for k, v in headers).get(b"content-type", b"")
+    if not content_type.startswith(b"application/json"):
+        return True
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return True
+    return not (isinstance(payload, dict) and payload.get("success") is False)
+
+
+def _backend(setting: str) -> str:
+    """memory | firestore; "auto" shares records whenever gunicorn runs several workers"""
+    if setting != "auto":
+        return setting
+    return "firestore" if int(os.getenv("GUNICORN_WORKERS", "1")) > 1 else "memory"
+
+
+class IdempotencyMiddleware:
+    def __init__(self, app, paths=IDEMPOTENT_PATHS, ttl: float = None, shared_store=None):
+        from config import get_settings
+
+        settings = get_settings()
+        self.app = app
+        self.paths = set(paths)
+        self.ttl = ttl if ttl is not None else settings.idempotency_ttl_seconds
+        self.store = MemoryIdempotencyStore()
+        if shared_store is None and _backend(settings.idempotency_backend) == "firestore":
+            shared_store = FirestoreIdempotencyStore()
+        self.shared = shared_store
+        self._inflight = {}  # key -> Future[(StoredResponse, stored)]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        raw_key = dict(scope.get("headers") or []).get(HEADER)
+        if raw_key is None:
+            await self.app(scope, receive, send)
+            return
+        idem_key = raw_key.decode("latin-1").strip()
+        if not idem_key or len(idem_key) > MAX_KEY_LENGTH:
+            await _send_json(send, 400, {"detail": f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters"})
+            return
+
+        body = await _read_body(receive)
+        fingerprint = await _fingerprint(scope, body)
+        key = f"{scope['path']} {idem_key}"
+
+        entry = self.store.get(key)
+        if entry is None and self.shared is not None:
+            try:
+                _, entry = await asyncio.to_thread(self.shared.get, key)
+            except Exception as e:
+                logger.warning(f"⚠️ Idempotency lookup failed for {scope['path']}: {e}")
+        if entry is not None:
+            CACHE_REQUESTS.inc(cache="idempotency", result="hit")
+            await self._replay(send, entry, fingerprint)
+            return
+
+        future = self._inflight.get(key)
+        if future is not None:
+            CACHE_REQUESTS.inc(cache="idempotency", result="coalesced")
+            entry, _ = await asyncio.shield(future)
+            await self._replay(send, entry, fingerprint)
+            return
+
+        CACHE_REQUESTS.inc(cache="idempotency", result="miss")
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            await self._lead(scope, body, receive, send, key, fingerprint, future)
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+                future.exception()  # don't log as unretrieved when nobody was waiting
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _lead(self, scope, body: bytes, receive, send, key: str, fingerprint: str, future):
+        if self.shared is not None:
+            try:
+                state, entry = await asyncio.to_thread(self.shared.claim, key, fingerprint)
+            except Exception as e:
+                logger.warning(f"⚠️ Idempotency claim failed for {scope['path']}, continuing with the local store: {e}")
+                state, entry = "unavailable", None
+            if state == "pending":
+                # Another worker/instance is running this key: wait for its stored response
+                state, entry = await self._wait_shared(key, fingerprint)
+            if entry is not None:
+                future.set_result((entry, True))
+                await self._replay(send, entry, fingerprint)
+                return
+            if state == "pending":
+                # Still running elsewhere and not ours to run: the client retries later
+                payload = {"detail": "A request with this Idempotency-Key is still being processed"}
+                entry = StoredResponse(fingerprint=fingerprint, status=409,
+                                       headers=[(b"content-type", b"application/json")],
+                                       body=json.dumps(payload).encode(), expires_at=0)
+                future.set_result((entry, False))
+                await _send_json(send, 409, payload)
+                return
+
+        else:
+            state = None
+
+        start = {}
+        chunks = []
+        body_sent = False
+
+        async def replay_receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        async def tee(message):
+            # The leader's response streams to its client as usual; once complete it is
+            # stored and handed to waiting duplicates (background tasks may still be running)
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False) and not future.done():
+                    entry = StoredResponse(
+                        fingerprint=fingerprint,
+                        status=start.get("status", 500),
+                        headers=list(start.get("headers", [])),
+                        body=b"".join(chunks),
+                        expires_at=time.time() + self.ttl,
+                    )
+                    stored = len(entry.body) <= MAX_BODY_BYTES and _succeeded(entry.status, entry.headers, entry.body)
+                    if stored:
+                        self.store.set(key, entry)
+                    future.set_result((entry, stored))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, tee)
+        finally:
+            if self.shared is not None and state != "unavailable":
+                entry, stored = future.result() if future.done() else (None, False)
+                try:
+                    if stored:
+                        await asyncio.to_thread(self.shared.complete, key, entry)
+                    else:
+                        await asyncio.to_thread(self.shared.release, key)
+                except Exception as e:
+                    logger.warning(f"⚠️ Idempotency record update failed for {scope['path']}: {e}")
+
+    async def _wait_shared(self, key: str, fingerprint: str):
+        """
+        Poll a key claimed elsewhere until its response is stored. If the claim
+        goes away (the leader failed and released it) or is abandoned past
+        PENDING_TIMEOUT_SECONDS, claim it before running it here.
+        Returns ("done", StoredResponse), ("claimed", None) or ("pending", None).
+        """
+        deadline = time.monotonic() + PENDING_TIMEOUT_SECONDS
+        while True:
+            await asyncio.sleep(POLL_SECONDS)
+            state, entry = await asyncio.to_thread(self.shared.get, key)
+            if state == "missing" or time.monotonic() >= deadline:
+                state, entry = await asyncio.to_thread(self.shared.claim, key, fingerprint)
+                if state != "pending" or time.monotonic() >= deadline:
+                    break
+            elif state == "done":
+                break
+        if entry is not None:
+            self.store.set(key, entry)
+        return state, entry
+
+    @staticmethod
+    async def _replay(send, entry: StoredResponse, fingerprint: str):
+        if entry.fingerprint != fingerprint:
+            CACHE_REQUESTS.inc(cache="idempotency", result="conflict")
+            await _send_json(send, 422, {"detail": "Idempotency-Key was already used with a different request body"})
+            return
+        headers = [(k, v) for k, v in entry.headers if k.lower() != b"content-length"]
+        headers += [(b"idempotent-replayed", b"true"), (b"content-length", str(len(entry.body)).encode())]
+        await send({"type": "http.response.start", "status": entry.status, "headers": headers})
+        await send({"type": "http.response.body", "body": entry.body})
+
+
+def _canonical_json(text):
+    """Canonical JSON text for `text`, or `text` itself when it is not JSON"""
+    try:
+        return json.dumps(json.loads(text), sort_keys=True, separators=(",", ":"))
+    except (TypeError, ValueError):
+        return text
+
+
+async def _form_parts(scope, body: bytes) -> list:
+    """[[field, value]] of a multipart body in order; files as their sha256, text as canonical JSON"""
+    from starlette.datastructures import UploadFile
+    from starlette.requests import Request
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    form = await Request(dict(scope), receive).form()
+    try:
+        parts = []
+        for name, value in form.multi_items():
+            if isinstance(value, UploadFile):
+                parts.append([name, "sha256:" + hashlib.sha256(await value.read()).hexdigest()])
+            else:
+                parts.append([name, _canonical_json(value)])
+        return parts
+    finally:
+        await form.close()
+
+
+async def _fingerprint(scope, body: bytes) -> str:
+    """
+    Digest of the request content, independent of how it was encoded: the
+    multipart boundary and part headers, and JSON whitespace/key order, change
+    between retries of the same submission.
+    """
+    content_type = dict(scope.get("headers") or []).get(b"content-type", b"").lower()
+    content = body
+    try:
+        if content_type.startswith(b"multipart/form-data"):
+            content = json.dumps(await _form_parts(scope, body), separators=(",", ":")).encode()
+        elif content_type.startswith(b"application/json"):
+            content = json.dumps(json.loads(body), sort_keys=True, separators=(",", ":")).encode()
+    except Exception:
+        content = body  # unparseable: compare the raw bytes
+    return hashlib.sha256(content).hexdigest()
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+async def _send_json(send, status: int, payload: dict):
+    body = json.dumps(payload).encode()
+    await send({"type": "http.response.start", "status": status, "headers": [
+        (b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+    ]})
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,94 @@
+"""
+Local-disk cache for original report images fetched from Cloudinary.
+
+Cleaning verification needs the report's "before" photo; instead of the client
+downloading it and re-uploading it as base64, the server fetches it once and
+keeps the bytes on local disk (bounded by IMAGE_CACHE_MAX_MB, oldest evicted).
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+
+from services.metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "luit-image-cache"))
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_MB", "256")) * 1024 * 1024
+FETCH_TIMEOUT_SECONDS = 15
+MAX_IMAGE_BYTES = 20 * 1024 * 1024
+
+_lock = threading.Lock()
+
+
+def _cache_path(url: str) -> str:
+    return os.path.join(IMAGE_CACHE_DIR, hashlib.sha256(url.encode("utf-8")).hexdigest())
+
+
+def _evict_if_needed():
+    """Drop least recently used files until the cache fits its size budget."""
+    try:
+        entries = []
+        total = 0
+        for name in os.listdir(IMAGE_CACHE_DIR):
+            path = os.path.join(IMAGE_CACHE_DIR, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+        if total <= IMAGE_CACHE_MAX_BYTES:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.unlink(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+            if total <= IMAGE_CACHE_MAX_BYTES:
+                break
+    except Exception as e:
+        logger.warning(f"⚠️ Image cache eviction failed: {e}")
+
+
+def fetch_image_bytes(url: str) -> bytes:
+    """Return the bytes at `url`, served from the disk cache when present (blocking)."""
+    path = _cache_path(url)
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        os.utime(path)  # mark as recently used
+        CACHE_REQUESTS.inc(cache="image", result="hit")
+        return data
+    except FileNotFoundError:
+        CACHE_REQUESTS.inc(cache="image", result="miss")
+
+    import requests
+
+    resp = requests.get(url, timeout=FETCH_TIMEOUT_SECONDS)
+    resp.raise_for_status()
+    data = resp.content
+    if len(data) > MAX_IMAGE_BYTES:
+        raise ValueError("Image too large")
+
+    with _lock:
+        os.makedirs(IMAGE_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        _evict_if_needed()
+    return data
+
+
+def evict_image(url: str):
+    """Remove a cached image (e.g. after the original is deleted from Cloudinary)."""
+    if not url:
+        return
+    try:
+        os.unlink(_cache_path(url))
+    except FileNotFoundError:
+        pass
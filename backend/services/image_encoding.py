@@ -0,0 +1,72 @@
+"""
+Canonical encoding for stored report/cleaning photos.
+
+Phones send whatever their camera produces. Before a photo is uploaded it is
+re-encoded once to IMAGE_FORMAT (WebP by default) with its longest side capped
+at IMAGE_MAX_DIMENSION, EXIF orientation applied to the pixels and metadata
+(including GPS tags) dropped. Every later view, image-cache fetch and cleaning
+verification then decodes the small canonical file instead of the original.
+
+The same limits are advertised to the frontend via GET /config/client so it
+can downscale before sending.
+"""
+import io
+import logging
+
+logger = logging.getLogger(__name__)
+
+# IMAGE_FORMAT -> (Pillow format, file extension)
+CANONICAL_FORMATS = {
+    "webp": ("WEBP", ".webp"),
+    "jpeg": ("JPEG", ".jpg"),
+}
+
+
+def canonicalize_image(image_bytes: bytes) -> tuple:
+    """(encoded bytes, file extension) of the canonical version of an encoded image"""
+    from PIL import Image, ImageOps
+    from config import get_settings
+    from services.metrics import IMAGE_STAGE_SECONDS
+
+    settings = get_settings()
+    pil_format, extension = CANONICAL_FORMATS.get(settings.image_format, CANONICAL_FORMATS["webp"])
+    max_dimension = settings.image_max_dimension
+
+    with IMAGE_STAGE_SECONDS.time(stage="reencode"):
+        image = Image.open(io.BytesIO(image_bytes))
+        original_size = image.size
+        # JPEG: let libjpeg decode at a reduced DCT scale (still >= the target size)
+        image.draft("RGB", (max_dimension, max_dimension))
+        image = ImageOps.exif_transpose(image)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+
+        out = io.BytesIO()
+        options = {"quality": settings.image_quality}
+        if pil_format == "WEBP":
+            options["method"] = 4
+        else:
+            options.update(optimize=True, progressive=True)
+        image.save(out, pil_format, **options)
+        encoded = out.getvalue()
+
+    logger.debug(
+        "🗜️ Re-encoded %sx%s (%d bytes) -> %sx%s %s (%d bytes)",
+        *original_size, len(image_bytes), *image.size, pil_format, len(encoded)
+    )
+    return encoded, extension
+
+
+def client_image_config() -> dict:
+    """Capture hints for the frontend (GET /config/client)"""
+    from config import get_settings
+
+    settings = get_settings()
+    return {
+        "maxDimension": settings.image_max_dimension,
+        "captureFormat": "image/jpeg",
+        "captureQuality": settings.client_image_quality,
+        "maxBytes": settings.client_max_image_kb * 1024,
+        "storedFormat": settings.image_format,
+    }
@@ -0,0 +1,240 @@
+"""
+Precomputed image features for report photos.
+
+When a report is created its photo has already been analysed (YOLO + CV
+metrics); the compact result is stored next to the report so cleaning
+verification only has to process the "after" image.
+
+Stored at reports/{reportId}/features/{FEATURES_VERSION}:
+    detections      YOLO detections [{box, score, class_id}]
+    yolo            whether YOLO ran successfully when the features were built
+    thumbnail       grayscale PNG, longest side THUMBNAIL_SIZE (bytes)
+    edgeDensity     Canny edge density of the thumbnail
+    detailEdgeDensity  Canny edge density at full resolution (tiles, see clutter_metrics)
+    colorVariance   pixel variance (analysis level, see clutter_metrics)
+    laplacianVar    Laplacian variance (full-resolution tiles, see clutter_metrics)
+    phash           64-bit DCT perceptual hash (hex)
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from services.image_pyramid import as_pyramid
+
+logger = logging.getLogger(__name__)
+
+FEATURES_SUBCOLLECTION = "features"
+FEATURES_VERSION = "v1"
+THUMBNAIL_SIZE = 256
+PHASH_SIZE = 32
+PHASH_BITS = 8  # 8x8 low-frequency DCT block -> 64-bit hash
+RECENT_FEATURES_TTL_SECONDS = 900  # verify -> upload -> submit window
+RECENT_FEATURES_MAX = 256
+RECENT_FEATURES_MAX_DISTANCE = 6   # pHash bits between the verified photo and its uploaded (re-encoded) copy
+
+
+def make_thumbnail(gray: np.ndarray, size: tuple = None) -> np.ndarray:
+    """Downscale a grayscale image to `size` (w, h), or to THUMBNAIL_SIZE on its longest side"""
+    if size is None:
+        h, w = gray.shape[:2]
+        scale = min(1.0, THUMBNAIL_SIZE / max(h, w))
+        size = (max(1, int(round(w * scale))), max(1, int(round(h * scale))))
+    if (gray.shape[1], gray.shape[0]) == tuple(size):
+        return gray
+    return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+
+
+def edge_density(gray: np.ndarray) -> float:
+    """Fraction of pixels on a Canny edge"""
+    edges = cv2.Canny(gray, 50, 150)
+    return float(np.count_nonzero(edges)) / edges.size
+
+
+def perceptual_hash(gray: np.ndarray) -> str:
+    """DCT perceptual hash (pHash) of a grayscale image as a 16-char hex string"""
+    small = cv2.resize(gray, (PHASH_SIZE, PHASH_SIZE), interpolation=cv2.INTER_AREA).astype(np.float32)
+    dct = cv2.dct(small)[:PHASH_BITS, :PHASH_BITS]
+    coeffs = dct.flatten()
+    median = np.median(coeffs[1:])  # ignore the DC term
+    value = 0
+    for bit in coeffs > median:
+        value = (value << 1) | int(bit)
+    return f"{value:016x}"
+
+
+def clutter_metrics(image) -> tuple:
+    """
+    Clutter indicators used by the garbage heuristic, cached on the pyramid:
+    (Canny edge density, color variance, Laplacian variance).
+    Edge density and Laplacian variance depend on pixel-scale detail, so they are
+    estimated from full-resolution tiles (same scale as the original full-image
+    metrics); color variance survives downscaling and is read from the analysis level.
+    """
+    pyramid = as_pyramid(image)
+    metrics = pyramid.cache.get("clutter")
+    if metrics is None:
+        tiles, margin = pyramid.detail_tiles()
+        edge_pixels = 0
+        pixels = 0
+        lap_sum = 0.0
+        lap_sq_sum = 0.0
+        for tile in tiles:
+            edges = cv2.Canny(tile, 50, 150)
+            laplacian = cv2.Laplacian(tile, cv2.CV_64F)
+            if margin:
+                edges = edges[margin:-margin, margin:-margin]
+                laplacian = laplacian[margin:-margin, margin:-margin]
+            edge_pixels += np.count_nonzero(edges)
+            pixels += edges.size
+            lap_sum += laplacian.sum()
+            lap_sq_sum += np.square(laplacian).sum()
+        lap_mean = lap_sum / pixels
+        metrics = (
+            float(edge_pixels) / pixels,
+            float(np.var(pyramid.rgb())),
+            float(lap_sq_sum / pixels - lap_mean ** 2),
+        )
+        pyramid.cache["clutter"] = metrics
+    return metrics
+
+
+def extract_image_features(image, detections: list = None, yolo_ok: bool = False) -> dict:
+    """Build the feature record for a decoded image or ImagePyramid (detections come from the caller's YOLO run)"""
+    pyramid = as_pyramid(image)
+    thumbnail = pyramid.gray(THUMBNAIL_SIZE)
+    ok, png = cv2.imencode(".png", thumbnail)
+    if not ok:
+        raise ValueError("Failed to encode feature thumbnail")
+    detail_edge_density, color_variance, laplacian_var = clutter_metrics(pyramid)
+
+    return {
+        "detections": [
+            {
+                "box": [round(float(v), 1) for v in det["box"]],
+                "score": round(float(det["score"]), 4),
+                "class_id": int(det["class_id"]),
+            }
+            for det in (detections or [])
+        ],
+        "yolo": bool(yolo_ok),
+        "width": int(pyramid.width),
+        "height": int(pyramid.height),
+        "thumbnail": png.tobytes(),
+        "edgeDensity": edge_density(thumbnail),
+        "detailEdgeDensity": detail_edge_density,
+        "colorVariance": color_variance,
+        "laplacianVar": laplacian_var,
+        "phash": perceptual_hash(pyramid.gray()),
+        "createdAt": datetime.now().isoformat(),
+    }
+
+
+def decode_thumbnail(features: dict) -> np.ndarray:
+    """Decode the stored grayscale thumbnail back into an array"""
+    data = np.frombuffer(bytes(features["thumbnail"]), dtype=np.uint8)
+    thumbnail = cv2.imdecode(data, cv2.IMREAD_GRAYSCALE)
+    if thumbnail is None:
+        raise ValueError("Stored feature thumbnail is corrupt")
+    return thumbnail
+
+
+def report_features_ref(report_ref):
+    """Document reference of the feature record for a report document reference"""
+    return report_ref.collection(FEATURES_SUBCOLLECTION).document(FEATURES_VERSION)
+
+
+def _features_ref(report_id: str):
+    from services.firebase_service import get_firestore_client
+
+    db = get_firestore_client()
+    return report_features_ref(db.collection("reports").document(report_id))
+
+
+def save_report_features(report_id: str, features: dict):
+    """Persist a feature record for a report (best effort; failures only log)"""
+    try:
+        _features_ref(report_id).set(features)
+        logger.info(f"🧾 Stored image features for report {report_id}")
+    except Exception as e:
+        logger.warning(f"⚠️ Could not store image features for report {report_id}: {e}")
+
+
+def load_report_features(report_id: str) -> dict:
+    """Stored feature record for a report, or None if missing/unreadable"""
+    try:
+        snap = _features_ref(report_id).get()
+        return snap.to_dict() if snap.exists else None
+    except Exception as e:
+        logger.warning(f"⚠️ Could not load image features for report {report_id}: {e}")
+        return None
+
+
+def delete_report_features(report_id: str):
+    """Remove a report's feature record (best effort)"""
+    try:
+        _features_ref(report_id).delete()
+    except Exception as e:
+        logger.warning(f"⚠️ Could not delete image features for report {report_id}: {e}")
+
+
+def delete_reports(report_refs) -> int:
+    """
+    Delete report documents together with their feature records (batched,
+    two deletes per report). Every path that deletes reports goes through
+    here so no orphaned reports/{id}/features documents are left behind.
+    Returns the number of reports deleted.
+    """
+    from services.firebase_service import get_firestore_client
+
+    db = get_firestore_client()
+    batch = db.batch()
+    count = 0
+    for ref in report_refs:
+        batch.delete(ref)
+        batch.delete(report_features_ref(ref))
+        count += 1
+        # Firestore batch limit is 500 writes
+        if count % 250 == 0:
+            batch.commit()
+            batch = db.batch()
+    batch.commit()
+    return count
+
+
+# Feature records of photos analysed by /verify-image, so a report created
+# from the uploaded URL right after reuses them instead of running YOLO again.
+# Per process: a report that lands on another worker recomputes its features.
+_recent_features = OrderedDict()  # phash -> (expires_at, features)
+_recent_lock = threading.Lock()
+
+
+def remember_verified_features(features: dict):
+    """Keep a verified photo's feature record for RECENT_FEATURES_TTL_SECONDS"""
+    with _recent_lock:
+        _recent_features[features["phash"]] = (time.monotonic() + RECENT_FEATURES_TTL_SECONDS, features)
+        _recent_features.move_to_end(features["phash"])
+        while len(_recent_features) > RECENT_FEATURES_MAX:
+            _recent_features.popitem(last=False)
+
+
+def recall_verified_features(image_hash: str):
+    """Feature record of a recently verified photo within RECENT_FEATURES_MAX_DISTANCE of `image_hash`, or None"""
+    from services.phash_index import hamming_distance
+
+    value = int(image_hash, 16)
+    now = time.monotonic()
+    best = None
+    with _recent_lock:
+        for key, (expires_at, features) in list(_recent_features.items()):
+            if expires_at <= now:
+                del _recent_features[key]
+                continue
+            distance = hamming_distance(value, int(key, 16))
+            if distance <= RECENT_FEATURES_MAX_DISTANCE and (best is None or distance < best[0]):
+                best = (distance, features)
+    return best[1] if best else None
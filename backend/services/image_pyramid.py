@@ -0,0 +1,87 @@
+"""
+Shared, lazily built downscaled views of one decoded image.
+
+Verification and feature extraction used to run their heuristics on the
+full-resolution phone image (often 12 MP). They now share one ImagePyramid
+per image:
+  - rgb()/gray() give area-downscaled levels (ANALYSIS_SIZE long side by
+    default). Each level is built once and smaller levels are derived
+    from the analysis level rather than from the full image.
+  - detail_tiles() gives a fixed grid of full-resolution grayscale tiles for
+    metrics driven by pixel-scale detail (Canny edge density, Laplacian
+    variance), which a downscaled level would smooth away.
+"""
+import cv2
+import numpy as np
+
+ANALYSIS_SIZE = 512
+DETAIL_GRID = 6     # 6x6 tiles ...
+DETAIL_TILE = 128   # ... of 128px, ~5% of a 12 MP image
+DETAIL_MARGIN = 1   # extra border so 3x3 kernels see real neighbours at tile edges
+
+
+def to_gray(image_array: np.ndarray) -> np.ndarray:
+    """Grayscale view of an RGB/RGBA/L image array"""
+    if image_array.ndim == 2:
+        return image_array
+    if image_array.shape[2] == 4:
+        return cv2.cvtColor(image_array, cv2.COLOR_RGBA2GRAY)
+    return cv2.cvtColor(image_array, cv2.COLOR_RGB2GRAY)
+
+
+class ImagePyramid:
+    def __init__(self, image_array: np.ndarray):
+        self.base = image_array
+        self.height, self.width = image_array.shape[:2]
+        self.long_side = max(self.height, self.width)
+        self.cache = {}  # per-image results computed from the levels (e.g. clutter metrics)
+        self._rgb = {}
+        self._gray = {}
+        self._tiles = None
+
+    def _size_for(self, long_side: int) -> tuple:
+        scale = long_side / self.long_side
+        return max(1, int(round(self.width * scale))), max(1, int(round(self.height * scale)))
+
+    def rgb(self, long_side: int = ANALYSIS_SIZE) -> np.ndarray:
+        """Image downscaled (INTER_AREA) so its long side is at most `long_side`"""
+        if long_side >= self.long_side:
+            return self.base
+        level = self._rgb.get(long_side)
+        if level is None:
+            source = self.rgb(ANALYSIS_SIZE) if long_side < ANALYSIS_SIZE else self.base
+            level = cv2.resize(source, self._size_for(long_side), interpolation=cv2.INTER_AREA)
+            self._rgb[long_side] = level
+        return level
+
+    def gray(self, long_side: int = ANALYSIS_SIZE) -> np.ndarray:
+        """Grayscale of rgb(long_side)"""
+        level = self._gray.get(long_side)
+        if level is None:
+            level = to_gray(self.rgb(long_side))
+            self._gray[long_side] = level
+        return level
+
+    def detail_tiles(self) -> tuple:
+        """
+        (tiles, margin): full-resolution grayscale tiles on a fixed grid, each with
+        `margin` extra pixels on every side. Small images are returned whole (margin 0).
+        """
+        if self._tiles is None:
+            if self.height * self.width <= 4 * (DETAIL_GRID * DETAIL_TILE) ** 2:
+                self._tiles = ([self.gray(self.long_side)], 0)
+            else:
+                tiles = []
+                half = DETAIL_TILE // 2 + DETAIL_MARGIN
+                for i in range(DETAIL_GRID):
+                    cy = min(max(int((i + 0.5) * self.height / DETAIL_GRID), half), self.height - half)
+                    for j in range(DETAIL_GRID):
+                        cx = min(max(int((j + 0.5) * self.width / DETAIL_GRID), half), self.width - half)
+                        tiles.append(to_gray(self.base[cy - half:cy + half, cx - half:cx + half]))
+                self._tiles = (tiles, DETAIL_MARGIN)
+        return self._tiles
+
+
+def as_pyramid(image) -> ImagePyramid:
+    """Wrap a decoded image array in an ImagePyramid (pyramids pass through unchanged)"""
+    return image if isinstance(image, ImagePyramid) else ImagePyramid(image)
@@ -1,29 +1,47 @@
 # Image verification with basic CV (no heavy ML models)
+import asyncio
 import base64
 import io
 import logging
-import os
+import threading
 from typing import List, Tuple
 
 import cv2
 import numpy as np
-import onnxruntime as ort
 from PIL import Image
 
+from services.image_features import (
+    clutter_metrics,
+    decode_thumbnail,
+    edge_density,
+    extract_image_features,
+    make_thumbnail,
+    perceptual_hash,
+)
+from services.image_pyramid import ImagePyramid, as_pyramid
+from services.metrics import HEURISTIC_FALLBACKS, IMAGE_STAGE_SECONDS
+from services.model_manager import YOLO_INPUT_SIZE, get_model_manager
+
 logger = logging.getLogger(__name__)
 
-# Lightweight YOLOv8n ONNX config (keeps footprint small for Railway)
-YOLO_MODEL_URL = "https://github.com/ultralytics/assets/releases/download/v0.0.0/yolov8n.onnx"
-YOLO_MODEL_PATH = os.getenv(
-    "YOLO_ONNX_PATH",
-    os.path.join(os.path.dirname(__file__), "models", "yolov8n.onnx"),
-)
-YOLO_INPUT_SIZE = 640
+# Lightweight YOLOv8n ONNX config (keeps footprint small for Railway);
+# the session itself is owned by services.model_manager
 YOLO_CONF_THRESHOLD = 0.35
 YOLO_IOU_THRESHOLD = 0.45
 
-_ort_session = None
+# Clutter heuristic thresholds (see clutter_metrics). Edge density and Laplacian
+# variance are measured on full-resolution tiles, so they keep their original
+# full-image values; color variance is measured on the 512px analysis level,
+# where area downscaling lowers it slightly. Recalibrate with
+# benchmarks/calibrate_analysis_resolution.py.
+EDGE_DENSITY_THRESHOLD = 0.14
+COLOR_VARIANCE_THRESHOLD = 2800
+LAPLACIAN_THRESHOLD = 135
 
+# Cleaning verification: minimum before/after pixel difference (%) and the
+# after/before edge-density ratio below which clutter counts as removed
+CLEANING_MIN_DIFFERENCE = 30
+CLEANING_EDGE_RATIO = 0.7
 
 # COCO class ID to waste type mapping
 COCO_CLASS_NAMES = [
@@ -101,134 +119,113 @@ def _classify_waste_type(detections: List[dict]) -> str:
     return "plastic"
 
 
-def _ensure_model_downloaded():
-    """Download YOLO ONNX weights once if missing."""
-    os.makedirs(os.path.dirname(YOLO_MODEL_PATH), exist_ok=True)
-    if os.path.exists(YOLO_MODEL_PATH):
-        return
-
-    import requests
-
-    logger.info(f"⬇️ Downloading YOLOv8n ONNX to {YOLO_MODEL_PATH} ...")
-    resp = requests.get(YOLO_MODEL_URL, stream=True, timeout=20)
-    resp.raise_for_status()
-    with open(YOLO_MODEL_PATH, "wb") as f:
-        for chunk in resp.iter_content(chunk_size=8192):
-            if chunk:
-                f.write(chunk)
-    logger.info("✅ YOLOv8n ONNX download complete")
-
-
-def _load_ort_session():
-    """Lazy-load ONNX Runtime session with conservative threading."""
-    global _ort_session
-    if _ort_session is not None:
-        return _ort_session
+_buffers = threading.local()
 
-    _ensure_model_downloaded()
 
-    sess_opts = ort.SessionOptions()
-    sess_opts.intra_op_num_threads = 1
-    sess_opts.inter_op_num_threads = 1
-    providers = ["CPUExecutionProvider"]
-
-    logger.info("⚙️ Loading YOLOv8n ONNX session (CPU)...")
-    _ort_session = ort.InferenceSession(YOLO_MODEL_PATH, sess_options=sess_opts, providers=providers)
-    logger.info("✅ YOLOv8n ONNX session ready")
-    return _ort_session
-
-
-def _letterbox(image: np.ndarray, size: int = YOLO_INPUT_SIZE) -> Tuple[np.ndarray, float, Tuple[int, int]]:
-    """Resize with unchanged aspect ratio using padding (YOLO-style)."""
+def _input_buffers(size: int = YOLO_INPUT_SIZE):
+    """
+    Per-thread reusable buffers: letterbox canvas (HWC uint8), its three
+    channel planes, and the model input tensor (1x3xHxW float32).
+    """
+    bufs = getattr(_buffers, "bufs", None)
+    if bufs is None or bufs[0].shape[0] != size:
+        bufs = (
+            np.empty((size, size, 3), dtype=np.uint8),
+            [np.empty((size, size), dtype=np.uint8) for _ in range(3)],
+            np.empty((1, 3, size, size), dtype=np.float32),
+        )
+        _buffers.bufs = bufs
+    return bufs
+
+
+def _letterbox_into(image: np.ndarray, canvas: np.ndarray) -> Tuple[float, Tuple[int, int]]:
+    """Resize with unchanged aspect ratio into a square canvas, padding in place (YOLO-style)."""
+    size = canvas.shape[0]
     h, w = image.shape[:2]
     scale = size / max(h, w)
-    new_w, new_h = int(round(w * scale)), int(round(h * scale))
-    resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
-    pad_w, pad_h = size - new_w, size - new_h
-    top, bottom = pad_h // 2, pad_h - pad_h // 2
-    left, right = pad_w // 2, pad_w - pad_w // 2
-    padded = cv2.copyMakeBorder(resized, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114))
-    return padded, scale, (left, top)
-
-
-def _nms(boxes: np.ndarray, scores: np.ndarray, iou_thr: float) -> List[int]:
-    """Simple NMS for single-class boxes."""
-    idxs = scores.argsort()[::-1]
-    keep = []
-    while idxs.size > 0:
-        i = idxs[0]
-        keep.append(i)
-        if idxs.size == 1:
-            break
-        ious = _iou(boxes[i], boxes[idxs[1:]])
-        idxs = idxs[1:][ious < iou_thr]
-    return keep
-
-
-def _iou(box: np.ndarray, boxes: np.ndarray) -> np.ndarray:
-    """Compute IoU between one box and many boxes."""
-    x1 = np.maximum(box[0], boxes[:, 0])
-    y1 = np.maximum(box[1], boxes[:, 1])
-    x2 = np.minimum(box[2], boxes[:, 2])
-    y2 = np.minimum(box[3], boxes[:, 3])
-    inter = np.maximum(0, x2 - x1) * np.maximum(0, y2 - y1)
-    area1 = (box[2] - box[0]) * (box[3] - box[1])
-    area2 = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
-    union = area1 + area2 - inter + 1e-6
-    return inter / union
-
-
-def _run_yolo(image_array: np.ndarray):
-    """Run YOLOv8n ONNX and return detections (boxes, scores, class ids)."""
-    session = _load_ort_session()
-
-    # Ensure RGB uint8
-    if image_array.dtype != np.uint8:
-        image_array = image_array.astype(np.uint8)
-    if image_array.shape[2] == 4:
-        image_array = cv2.cvtColor(image_array, cv2.COLOR_RGBA2RGB)
-
-    img, scale, (pad_x, pad_y) = _letterbox(image_array, YOLO_INPUT_SIZE)
-    img = img.astype(np.float32) / 255.0
-    img = np.transpose(img, (2, 0, 1))  # HWC -> CHW
-    img = np.expand_dims(img, axis=0)   # BCHW
-
-    outputs = session.run(None, {session.get_inputs()[0].name: img})
-    preds = outputs[0]
-    # YOLOv8 ONNX: (1, 84, N)
-    preds = np.squeeze(preds, axis=0)  # (84, N)
-    boxes = preds[:4, :]
-    scores = preds[4:, :]
-
-    class_scores = scores.max(axis=0)
-    class_ids = scores.argmax(axis=0)
-
-    mask = class_scores >= YOLO_CONF_THRESHOLD
+    new_w, new_h = min(size, int(round(w * scale))), min(size, int(round(h * scale)))
+    left, top = (size - new_w) // 2, (size - new_h) // 2
+
+    # Only the borders are painted; the resized image lands directly in the canvas ROI
+    canvas[:top] = 114
+    canvas[top + new_h:] = 114
+    canvas[top:top + new_h, :left] = 114
+    canvas[top:top + new_h, left + new_w:] = 114
+    cv2.resize(image, (new_w, new_h), dst=canvas[top:top + new_h, left:left + new_w], interpolation=cv2.INTER_LINEAR)
+    return scale, (left, top)
+
+
+def _preprocess(image_array: np.ndarray) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+    """Letterbox + normalize an RGB image into the reused model input tensor."""
+    canvas, planes, tensor = _input_buffers()
+    scale, pad = _letterbox_into(image_array, canvas)
+    # HWC -> CHW via contiguous channel planes, then 0-255 -> 0-1 scaling straight into the tensor
+    cv2.split(canvas, planes)
+    for channel, plane in enumerate(planes):
+        np.multiply(plane, np.float32(1.0 / 255.0), out=tensor[0, channel], dtype=np.float32)
+    return tensor, scale, pad
+
+
+def _postprocess(preds: np.ndarray, scale: float, pad: Tuple[int, int]) -> List[dict]:
+    """Decode YOLOv8 output (84, N) into detections with class-aware NMS."""
+    pad_x, pad_y = pad
+    scores = preds[4:]
+    # Column-wise max is a streaming reduction; argmax is only taken for the survivors
+    mask = scores.max(axis=0) >= YOLO_CONF_THRESHOLD
     if not np.any(mask):
         return []
 
-    boxes = boxes[:, mask]
-    class_scores = class_scores[mask]
-    class_ids = class_ids[mask]
-
-    # xywh -> xyxy
-    x, y, w, h = boxes
-    x1 = (x - w / 2 - pad_x) / scale
-    y1 = (y - h / 2 - pad_y) / scale
-    x2 = (x + w / 2 - pad_x) / scale
-    y2 = (y + h / 2 - pad_y) / scale
-    boxes_xyxy = np.stack([x1, y1, x2, y2], axis=1)
-
-    keep = _nms(boxes_xyxy, class_scores, YOLO_IOU_THRESHOLD)
+    candidates = scores[:, mask]
+    class_ids = candidates.argmax(axis=0)
+    class_scores = candidates[class_ids, np.arange(class_ids.size)]
+    cx, cy, w, h = preds[:4, mask]
+
+    # xywh (letterboxed, centre) -> xywh (original image, top-left)
+    boxes_xywh = np.empty((cx.size, 4), dtype=np.float64)
+    boxes_xywh[:, 0] = (cx - w / 2 - pad_x) / scale
+    boxes_xywh[:, 1] = (cy - h / 2 - pad_y) / scale
+    boxes_xywh[:, 2] = w / scale
+    boxes_xywh[:, 3] = h / scale
+
+    keep = cv2.dnn.NMSBoxesBatched(
+        boxes_xywh, class_scores.astype(np.float32), class_ids.astype(np.int32),
+        YOLO_CONF_THRESHOLD, YOLO_IOU_THRESHOLD,
+    )
+    keep = np.asarray(keep, dtype=np.int64).reshape(-1)
+    keep = keep[np.argsort(-class_scores[keep], kind="stable")]
+
+    boxes_xyxy = boxes_xywh[keep].copy()
+    boxes_xyxy[:, 2:] += boxes_xyxy[:, :2]
     return [
         {
-            "box": boxes_xyxy[i].tolist(),
-            "score": float(class_scores[i]),
-            "class_id": int(class_ids[i]),
+            "box": box,
+            "score": float(score),
+            "class_id": int(class_id),
         }
-        for i in keep
+        for box, score, class_id in zip(boxes_xyxy.tolist(), class_scores[keep], class_ids[keep])
     ]
 
+
+def _run_yolo(image_array: np.ndarray):
+    """Run YOLOv8n ONNX and return detections (boxes, scores, class ids)."""
+    session = get_model_manager().get_session()
+
+    with IMAGE_STAGE_SECONDS.time(stage="preprocess"):
+        # Ensure RGB uint8
+        if image_array.dtype != np.uint8:
+            image_array = image_array.astype(np.uint8)
+        if image_array.ndim == 2:
+            image_array = cv2.cvtColor(image_array, cv2.COLOR_GRAY2RGB)
+        elif image_array.shape[2] == 4:
+            image_array = cv2.cvtColor(image_array, cv2.COLOR_RGBA2RGB)
+        tensor, scale, pad = _preprocess(image_array)
+
+    with IMAGE_STAGE_SECONDS.time(stage="inference"):
+        outputs = session.run(None, {session.get_inputs()[0].name: tensor})
+    # YOLOv8 ONNX: (1, 84, N)
+    with IMAGE_STAGE_SECONDS.time(stage="nms"):
+        return _postprocess(outputs[0][0], scale, pad)
+
 def decode_base64_image(image_base64: str):
     """Safely decode base64 image string with proper padding"""
     try:
@@ -243,39 +240,42 @@ def decode_base64_image(image_base64: str):
         
         # Decode base64
         image_data = base64.b64decode(image_base64)
-        image = Image.open(io.BytesIO(image_data))
-        return np.array(image)
+        return decode_image_bytes(image_data)
     except Exception as e:
         logger.error(f"❌ Base64 decode error: {str(e)}")
         raise ValueError(f"Failed to decode image: {str(e)}")
 
+def decode_image_bytes(image_data: bytes):
+    """Decode encoded image bytes (JPEG/PNG/...) into a numpy array"""
+    with IMAGE_STAGE_SECONDS.time(stage="decode"):
+        image = Image.open(io.BytesIO(image_data))
+        return np.array(image)
+
+def _heuristic_metrics(image) -> Tuple[float, float, float]:
+    """Clutter metrics: (edge density, color variance, Laplacian variance), see clutter_metrics"""
+    return clutter_metrics(image)
+
+def _heuristic_score(edge_density: float, color_variance: float, laplacian_var: float) -> int:
+    """Number of clutter indicators (0-3) above their thresholds"""
+    # Balanced heuristic: require at least 2 strong indicators for garbage
+    score = 0
+    if edge_density > EDGE_DENSITY_THRESHOLD:  # Balanced threshold
+        score += 1
+    if color_variance > COLOR_VARIANCE_THRESHOLD:  # Balanced threshold
+        score += 1
+    if laplacian_var > LAPLACIAN_THRESHOLD:  # Balanced threshold
+        score += 1
+    return score
+
 def basic_garbage_detection(image_array):
-    """Fallback garbage detection using basic CV techniques"""
+    """Fallback garbage detection using basic CV techniques (accepts an array or ImagePyramid)"""
     try:
-        # Convert to grayscale
-        gray = cv2.cvtColor(image_array, cv2.COLOR_RGB2GRAY)
-        
-        # Check for clutter/mess indicators
-        # 1. High edge density (messy areas have more edges)
-        edges = cv2.Canny(gray, 50, 150)
-        edge_density = np.sum(edges > 0) / edges.size
-        
-        # 2. Color variance (garbage often has varied colors)
-        color_variance = np.var(image_array)
+        edge_density, color_variance, laplacian_var = _heuristic_metrics(image_array)
         
-        # 3. Texture complexity
-        laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
+        logger.debug("🔍 Image metrics - Edge density: %.4f, Color variance: %.2f, Laplacian: %.2f",
+                     edge_density, color_variance, laplacian_var)
         
-        logger.info(f"🔍 Image metrics - Edge density: {edge_density:.4f}, Color variance: {color_variance:.2f}, Laplacian: {laplacian_var:.2f}")
-        
-        # Balanced heuristic: require at least 2 strong indicators for garbage
-        score = 0
-        if edge_density > 0.14:  # Balanced threshold
-            score += 1
-        if color_variance > 2800:  # Balanced threshold
-            score += 1
-        if laplacian_var > 135:  # Balanced threshold
-            score += 1
+        score = _heuristic_score(edge_density, color_variance, laplacian_var)
         
         # Calculate confidence based on indicators
         confidence = min(0.85, score / 3.0 + 0.3)
@@ -283,32 +283,123 @@ def basic_garbage_detection(image_array):
         # Require at least 2 out of 3 indicators (stricter than just confidence-based)
         is_garbage = score >= 2
         
-        logger.info(f"{'✅' if is_garbage else '❌'} Garbage detection: score={score}/3, is_garbage={is_garbage}, confidence={confidence:.2f}")
+        logger.debug("%s Garbage detection: score=%d/3, is_garbage=%s, confidence=%.2f",
+                     '✅' if is_garbage else '❌', score, is_garbage, confidence)
         
         return is_garbage, confidence
     except Exception as e:
         logger.error(f"❌ Detection error: {str(e)}")
         return False, 0.0  # Changed from True to False - reject by default on error
 
-async def verify_garbage_image(image_base64: str) -> dict:
+def _base64_payload_size(image_base64: str) -> int:
+    """Approximate decoded size in bytes of a base64 (or data URL) image"""
+    payload = image_base64.split(',', 1)[1] if ',' in image_base64 else image_base64
+    return len(payload) * 3 // 4
+
+def _cascade_reject(tier: int, outcome: str, message: str, **extra) -> dict:
+    from services.verification_stats import record_exit
+    record_exit(tier, outcome)
+    logger.debug("⛔ Verification cascade exit at tier %s: %s", tier, outcome)
+    return {
+        'is_garbage': False,
+        'confidence': float(0),
+        'detected_items': [],
+        'message': message,
+        'tier': tier,
+        **extra
+    }
+
+async def verify_garbage_image(image_base64: str, with_features: bool = False) -> dict:
+    """Verify if image contains garbage/waste (see verify_garbage_image_sync)"""
+    return verify_garbage_image_sync(image_base64, with_features)
+
+def verify_garbage_image_sync(image, with_features: bool = False) -> dict:
     """
-    Verify if image contains garbage/waste using basic CV detection
-    (YOLOv8 removed to reduce image size for Railway deployment)
+    Verify if image contains garbage/waste as a tiered cascade; each tier
+    exits early when it is conclusive so YOLO only runs when needed:
+      Tier 0  cheap rejections: payload size, decode failure, dark/blank
+              frame, near-duplicate of an active report's photo
+      Tier 1  clutter heuristic on the downscaled analysis pyramid
+      Tier 2  YOLOv8n, falling back to the full-resolution heuristic
+    Thresholds come from Settings (VERIFY_*); exits are counted per tier.
+    With `with_features`, the result also carries the precomputed feature
+    record ('features') for storing alongside the report.
+    `image` is base64 (or a data URL) or the raw encoded bytes. Blocking:
+    batch callers run it in worker threads.
     """
+    from config import get_settings
+    from services.verification_stats import record_exit
+    settings = get_settings()
     try:
+        raw = isinstance(image, (bytes, bytearray))
         # Reject obvious URL inputs that cannot be decoded
-        if image_base64.startswith("http"):
+        if not raw and image.startswith("http"):
             raise ValueError("Expected base64 image data, received a URL instead")
 
-        image_array = decode_base64_image(image_base64)
-        
-        # First try YOLOv8n ONNX; fall back to heuristic if it fails or finds nothing
+        # Tier 0: cheap checks
+        payload_bytes = len(image) if raw else _base64_payload_size(image)
+        if payload_bytes > settings.verify_max_image_mb * 1024 * 1024:
+            return _cascade_reject(0, "too_large", f"Image is too large (max {settings.verify_max_image_mb:g} MB)")
+        if payload_bytes < settings.verify_min_image_kb * 1024:
+            return _cascade_reject(0, "too_small", "Image is too small. Please take a clearer photo of waste area.")
         try:
-            detections = _run_yolo(image_array)
+            image_array = decode_image_bytes(bytes(image)) if raw else decode_base64_image(image)
+        except (ValueError, OSError):
+            return _cascade_reject(0, "decode_error", "Could not read the image. Please take the photo again.")
+
+        # All heuristics below share one set of cached downscaled levels
+        pyramid = ImagePyramid(image_array)
+        thumb_gray = pyramid.gray(settings.verify_thumbnail_size)
+        if thumb_gray.mean() < settings.verify_dark_mean_max or thumb_gray.std() < settings.verify_blank_std_max:
+            return _cascade_reject(0, "dark_or_blank", "Photo is too dark or blank. Please take a clearer photo of waste area.")
+
+        # Perceptual-hash lookup: a re-submitted photo never reaches YOLO
+        image_hash = perceptual_hash(pyramid.gray())
+        from services.phash_index import find_duplicate_photo
+        duplicate = find_duplicate_photo(image_hash)
+        if duplicate:
+            duplicate_id, distance = duplicate
+            logger.warning(f"⚠️ Photo matches active report {duplicate_id} (pHash distance {distance})")
+            return _cascade_reject(
+                0, "duplicate", 'This photo has already been reported',
+                is_duplicate=True, duplicate_of=duplicate_id
+            )
+
+        # Tier 1: clutter heuristic at analysis resolution (cached for the tier 2 fallback)
+        thumb_score = _heuristic_score(*_heuristic_metrics(pyramid))
+        if thumb_score <= settings.verify_tier1_reject_max_score:
+            return _cascade_reject(1, "no_clutter", 'No garbage detected. Please take a clearer photo of waste area.')
+        
+        detections = []
+        yolo_ok = False
+        if thumb_score >= settings.verify_tier1_accept_min_score:
+            record_exit(1, "clutter")
+            confidence = min(0.85, thumb_score / 3.0 + 0.3)
+            result = {
+                'is_garbage': True,
+                'confidence': float(confidence),
+                'wasteType': 'plastic',  # heuristic defaults to plastic (most common waste)
+                'detected_items': [{'item': 'waste area', 'confidence': float(confidence)}],
+                'message': 'Waste area detected (heuristic)',
+                'tier': 1
+            }
+        else:
+            # Tier 2: YOLOv8n ONNX; fall back to full-resolution heuristic if it fails or finds nothing
+            try:
+                detections = _run_yolo(image_array)
+                yolo_ok = True
+                if not detections:
+                    HEURISTIC_FALLBACKS.inc(path="garbage", reason="no_detections")
+                    logger.debug("⚠️ YOLO found no confident detections; falling back to heuristic")
+            except Exception as yolo_err:
+                HEURISTIC_FALLBACKS.inc(path="garbage", reason="yolo_error")
+                logger.error(f"❌ YOLO inference failed: {yolo_err}; using heuristic fallback")
+
             if detections:
+                record_exit(2, "yolo_detected")
                 top = max(detections, key=lambda d: d['score'])
                 detected_waste_type = _classify_waste_type(detections)
-                return {
+                result = {
                     'is_garbage': True,
                     'confidence': float(top['score']),
                     'wasteType': detected_waste_type,
@@ -320,20 +411,25 @@ async def verify_garbage_image(image_base64: str) -> dict:
                         }
                     ],
                     'message': f'{detected_waste_type.capitalize()} waste detected (YOLOv8n)',
+                    'tier': 2
+                }
+            else:
+                # Use basic CV detection as fallback
+                is_garbage, conf = basic_garbage_detection(pyramid)
+                record_exit(2, "heuristic_accept" if is_garbage else "heuristic_reject")
+                result = {
+                    'is_garbage': bool(is_garbage),
+                    'confidence': float(conf),
+                    'wasteType': 'plastic',  # heuristic defaults to plastic (most common waste)
+                    'detected_items': [{'item': 'waste area', 'confidence': float(conf)}],
+                    'message': 'Waste area detected (heuristic)' if is_garbage else 'No garbage detected. Please take a clearer photo of waste area.',
+                    'tier': 2
                 }
-            logger.info("⚠️ YOLO found no confident detections; falling back to heuristic")
-        except Exception as yolo_err:
-            logger.error(f"❌ YOLO inference failed: {yolo_err}; using heuristic fallback")
 
-        # Use basic CV detection as fallback
-        is_garbage, conf = basic_garbage_detection(image_array)
-        return {
-            'is_garbage': bool(is_garbage),
-            'confidence': float(conf),
-            'wasteType': 'plastic',  # heuristic defaults to plastic (most common waste)
-            'detected_items': [{'item': 'waste area', 'confidence': float(conf)}],
-            'message': 'Waste area detected (heuristic)' if is_garbage else 'No garbage detected. Please take a clearer photo of waste area.'
-        }
+        result['imageHash'] = image_hash
+        if with_features and result['is_garbage']:
+            result['features'] = extract_image_features(pyramid, detections, yolo_ok)
+        return result
     
     except Exception as e:
         logger.error(f"❌ Error verifying garbage image: {str(e)}")
@@ -344,86 +440,114 @@ async def verify_garbage_image(image_base64: str) -> dict:
             'message': f'Error processing image: {str(e)}'
         }
 
+def build_image_features(image) -> dict:
+    """Run YOLO on a decoded image (or ImagePyramid) and build its feature record"""
+    pyramid = as_pyramid(image)
+    detections = []
+    yolo_ok = False
+    try:
+        detections = _run_yolo(pyramid.base)
+        yolo_ok = True
+    except Exception as yolo_err:
+        HEURISTIC_FALLBACKS.inc(path="features", reason="yolo_error")
+        logger.error(f"❌ YOLO inference failed while building features: {yolo_err}")
+    return extract_image_features(pyramid, detections, yolo_ok)
+
+def prepare_uploaded_image(image_url: str) -> dict:
+    """
+    Duplicate check for a report created from an already-uploaded image URL:
+    fetch the photo (warming the local image cache) and hash it.
+    Returns {'imageHash', 'duplicateOf', 'features'}; 'features' is the record
+    /verify-image built for the same photo in this process, if still held
+    (its hash then replaces the one of the re-encoded upload), else None.
+    Blocking.
+    """
+    from services.image_cache import fetch_image_bytes
+    from services.image_features import recall_verified_features
+    from services.phash_index import find_duplicate_photo
+
+    image_hash = perceptual_hash(ImagePyramid(decode_image_bytes(fetch_image_bytes(image_url))).gray())
+    duplicate = find_duplicate_photo(image_hash)
+    features = recall_verified_features(image_hash)
+    return {
+        'imageHash': features['phash'] if features else image_hash,
+        'duplicateOf': duplicate[0] if duplicate else None,
+        'features': features,
+    }
+
+def precompute_report_features(report_id: str, image_url: str):
+    """
+    Background task for reports created from an already-uploaded image URL:
+    fetch the image (warming the local image cache), store its features and
+    register its perceptual hash for duplicate detection.
+    """
+    try:
+        from services.firebase_service import update_document
+        from services.image_cache import fetch_image_bytes
+        from services.image_features import save_report_features
+        from services.phash_index import index_report_photo
+        image_array = decode_image_bytes(fetch_image_bytes(image_url))
+        features = build_image_features(image_array)
+        save_report_features(report_id, features)
+        update_document("reports", report_id, {"imageHash": features["phash"]})
+        index_report_photo(report_id, features["phash"])
+    except Exception as e:
+        logger.warning(f"⚠️ Could not precompute image features for report {report_id}: {e}")
+
 async def verify_cleaning_image(before_image_base64: str, after_image_base64: str) -> dict:
     """
     Compare before and after images to verify cleaning
     """
     try:
-        logger.info("🔍 Verifying cleaning with image comparison...")
+        logger.debug("🔍 Verifying cleaning with image comparison...")
         
         # Decode both images with proper padding
         before_array = decode_base64_image(before_image_base64)
         after_array = decode_base64_image(after_image_base64)
+        return compare_cleaning_images(before_array, after_array)
+    
+    except Exception as e:
+        logger.error(f"❌ Error verifying cleaning: {str(e)}")
+        return {
+            'is_cleaned': False,
+            'similarity': 0,
+            'difference': 0,
+            'message': f'Error processing images: {str(e)}'
+        }
+
+async def verify_cleaning_for_report(report_id: str, report: dict, after_image_base64: str, before_image_base64: str = None) -> dict:
+    """
+    Verify cleaning of a stored report. The before image is taken from the
+    report's precomputed feature record, so only the after image is analysed.
+    Reports without one fall back to loading imageUrl (via the local disk
+    cache) and store the features they compute; clients may still send the
+    before image explicitly.
+    """
+    try:
+        logger.debug("🔍 Verifying cleaning against stored report image...")
+        from services.image_features import load_report_features, save_report_features
         
-        logger.info(f"📸 Before image shape: {before_array.shape}, After image shape: {after_array.shape}")
-        
-        # Resize after_array to match before_array dimensions if needed
-        if before_array.shape != after_array.shape:
-            logger.info(f"📏 Resizing after image from {after_array.shape} to {before_array.shape}")
-            after_image_pil = Image.fromarray(after_array)
-            after_image_pil = after_image_pil.resize((before_array.shape[1], before_array.shape[0]))
-            after_array = np.array(after_image_pil)
-        
-        # Try YOLO before/after detection to validate removal of trash-like objects
-        yolo_before = []
-        yolo_after = []
-        try:
-            yolo_before = _run_yolo(before_array)
-            yolo_after = _run_yolo(after_array)
-            logger.info(f"🧠 YOLO before: {len(yolo_before)} detections, after: {len(yolo_after)} detections")
-        except Exception as yolo_err:
-            logger.error(f"❌ YOLO cleaning verification failed: {yolo_err}; falling back to CV deltas")
-
-        # Calculate image difference
-        before_gray = cv2.cvtColor(before_array, cv2.COLOR_RGB2GRAY) if len(before_array.shape) > 2 else before_array
-        after_gray = cv2.cvtColor(after_array, cv2.COLOR_RGB2GRAY) if len(after_array.shape) > 2 else after_array
-        
-        diff = cv2.absdiff(before_gray, after_gray)
-        
-        # Calculate similarity percentage (lower difference = higher similarity)
-        similarity = 100 - (np.sum(diff) / (diff.shape[0] * diff.shape[1] * 255) * 100)
-        difference_percent = 100 - similarity
-        
-        logger.info(f"📊 Similarity: {similarity:.1f}%, Difference: {difference_percent:.1f}%")
-        
-        # Base heuristic: significant change + edge reduction
-        is_cleaned = difference_percent > 30
-        
-        # Additional check: verify after image has less clutter
-        before_edges = cv2.Canny(before_gray, 50, 150)
-        after_edges = cv2.Canny(after_gray, 50, 150)
-        
-        before_edge_density = np.sum(before_edges > 0) / before_edges.size
-        after_edge_density = np.sum(after_edges > 0) / after_edges.size
+        after_array = decode_base64_image(after_image_base64)
         
-        logger.info(f"🧹 Before edge density: {before_edge_density:.3f}, After edge density: {after_edge_density:.3f}")
+        if before_image_base64 and not before_image_base64.startswith("http"):
+            before_array = decode_base64_image(before_image_base64)
+            return compare_cleaning_images(before_array, after_array)
         
-        clutter_reduced = after_edge_density < before_edge_density * 0.7
-        if clutter_reduced:
-            logger.info("✅ Clutter reduced - area appears cleaned (edge delta)")
-            is_cleaned = True
-
-        # YOLO signal: if before had detections and after has none or sharply lower scores, mark cleaned
-        if yolo_before:
-            before_max = max(d['score'] for d in yolo_before)
-            after_max = max((d['score'] for d in yolo_after), default=0.0)
-            if not yolo_after or after_max < before_max * 0.4:
-                logger.info("✅ YOLO confirms removal (detections dropped)")
-                is_cleaned = True
-            else:
-                logger.info("⚠️ YOLO still sees objects after cleaning attempt")
-
-        message = 'Area successfully cleaned!' if is_cleaned else 'Please ensure the area is properly cleaned.'
-        logger.info(f"Result: is_cleaned={is_cleaned}, message={message}")
+        from services.metrics import CACHE_REQUESTS
+        features = await asyncio.to_thread(load_report_features, report_id)
+        CACHE_REQUESTS.inc(cache="report_features", result="hit" if features else "miss")
+        if features:
+            logger.debug("🧾 Using precomputed before-image features")
+        else:
+            image_url = report.get('imageUrl')
+            if not image_url:
+                raise ValueError("Report has no before image")
+            from services.image_cache import fetch_image_bytes
+            before_bytes = await asyncio.to_thread(fetch_image_bytes, image_url)
+            features = build_image_features(decode_image_bytes(before_bytes))
+            await asyncio.to_thread(save_report_features, report_id, features)
         
-        return {
-            'is_cleaned': is_cleaned,
-            'similarity': float(similarity),
-            'difference': float(difference_percent),
-            'yolo_before_detections': len(yolo_before),
-            'yolo_after_detections': len(yolo_after),
-            'message': message
-        }
+        return compare_with_features(features, after_array)
     
     except Exception as e:
         logger.error(f"❌ Error verifying cleaning: {str(e)}")
@@ -433,3 +557,88 @@ async def verify_cleaning_image(before_image_base64: str, after_image_base64: st
             'difference': 0,
             'message': f'Error processing images: {str(e)}'
         }
+
+def compare_cleaning_images(before_array: np.ndarray, after_array: np.ndarray) -> dict:
+    """Compare decoded before/after images (YOLO + CV deltas) and decide if the area was cleaned"""
+    logger.debug("📸 Before image shape: %s, After image shape: %s", before_array.shape, after_array.shape)
+    return compare_with_features(build_image_features(before_array), after_array)
+
+def cleaning_deltas(before_features: dict, after_image) -> Tuple[float, float, float, float]:
+    """
+    (similarity %, difference %, before edge density, after edge density).
+    The pixel difference is taken on thumbnails; edge densities are the
+    full-resolution tile estimates (clutter_metrics), matching the scale the
+    edge-ratio rule was tuned at. Older feature records without one fall back
+    to thumbnail edge densities.
+    """
+    after_pyramid = as_pyramid(after_image)
+    before_gray = decode_thumbnail(before_features)
+    after_gray = make_thumbnail(after_pyramid.gray(), (before_gray.shape[1], before_gray.shape[0]))
+    
+    diff = cv2.absdiff(before_gray, after_gray)
+    
+    # Calculate similarity percentage (lower difference = higher similarity)
+    similarity = 100 - (np.sum(diff) / (diff.shape[0] * diff.shape[1] * 255) * 100)
+    
+    if before_features.get('detailEdgeDensity') is not None:
+        before_edge_density = before_features['detailEdgeDensity']
+        after_edge_density = clutter_metrics(after_pyramid)[0]
+    else:
+        before_edge_density = before_features['edgeDensity']
+        after_edge_density = edge_density(after_gray)
+    return float(similarity), float(100 - similarity), float(before_edge_density), float(after_edge_density)
+
+def compare_with_features(before_features: dict, after_image) -> dict:
+    """
+    Decide if the area was cleaned from the before image's feature record and
+    the decoded after image (array or ImagePyramid). Pixel and edge deltas are
+    measured on thumbnails (the after image's analysis level is downscaled to
+    the stored before thumbnail's size).
+    """
+    after_pyramid = as_pyramid(after_image)
+    # Try YOLO on the after image; before detections were stored with the features
+    yolo_before = before_features.get('detections') or []
+    yolo_after = []
+    try:
+        yolo_after = _run_yolo(after_pyramid.base)
+        logger.debug("🧠 YOLO before: %d detections, after: %d detections", len(yolo_before), len(yolo_after))
+    except Exception as yolo_err:
+        HEURISTIC_FALLBACKS.inc(path="cleaning", reason="yolo_error")
+        logger.error(f"❌ YOLO cleaning verification failed: {yolo_err}; falling back to CV deltas")
+
+    similarity, difference_percent, before_edge_density, after_edge_density = cleaning_deltas(before_features, after_pyramid)
+    
+    logger.debug("📊 Similarity: %.1f%%, Difference: %.1f%%", similarity, difference_percent)
+    
+    # Base heuristic: significant change + edge reduction
+    is_cleaned = difference_percent > CLEANING_MIN_DIFFERENCE
+    
+    # Additional check: verify after image has less clutter
+    logger.debug("🧹 Before edge density: %.3f, After edge density: %.3f", before_edge_density, after_edge_density)
+    
+    clutter_reduced = after_edge_density < before_edge_density * CLEANING_EDGE_RATIO
+    if clutter_reduced:
+        logger.debug("✅ Clutter reduced - area appears cleaned (edge delta)")
+        is_cleaned = True
+
+    # YOLO signal: if before had detections and after has none or sharply lower scores, mark cleaned
+    if yolo_before:
+        before_max = max(d['score'] for d in yolo_before)
+        after_max = max((d['score'] for d in yolo_after), default=0.0)
+        if not yolo_after or after_max < before_max * 0.4:
+            logger.debug("✅ YOLO confirms removal (detections dropped)")
+            is_cleaned = True
+        else:
+            logger.debug("⚠️ YOLO still sees objects after cleaning attempt")
+
+    message = 'Area successfully cleaned!' if is_cleaned else 'Please ensure the area is properly cleaned.'
+    logger.info(f"🧹 Cleaning verification: is_cleaned={is_cleaned}")
+    
+    return {
+        'is_cleaned': is_cleaned,
+        'similarity': float(similarity),
+        'difference': float(difference_percent),
+        'yolo_before_detections': len(yolo_before),
+        'yolo_after_detections': len(yolo_after),
+        'message': message
+    }
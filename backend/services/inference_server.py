@@ -0,0 +1,309 @@
+"""
+Shared YOLO inference process for the multi-worker deployment (gunicorn.conf.py).
+
+Each API worker loading its own ONNX Runtime session would multiply the model
+weights, arena buffers and OpenCV/ORT runtime by the worker count. In
+multi-worker mode one inference server owns the only session (a regular
+services.model_manager.ModelManager: download, warmup, file watching and hot
+reload work as before) and the workers reach it over a Unix socket.
+
+Workers keep decoding, letterboxing and NMS locally; only the model input
+tensor and the raw output cross the socket. On the worker side
+`RemoteModelManager` stands in for ModelManager and its `get_session()`
+returns a `RemoteSession` with the `get_inputs()` / `run()` subset of
+onnxruntime.InferenceSession, so image_verification is unchanged.
+
+Wire format, both directions, over one persistent connection per worker thread:
+    >II  header length, payload length
+    header  JSON ({"op": ...} / {"ok": true, ...})
+    payload raw bytes (C-contiguous array data)
+
+Run with: python -m services.inference_server --socket /tmp/luit-inference.sock
+
+Env (server):
+    INFERENCE_CONCURRENCY  inferences run in parallel, one ORT thread each (default: CPU count)
+    plus the YOLO_* variables read by services.model_manager
+"""
+import argparse
+import json
+import logging
+import os
+import signal
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_FRAME = struct.Struct(">II")
+CONNECT_TIMEOUT_SECONDS = 5.0
+RUN_TIMEOUT_SECONDS = 30.0
+LOAD_TIMEOUT_SECONDS = 300.0  # first load may include the model download
+
+
+# --- framing ------------------------------------------------------------------
+
+def _recv_exactly(sock, n: int) -> bytearray:
+    buf = bytearray(n)
+    view = memoryview(buf)
+    received = 0
+    while received < n:
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            raise ConnectionError("inference socket closed")
+        received += count
+    return buf
+
+
+def send_frame(sock, header: dict, payloads=()):
+    """Send a header and zero or more buffers (bytes / contiguous arrays) as one frame"""
+    views = [memoryview(p).cast("B") for p in payloads]
+    encoded = json.dumps(header).encode()
+    sock.sendall(_FRAME.pack(len(encoded), sum(v.nbytes for v in views)) + encoded)
+    for view in views:
+        sock.sendall(view)
+
+
+def recv_frame(sock) -> tuple:
+    header_len, payload_len = _FRAME.unpack(_recv_exactly(sock, _FRAME.size))
+    header = json.loads(_recv_exactly(sock, header_len))
+    payload = _recv_exactly(sock, payload_len) if payload_len else bytearray()
+    return header, payload
+
+
+# --- server -------------------------------------------------------------------
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                header, payload = recv_frame(self.request)
+            except (ConnectionError, OSError, struct.error):
+                return
+            try:
+                reply, buffers = self.server.dispatch(header, payload)
+            except Exception as e:
+                reply, buffers = {"ok": False, "error": str(e)}, ()
+            try:
+                send_frame(self.request, reply, buffers)
+            except OSError:
+                return
+
+
+class InferenceServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, concurrency: int):
+        from services.model_manager import ModelManager
+
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, _Handler)
+        os.chmod(socket_path, 0o600)
+        self.socket_path = socket_path
+        self.manager = ModelManager()
+        self.concurrency = concurrency
+        self._slots = threading.BoundedSemaphore(concurrency)
+
+    def status(self) -> dict:
+        return {**self.manager.status(), "pid": os.getpid(), "concurrency": self.concurrency}
+
+    def dispatch(self, header: dict, payload: bytearray) -> tuple:
+        import numpy as np
+
+        op = header.get("op")
+        if op == "run":
+            session = self.manager.get_session()
+            tensor = np.frombuffer(payload, dtype=header["dtype"]).reshape(header["shape"])
+            with self._slots:
+                outputs = session.run(None, {session.get_inputs()[0].name: tensor})
+            outputs = [np.ascontiguousarray(o) for o in outputs]
+            return {"ok": True, "outputs": [{"shape": list(o.shape), "dtype": str(o.dtype)} for o in outputs]}, outputs
+        if op == "status":
+            return {"ok": True, "status": self.status()}, ()
+        if op == "ensure":
+            try:
+                self.manager.get_session()
+            except Exception as e:
+                return {"ok": False, "error": str(e), "status": self.status()}, ()
+            return {"ok": True, "status": self.status()}, ()
+        if op == "load":
+            self.manager.load(header.get("path"))
+            return {"ok": True, "status": self.status()}, ()
+        raise ValueError(f"Unknown op: {op}")
+
+
+def serve(socket_path: str, concurrency: int):
+    from services.model_manager import WATCH_SECONDS
+
+    server = InferenceServer(socket_path, concurrency)
+    logger.info(f"🧠 Inference server listening on {socket_path} (pid {os.getpid()}, concurrency {concurrency})")
+
+    def load_and_watch():
+        try:
+            server.manager.load()
+        except Exception:
+            pass  # logged by the manager; "ensure" retries after RETRY_SECONDS
+        while WATCH_SECONDS > 0:
+            time.sleep(WATCH_SECONDS)
+            try:
+                server.manager.reload_if_changed()
+            except Exception as e:
+                logger.warning(f"⚠️ Model file watch failed: {e}")
+
+    threading.Thread(target=load_and_watch, name="model-loader", daemon=True).start()
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        try:
+            os.unlink(socket_path)
+        except OSError:
+            pass
+
+
+# --- client -------------------------------------------------------------------
+
+class InferenceClient:
+    """One connection per calling thread (verification runs in worker threads)"""
+
+    def __init__(self, socket_path: str):
+        self.socket_path = socket_path
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(CONNECT_TIMEOUT_SECONDS)
+        sock.connect(self.socket_path)
+        return sock
+
+    def call(self, header: dict, payloads=(), timeout: float = RUN_TIMEOUT_SECONDS) -> tuple:
+        """(reply header, payload); reconnects once if the server restarted since the last call"""
+        for attempt in (0, 1):
+            sock = getattr(self._local, "sock", None)
+            fresh = sock is None
+            if fresh:
+                try:
+                    sock = self._local.sock = self._connect()
+                except OSError as e:
+                    raise ConnectionError(f"Inference server unavailable ({self.socket_path}): {e}") from e
+            try:
+                sock.settimeout(timeout)
+                send_frame(sock, header, payloads)
+                reply, payload = recv_frame(sock)
+                break
+            except (OSError, struct.error) as e:
+                sock.close()
+                self._local.sock = None
+                if fresh or attempt:
+                    raise ConnectionError(f"Inference server unavailable ({self.socket_path}): {e}")
+        if not reply.get("ok"):
+            raise RuntimeError(reply.get("error", "inference server error"))
+        return reply, payload
+
+
+class _InputSpec:
+    def __init__(self, name, shape):
+        self.name = name
+        self.shape = shape
+
+
+class RemoteSession:
+    """The InferenceSession subset image_verification uses, backed by the inference server"""
+
+    def __init__(self, client: InferenceClient):
+        from services.model_manager import YOLO_INPUT_SIZE
+
+        self._client = client
+        self._inputs = [_InputSpec("images", [1, 3, YOLO_INPUT_SIZE, YOLO_INPUT_SIZE])]
+
+    def get_inputs(self):
+        return self._inputs
+
+    def run(self, output_names, input_feed: dict):
+        import numpy as np
+
+        tensor = np.ascontiguousarray(next(iter(input_feed.values())))
+        reply, payload = self._client.call(
+            {"op": "run", "shape": list(tensor.shape), "dtype": str(tensor.dtype)}, (tensor,)
+        )
+        outputs, offset = [], 0
+        for spec in reply["outputs"]:
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"]))
+            outputs.append(np.frombuffer(payload, dtype=dtype, count=count, offset=offset).reshape(spec["shape"]))
+            offset += count * dtype.itemsize
+        return outputs
+
+
+class RemoteModelManager:
+    """ModelManager interface for API workers when INFERENCE_SOCKET is set"""
+
+    def __init__(self, socket_path: str):
+        self.socket_path = socket_path
+        self._client = InferenceClient(socket_path)
+        self._session = RemoteSession(self._client)
+
+    @property
+    def path(self) -> str:
+        from services.model_manager import YOLO_MODEL_PATH
+        return self.status().get("path") or YOLO_MODEL_PATH
+
+    @property
+    def ready(self) -> bool:
+        return self.status()["ready"]
+
+    def get_session(self):
+        return self._session
+
+    def load(self, path: str = None) -> dict:
+        """No path: make sure the server has a model (startup). With a path: reload it on the server."""
+        header = {"op": "ensure"} if path is None else {"op": "load", "path": path}
+        reply, _ = self._client.call(header, timeout=LOAD_TIMEOUT_SECONDS)
+        return {**reply["status"], "mode": "remote", "socket": self.socket_path}
+
+    def reload_if_changed(self) -> bool:
+        return False  # the inference server watches the model file
+
+    def status(self) -> dict:
+        try:
+            reply, _ = self._client.call({"op": "status"}, timeout=CONNECT_TIMEOUT_SECONDS)
+            status = reply["status"]
+        except (ConnectionError, RuntimeError) as e:
+            status = {"state": "unavailable", "ready": False, "path": None, "generation": None,
+                      "loadedAt": None, "loadMs": None, "warmupMs": [], "error": str(e)}
+        return {**status, "mode": "remote", "socket": self.socket_path}
+
+
+def wait_for_server(socket_path: str, timeout: float = 30.0) -> bool:
+    """True once the server accepts connections (the model may still be loading)"""
+    deadline = time.monotonic() + timeout
+    client = InferenceClient(socket_path)
+    while time.monotonic() < deadline:
+        try:
+            client.call({"op": "status"}, timeout=CONNECT_TIMEOUT_SECONDS)
+            return True
+        except (ConnectionError, RuntimeError):
+            time.sleep(0.1)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared YOLO inference server for multi-worker deployments")
+    parser.add_argument("--socket", default="/tmp/luit-inference.sock", help="Unix socket path to listen on")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("INFERENCE_CONCURRENCY", "0")) or os.cpu_count() or 1,
+                        help="parallel inferences (default: CPU count)")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))  # unwind so the socket file is removed
+    serve(args.socket, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
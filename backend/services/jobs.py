@@ -0,0 +1,67 @@
+"""
+Periodic maintenance jobs run by services.scheduler.
+
+    stats_reconciliation   rebuild the daily report/cleaning counters from source (cluster)
+    points_reconciliation  rebuild the points ledger and user totals from source (cluster)
+    cache_warming          refresh hot analytics responses before they expire (per process)
+    photo_index_refresh    rebuild the duplicate-photo hash index from Firestore (per process)
+    cloudinary_orphan_sweep  delete uploaded images no report references (cluster)
+
+Schedules come from Settings (SCHEDULER_*, CLOUDINARY_SWEEP_CRON,
+PHOTO_INDEX_REFRESH_SECONDS).
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+CACHE_WARM_INTERVAL_SECONDS = 20
+
+
+def reconcile_daily_stats() -> dict:
+    from services.response_cache import invalidate_analytics
+    from services.stats_service import backfill_daily_stats
+
+    result = backfill_daily_stats(include_today=False)  # today is still taking live increments
+    invalidate_analytics()
+    return result
+
+
+def register_jobs(scheduler, app):
+    from config import get_settings
+    from services.cloudinary_sweep import sweep_orphaned_images
+    from services.phash_index import refresh_photo_index
+    from services.points_service import reconcile_points
+    from services.response_cache import refresh_hot_entries
+    from services.scheduler import CronTrigger, IntervalTrigger
+
+    settings = get_settings()
+    scheduler.add_job(
+        "stats_reconciliation", reconcile_daily_stats,
+        CronTrigger(settings.scheduler_stats_cron, jitter=120),
+        timeout=1800, description="Rebuild daily report/cleaning counters from the collections",
+    )
+    scheduler.add_job(
+        "points_reconciliation", reconcile_points,
+        CronTrigger(settings.scheduler_points_cron, jitter=120),
+        timeout=1800, description="Award missing points, reverse orphaned awards and rebuild user totals",
+    )
+    scheduler.add_job(
+        "cloudinary_orphan_sweep", sweep_orphaned_images,
+        CronTrigger(settings.cloudinary_sweep_cron, jitter=300),
+        timeout=3600, description="Delete uploaded images no report references",
+    )
+
+    async def warm_cache():
+        return await refresh_hot_entries(app, CACHE_WARM_INTERVAL_SECONDS * 1.5)
+
+    scheduler.add_job(
+        "cache_warming", warm_cache,
+        IntervalTrigger(CACHE_WARM_INTERVAL_SECONDS, jitter=5), cluster=False,
+        timeout=120, description="Refresh recently requested analytics responses before they expire",
+    )
+    if settings.photo_index_refresh_seconds > 0:
+        scheduler.add_job(
+            "photo_index_refresh", refresh_photo_index,
+            IntervalTrigger(settings.photo_index_refresh_seconds, jitter=30), cluster=False,
+            timeout=300, description="Reload the duplicate-photo index with reports written by other workers",
+        )
@@ -0,0 +1,108 @@
+"""
+Leaderboards over the running points totals.
+
+Each category reads one total on the user documents maintained by
+services.points_service (reporting: reportingPoints, cleaning: cleaningPoints,
+overall: points), so a leaderboard is one indexed query returning `limit`
+documents (composite indexes in firestore.indexes.json). A user's rank is a
+count aggregation over the users ahead of them, and their neighbours are two
+short range queries around their total (leaderboard_position).
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+CATEGORY_FIELDS = {
+    "reporting": "reportingPoints",
+    "cleaning": "cleaningPoints",
+    "overall": "points",
+}
+DEFAULT_NAMES = {"individual": "Anonymous", "ngo": "Anonymous NGO"}
+
+
+def _ranked_users(user_type: str, field: str, op: str, points, direction: str, limit: int):
+    """Query over `users` of one type whose `field` total compares `op` points, ordered by the total"""
+    from google.cloud.firestore import FieldFilter
+    from services.firebase_service import get_firestore_client
+
+    return (
+        get_firestore_client().collection("users")
+        .where(filter=FieldFilter("userType", "==", user_type))
+        .where(filter=FieldFilter(field, op, points))
+        .order_by(field, direction=direction)
+        .limit(limit)
+        .select(["name", "ngoName", field])
+    )
+
+
+def _entries(docs, user_type: str, field: str) -> list:
+    default_name = DEFAULT_NAMES.get(user_type, "Anonymous")
+    leaderboard = []
+    for doc in docs:
+        data = doc.to_dict() or {}
+        leaderboard.append({
+            "id": doc.id,
+            "name": data.get("ngoName") or data.get("name") or default_name,
+            "points": data.get(field, 0),
+            "city": "",
+        })
+    return leaderboard
+
+
+def get_leaderboard(user_type: str, category: str, limit: int) -> list:
+    """Top `limit` users of `user_type` by the category's points total"""
+    from google.cloud.firestore import Query
+
+    field = CATEGORY_FIELDS.get(category)
+    if field is None or limit <= 0:
+        return []
+    query = _ranked_users(user_type, field, ">", 0, Query.DESCENDING, limit)
+    return _entries(query.stream(), user_type, field)
+
+
+def _count_ahead(user_type: str, field: str, points) -> int:
+    from google.cloud.firestore import FieldFilter
+    from services.firebase_service import get_firestore_client
+
+    query = (
+        get_firestore_client().collection("users")
+        .where(filter=FieldFilter("userType", "==", user_type))
+        .where(filter=FieldFilter(field, ">", points))
+    )
+    return query.count(alias="ahead").get()[0][0].value
+
+
+async def leaderboard_position(user_id: str, user_type: str, category: str, points: int, span: int = 2) -> dict:
+    """
+    Rank of a user with `points` (1 + the number of users ahead; None without
+    points) and up to `span` leaderboard entries either side of them. The rank
+    count and both neighbour queries run concurrently; each neighbour is then
+    ranked the same way from its own total (one count per distinct total), so
+    users tied on points share a rank however many of them there are.
+    """
+    import asyncio
+    from google.cloud.firestore import Query
+
+    field = CATEGORY_FIELDS.get(category)
+    if field is None or not points or points <= 0:
+        return {"rank": None, "above": [], "below": []}
+
+    def neighbours(op, direction, limit):
+        return _entries(_ranked_users(user_type, field, op, points, direction, limit).stream(), user_type, field)
+
+    ahead, above, below = await asyncio.gather(
+        asyncio.to_thread(_count_ahead, user_type, field, points),
+        asyncio.to_thread(neighbours, ">", Query.ASCENDING, span),
+        asyncio.to_thread(neighbours, "<=", Query.DESCENDING, span + 1),
+    )
+    rank = ahead + 1
+    below = [entry for entry in below if entry["id"] != user_id and entry["points"] > 0][:span]
+    above.reverse()
+
+    totals = sorted({entry["points"] for entry in above + below} - {points})
+    counts = await asyncio.gather(*(asyncio.to_thread(_count_ahead, user_type, field, total) for total in totals))
+    ranks = {total: count + 1 for total, count in zip(totals, counts)}
+    ranks[points] = rank
+    for entry in above + below:
+        entry["rank"] = ranks[entry["points"]]
+    return {"rank": rank, "above": above, "below": below}
@@ -0,0 +1,206 @@
+"""
+Disk-backed stand-in for the Cloudinary SDK (CLOUDINARY_BACKEND=local).
+
+`LocalCloudinary` exposes the parts of the `cloudinary` module the backend
+calls - `uploader.upload`, `uploader.destroy`, `api.resources`,
+`api.delete_resources` and `CloudinaryResource(public_id).build_url()` - with
+the same result shapes.
+Images are stored under LOCAL_MEDIA_DIR and served by `router` at
+Cloudinary-style URLs:
+
+    {LOCAL_MEDIA_BASE_URL}/local-media/image/upload/v{version}/{public_id}.{format}
+
+Each upload/destroy sleeps for CLOUDINARY_FAKE_LATENCY_MS (+/- the
+FAKE_LATENCY_JITTER fraction) to stand in for the network round trip.
+"""
+import mimetypes
+import os
+import random
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+
+ROUTE_PREFIX = "/local-media"
+
+
+class _Uploader:
+    def __init__(self, media):
+        self._media = media
+
+    def upload(self, file, folder: str = None, public_id: str = None, resource_type: str = "image", **options):
+        return self._media.upload(file, folder=folder, public_id=public_id, resource_type=resource_type)
+
+    def destroy(self, public_id: str, **options):
+        return self._media.destroy(public_id)
+
+
+class _AdminApi:
+    def __init__(self, media):
+        self._media = media
+
+    def resources(self, prefix: str = "", max_results: int = 10, next_cursor: str = None, **options):
+        return self._media.list_resources(prefix, max_results, next_cursor)
+
+    def delete_resources(self, public_ids, **options):
+        deleted = {}
+        for public_id in public_ids:
+            deleted[public_id] = "deleted" if self._media.destroy(public_id)["result"] == "ok" else "not_found"
+        return {"deleted": deleted}
+
+
+class _Resource:
+    def __init__(self, media, public_id: str):
+        self._media = media
+        self.public_id = public_id
+
+    def build_url(self, **options):
+        # Transformations (resize, f_auto/q_auto) are not applied: the stored file is served
+        return self._media.url_for(self.public_id)
+
+
+class LocalCloudinary:
+    def __init__(self, root: str, base_url: str, latency_ms: float = 0.0, jitter: float = 0.0):
+        self.root = root
+        self.base_url = base_url.rstrip("/")
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.uploader = _Uploader(self)
+        self.api = _AdminApi(self)
+        self._lock = threading.Lock()
+        self._versions = {}  # public_id -> version of the stored file
+        self._formats = {}   # public_id -> format (file extension of the upload)
+        os.makedirs(root, exist_ok=True)
+
+    def CloudinaryResource(self, public_id: str, **options):
+        return _Resource(self, public_id)
+
+    def _delay(self):
+        if self.latency_ms > 0:
+            spread = self.latency_ms * self.jitter
+            time.sleep(max(0.0, self.latency_ms + random.uniform(-spread, spread)) / 1000.0)
+
+    def _path(self, public_id: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, public_id))
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            raise ValueError(f"Invalid public_id: {public_id}")
+        return path
+
+    def url_for(self, public_id: str) -> str:
+        version = self._versions.get(public_id, 1)
+        image_format = self._formats.get(public_id, "jpg")
+        return f"{self.base_url}{ROUTE_PREFIX}/image/upload/v{version}/{public_id}.{image_format}"
+
+    def upload(self, file, folder: str = None, public_id: str = None, resource_type: str = "image") -> dict:
+        self._delay()
+        public_id = public_id or uuid.uuid4().hex[:20]
+        if folder:
+            public_id = f"{folder.strip('/')}/{public_id}"
+        path = self._path(public_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        image_format = "jpg"
+        if isinstance(file, (bytes, bytearray)):
+            with open(path, "wb") as f:
+                f.write(file)
+        elif hasattr(file, "read"):
+            with open(path, "wb") as f:
+                shutil.copyfileobj(file, f)
+        else:
+            shutil.copyfile(file, path)
+            image_format = os.path.splitext(file)[1].lstrip(".").lower() or "jpg"
+
+        version = int(time.time())
+        with self._lock:
+            self._versions[public_id] = version
+            self._formats[public_id] = image_format
+        url = self.url_for(public_id)
+        return {
+            "public_id": public_id,
+            "version": version,
+            "resource_type": resource_type,
+            "type": "upload",
+            "format": image_format,
+            "bytes": os.path.getsize(path),
+            "created_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "url": url.replace("https://", "http://", 1),
+            "secure_url": url,
+        }
+
+    def list_resources(self, prefix: str, max_results: int, next_cursor: str = None) -> dict:
+        """Stored files in public_id order; the cursor is the last public_id of the previous page"""
+        public_ids = []
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                public_id = os.path.relpath(os.path.join(directory, name), self.root).replace(os.sep, "/")
+                if public_id.startswith(prefix) and (next_cursor is None or public_id > next_cursor):
+                    public_ids.append(public_id)
+        public_ids.sort()
+        page = public_ids[:max_results]
+        resources = []
+        for public_id in page:
+            stat = os.stat(self._path(public_id))
+            resources.append({
+                "public_id": public_id,
+                "format": self._formats.get(public_id, "jpg"),
+                "version": self._versions.get(public_id, 1),
+                "resource_type": "image",
+                "type": "upload",
+                "bytes": stat.st_size,
+                "created_at": datetime.fromtimestamp(stat.st_mtime, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            })
+        result = {"resources": resources}
+        if len(public_ids) > max_results:
+            result["next_cursor"] = page[-1]
+        return result
+
+    def destroy(self, public_id: str) -> dict:
+        self._delay()
+        with self._lock:
+            self._versions.pop(public_id, None)
+            self._formats.pop(public_id, None)
+        try:
+            os.remove(self._path(public_id))
+        except FileNotFoundError:
+            return {"result": "not found"}
+        return {"result": "ok"}
+
+
+def get_local_media() -> LocalCloudinary:
+    global _media
+    if _media is None:
+        with _media_lock:
+            if _media is None:
+                from config import get_settings
+                settings = get_settings()
+                _media = LocalCloudinary(
+                    settings.local_media_dir,
+                    settings.local_media_base_url or f"http://localhost:{settings.backend_port}",
+                    latency_ms=settings.cloudinary_fake_latency_ms,
+                    jitter=settings.fake_latency_jitter,
+                )
+    return _media
+
+
+_media = None
+_media_lock = threading.Lock()
+
+router = APIRouter(prefix=ROUTE_PREFIX, include_in_schema=False)
+
+
+@router.get("/image/upload/{version}/{public_id:path}")
+def serve_local_media(version: str, public_id: str):
+    """Serve an image stored by the local backend"""
+    media = get_local_media()
+    try:
+        path = media._path(public_id.rsplit(".", 1)[0])
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Not found")
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Not found")
+    media_type = mimetypes.guess_type(public_id)[0] or "image/jpeg"
+    return FileResponse(path, media_type=media_type)
@@ -3,6 +3,8 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+EARTH_RADIUS_METERS = 6371000
+
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
     Calculate the great circle distance between two points 
@@ -15,62 +17,206 @@ def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     dlat = lat2 - lat1
     a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
     c = 2 * asin(sqrt(a))
-    r = 6371000  # Radius of earth in meters
+    r = EARTH_RADIUS_METERS  # Radius of earth in meters
     return c * r
 
+def haversine_distances(lat: float, lon: float, lats, lons):
+    """
+    Vectorized haversine from one point to many points (decimal degrees).
+    Returns a float64 numpy array of distances in meters.
+    """
+    import numpy as np
+
+    lat1 = np.radians(lat)
+    lon1 = np.radians(lon)
+    lat2 = np.radians(np.asarray(lats, dtype=np.float64))
+    lon2 = np.radians(np.asarray(lons, dtype=np.float64))
+
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+# Geohash indexing: reports store a `geohash` field so radius searches become
+# a handful of prefix range queries instead of a scan of every active report.
+GEOHASH_PRECISION = 9  # ~4.8m x 4.8m cells
+GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+METERS_PER_DEGREE_LAT = 111320
+
+def encode_geohash(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Encode a coordinate as a base32 geohash string"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bit = 0
+    ch = 0
+    even = True  # even bits refine longitude, odd bits latitude
+    while len(chars) < precision:
+        rng, value = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            ch = (ch << 1) | 1
+            rng[0] = mid
+        else:
+            ch = ch << 1
+            rng[1] = mid
+        even = not even
+        bit += 1
+        if bit == 5:
+            chars.append(GEOHASH_BASE32[ch])
+            bit = 0
+            ch = 0
+    return "".join(chars)
+
+def _geohash_cell_size_degrees(precision: int) -> tuple:
+    """(height, width) of a geohash cell in degrees at the given precision"""
+    bits = precision * 5
+    lon_bits = (bits + 1) // 2
+    lat_bits = bits // 2
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lon_bits)
+
+def geohash_query_bounds(latitude: float, longitude: float, radius_meters: float) -> list:
+    """
+    Geohash prefix ranges that together cover the circle around a point.
+    Picks the finest precision whose cell is at least as large as the bounding
+    box, so at most four cells (2x2) are needed.
+    Returns a sorted list of (start, end) string ranges for range queries.
+    """
+    dlat = radius_meters / METERS_PER_DEGREE_LAT
+    dlon = radius_meters / (METERS_PER_DEGREE_LAT * max(cos(radians(latitude)), 1e-6))
+    min_lat, max_lat = max(-90.0, latitude - dlat), min(90.0, latitude + dlat)
+    min_lon, max_lon = max(-180.0, longitude - dlon), min(180.0, longitude + dlon)
+
+    precision = 1
+    for p in range(GEOHASH_PRECISION, 0, -1):
+        cell_h, cell_w = _geohash_cell_size_degrees(p)
+        if cell_h >= (max_lat - min_lat) and cell_w >= (max_lon - min_lon):
+            precision = p
+            break
+
+    cells = {
+        encode_geohash(lat, lon, precision)
+        for lat in (min_lat, max_lat)
+        for lon in (min_lon, max_lon)
+    }
+    return [(cell, cell + "~") for cell in sorted(cells)]
+
+def query_reports_within_radius(
+    latitude: float,
+    longitude: float,
+    radius_meters: float,
+    status: str | None = "active",
+    limit: int | None = None,
+    fields: list | None = None
+) -> list:
+    """
+    Radius search over reports using geohash prefix range queries, refined
+    with an exact (vectorized) haversine. Results are sorted by distance.
+    `fields` projects the returned report fields; id and distance are always included.
+    """
+    from services.firebase_service import get_firestore_client
+    from google.cloud.firestore import FieldFilter
+    import numpy as np
+
+    db = get_firestore_client()
+
+    select_fields = None
+    if fields:
+        select_fields = sorted(set(fields) | {"latitude", "longitude"})
+
+    candidates = {}
+    for start, end in geohash_query_bounds(latitude, longitude, radius_meters):
+        query = db.collection("reports")
+        if status:
+            query = query.where(filter=FieldFilter("status", "==", status))
+        query = query.where(filter=FieldFilter("geohash", ">=", start)).where(filter=FieldFilter("geohash", "<=", end))
+        if select_fields:
+            query = query.select(select_fields)
+        for doc in query.stream():
+            candidates[doc.id] = doc.to_dict() or {}
+
+    ids, rows, lats, lons = [], [], [], []
+    for doc_id, data in candidates.items():
+        if data.get("latitude") is None or data.get("longitude") is None:
+            continue
+        ids.append(doc_id)
+        rows.append(data)
+        lats.append(float(data["latitude"]))
+        lons.append(float(data["longitude"]))
+
+    if not rows:
+        return []
+
+    distances = haversine_distances(latitude, longitude, lats, lons)
+    order = np.flatnonzero(distances <= radius_meters)
+    order = order[np.argsort(distances[order], kind="stable")]
+    if limit is not None:
+        order = order[:limit]
+
+    results = []
+    for i in order:
+        data = rows[i]
+        if fields:
+            data = {k: data.get(k) for k in fields}
+        results.append({"id": ids[i], "distance": round(float(distances[i]), 2), **data})
+    return results
+
+def find_nearby_active_reports(latitude: float, longitude: float, radius_meters: float = 100) -> list:
+    """
+    Active reports within radius, closest first, validated against the full documents.
+    Candidates come from a projected geohash query; their documents are then read
+    with one batched get_all to confirm they are still active and have an image.
+    """
+    from services.firebase_service import get_firestore_client
+
+    candidates = query_reports_within_radius(
+        latitude, longitude, radius_meters, status="active", fields=["geohash"]
+    )
+    if not candidates:
+        return []
+
+    db = get_firestore_client()
+    refs = [db.collection("reports").document(c["id"]) for c in candidates]
+    snapshots = {snap.id: snap for snap in db.get_all(refs)}
+
+    nearby_reports = []
+    for candidate in candidates:
+        snap = snapshots.get(candidate["id"])
+        if snap is None or not snap.exists:
+            continue
+        data = snap.to_dict() or {}
+        # Skip any invalid or incomplete reports (cleaned, missing coordinates or image)
+        if data.get("status") != "active" or not data.get("imageUrl"):
+            continue
+        if data.get("latitude") is None or data.get("longitude") is None:
+            continue
+        nearby_reports.append({
+            "id": candidate["id"],
+            "distance": candidate["distance"],
+            "wasteType": data.get("wasteType"),
+            "latitude": data.get("latitude"),
+            "longitude": data.get("longitude")
+        })
+    return nearby_reports
+
 async def check_duplicate_location(latitude: float, longitude: float, radius_meters: float = 100) -> dict:
     """
     Check if a location has active (not cleaned) reports within given radius
     Returns: {is_duplicate: bool, nearby_reports: list, distance_to_closest: float}
     """
     try:
-        from services.firebase_service import get_firestore_client
-        from google.cloud.firestore import FieldFilter
-        
-        db = get_firestore_client()
-        
-        # Get all ACTIVE reports (not cleaned)
-        active_reports = db.collection("reports").where(
-            filter=FieldFilter("status", "==", "active")
-        ).stream()
-        
-        nearby_reports = []
-        min_distance = float('inf')
-        
-        for report in active_reports:
-            data = report.to_dict()
-            report_lat = data.get("latitude")
-            report_lon = data.get("longitude")
-            image_url = data.get("imageUrl")
-            
-            # Skip any invalid or incomplete reports (missing coordinates or image)
-            if report_lat and report_lon and image_url:
-                distance = haversine_distance(latitude, longitude, report_lat, report_lon)
-                
-                logger.info(f"📍 Checking distance to report {report.id}: {distance:.1f}m")
-                
-                if distance <= radius_meters:
-                    nearby_reports.append({
-                        "id": report.id,
-                        "distance": round(distance, 2),
-                        "wasteType": data.get("wasteType"),
-                        "latitude": report_lat,
-                        "longitude": report_lon
-                    })
-                    min_distance = min(min_distance, distance)
-        
+        nearby_reports = find_nearby_active_reports(latitude, longitude, radius_meters)
         is_duplicate = len(nearby_reports) > 0
+        min_distance = nearby_reports[0]["distance"] if is_duplicate else None
         
         if is_duplicate:
             logger.warning(f"⚠️  Duplicate location detected! {len(nearby_reports)} active report(s) within {radius_meters}m")
             logger.warning(f"📏 Closest report: {min_distance:.1f}m away")
         else:
-            logger.info(f"✅ No active reports within {radius_meters}m")
+            logger.debug("✅ No active reports within %sm", radius_meters)
         
         return {
             'is_duplicate': is_duplicate,
             'nearby_reports': nearby_reports,
-            'distance_to_closest': round(min_distance, 2) if min_distance != float('inf') else None,
+            'distance_to_closest': min_distance,
             'radius_checked': radius_meters
         }
     except Exception as e:
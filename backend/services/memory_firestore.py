@@ -0,0 +1,781 @@
+"""
+In-memory stand-in for the Firestore client (FIRESTORE_BACKEND=memory).
+
+Implements the subset of google.cloud.firestore_v1 the backend uses, with the
+same call shapes and the same filter/transform objects, so routes run
+unchanged against it:
+  - collections, documents, subcollections; auto ids
+  - get / set (merge) / update (dotted paths) / create / delete
+  - where (FieldFilter, Or/And, legacy positional form), order_by, limit,
+    limit_to_last, offset, start_at/start_after/end_at/end_before, select
+  - stream / get, Client.get_all
+  - count / sum / avg aggregation queries
+  - write batches (atomic) and transactions (optimistic: commit aborts and
+    the body is retried when a document it read has changed since)
+  - SERVER_TIMESTAMP, DELETE_FIELD, Increment, ArrayUnion, ArrayRemove,
+    Maximum, Minimum
+
+Errors use the real google.api_core exception types (NotFound,
+AlreadyExists, Aborted). Value ordering follows Firestore's cross-type
+order; range filters only match values of the same type, and filters or
+order_by on a missing field exclude the document. Composite index
+requirements are not enforced.
+
+Every round trip (document read/write, query, batch/transaction commit)
+sleeps for an injected latency (FIRESTORE_FAKE_LATENCY_MS, with
+FAKE_LATENCY_JITTER as a +/- fraction) so load tests see realistic
+request timing. Data lives in process memory and is lost on restart.
+"""
+import copy
+import math
+import random
+import string
+import threading
+import time
+from datetime import datetime, timezone
+
+from google.api_core import exceptions
+from google.cloud.firestore_v1 import base_query, transforms
+from google.cloud.firestore_v1.aggregation import AggregationResult
+
+_MISSING = object()
+_ID_ALPHABET = string.ascii_letters + string.digits
+DOCUMENT_ID = "__name__"
+MAX_TRANSACTION_ATTEMPTS = 5
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _auto_id() -> str:
+    return "".join(random.choices(_ID_ALPHABET, k=20))
+
+
+# --- values -------------------------------------------------------------------
+
+def _type_rank(value) -> int:
+    """Firestore cross-type ordering: null < bool < number < timestamp < string < bytes < reference < array < map"""
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, datetime):
+        return 3
+    if isinstance(value, str):
+        return 4
+    if isinstance(value, bytes):
+        return 5
+    if isinstance(value, DocumentReference):
+        return 6
+    if isinstance(value, (list, tuple)):
+        return 8
+    if isinstance(value, dict):
+        return 9
+    return 10
+
+
+def _sort_key(value):
+    rank = _type_rank(value)
+    if rank == 2 and isinstance(value, float) and math.isnan(value):
+        return (rank, -math.inf)  # NaN sorts before all other numbers
+    if rank == 3 and value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    if rank == 6:
+        value = value.path
+    if rank == 8:
+        return (rank, tuple(_sort_key(v) for v in value))
+    if rank == 9:
+        return (rank, tuple((k, _sort_key(v)) for k, v in sorted(value.items())))
+    if rank in (0, 10):
+        return (rank, 0)
+    return (rank, value)
+
+
+def _equal(a, b) -> bool:
+    return _type_rank(a) == _type_rank(b) and _sort_key(a) == _sort_key(b)
+
+
+def _get_path(data: dict, field_path: str):
+    value = data
+    for part in field_path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _field_value(doc_id: str, data: dict, field_path: str):
+    if field_path == DOCUMENT_ID:
+        return doc_id
+    return _get_path(data, field_path)
+
+
+def _apply_transform(current, value):
+    """Resolve a sentinel/transform against the current field value (_MISSING when absent)"""
+    if value is transforms.SERVER_TIMESTAMP:
+        return _now()
+    if isinstance(value, transforms.Increment):
+        if isinstance(current, (int, float)) and not isinstance(current, bool):
+            return current + value.value
+        return value.value
+    if isinstance(value, transforms.Maximum):
+        if isinstance(current, (int, float)) and not isinstance(current, bool):
+            return max(current, value.value)
+        return value.value
+    if isinstance(value, transforms.Minimum):
+        if isinstance(current, (int, float)) and not isinstance(current, bool):
+            return min(current, value.value)
+        return value.value
+    if isinstance(value, transforms.ArrayUnion):
+        items = list(current) if isinstance(current, list) else []
+        for v in value.values:
+            if not any(_equal(v, existing) for existing in items):
+                items.append(copy.deepcopy(v))
+        return items
+    if isinstance(value, transforms.ArrayRemove):
+        items = list(current) if isinstance(current, list) else []
+        return [v for v in items if not any(_equal(v, r) for r in value.values)]
+    return copy.deepcopy(value)
+
+
+def _set_field(target: dict, key: str, value):
+    if value is transforms.DELETE_FIELD:
+        target.pop(key, None)
+    else:
+        target[key] = _apply_transform(target.get(key, _MISSING), value)
+
+
+def _resolve_map(existing, data: dict) -> dict:
+    """New map from `data` with transforms applied (existing values feed Increment/ArrayUnion)"""
+    existing = existing or {}
+    result = {}
+    for key, value in data.items():
+        if value is transforms.DELETE_FIELD:
+            raise ValueError("DELETE_FIELD is only allowed in update() or set(merge=True)")
+        if isinstance(value, dict):
+            result[key] = _resolve_map(existing.get(key) if isinstance(existing.get(key), dict) else None, value)
+        else:
+            result[key] = _apply_transform(existing.get(key, _MISSING), value)
+    return result
+
+
+def _merge_into(target: dict, data: dict):
+    """set(merge=True): nested maps merge recursively"""
+    for key, value in data.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge_into(target[key], value)
+        elif isinstance(value, dict):
+            target[key] = {}
+            _merge_into(target[key], value)
+        else:
+            _set_field(target, key, value)
+
+
+def _update_paths(target: dict, data: dict):
+    """update(): keys are field paths ("a.b" sets a nested field)"""
+    for path, value in data.items():
+        parts = path.split(".")
+        node = target
+        for part in parts[:-1]:
+            child = node.get(part)
+            if not isinstance(child, dict):
+                if value is transforms.DELETE_FIELD:
+                    break
+                child = node[part] = {}
+            node = child
+        else:
+            if isinstance(value, dict):
+                node[parts[-1]] = _resolve_map(None, value)
+            else:
+                _set_field(node, parts[-1], value)
+
+
+def _project(data: dict, field_paths) -> dict:
+    if field_paths is None:
+        return copy.deepcopy(data)
+    result = {}
+    for path in field_paths:
+        value = _get_path(data, path)
+        if value is _MISSING:
+            continue
+        node = result
+        parts = path.split(".")
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        node[parts[-1]] = copy.deepcopy(value)
+    return result
+
+
+# --- filters ------------------------------------------------------------------
+
+def _compile_filter(flt):
+    """Predicate (doc_id, data) -> bool for a FieldFilter / Or / And"""
+    if isinstance(flt, base_query.BaseCompositeFilter):
+        parts = [_compile_filter(f) for f in flt.filters]
+        if isinstance(flt, base_query.Or):
+            return lambda doc_id, data: any(p(doc_id, data) for p in parts)
+        return lambda doc_id, data: all(p(doc_id, data) for p in parts)
+
+    field, op, target = flt.field_path, flt.op_string, flt.value
+    if isinstance(target, DocumentReference) and field == DOCUMENT_ID:
+        target = target.id
+
+    def predicate(doc_id, data):
+        value = _field_value(doc_id, data, field)
+        if value is _MISSING:
+            return False
+        if op == "==":
+            return _equal(value, target)
+        if op == "!=":
+            return value is not None and not _equal(value, target)
+        if op in ("<", "<=", ">", ">="):
+            if _type_rank(value) != _type_rank(target):
+                return False
+            a, b = _sort_key(value), _sort_key(target)
+            return {"<": a < b, "<=": a <= b, ">": a > b, ">=": a >= b}[op]
+        if op == "in":
+            return any(_equal(value, t) for t in target)
+        if op == "not-in":
+            return value is not None and not any(_equal(value, t) for t in target)
+        if op == "array_contains":
+            return isinstance(value, list) and any(_equal(v, target) for v in value)
+        if op == "array_contains_any":
+            return isinstance(value, list) and any(_equal(v, t) for v in value for t in target)
+        raise ValueError(f"Unsupported filter operator: {op}")
+
+    predicate.inequality_field = field if op in ("<", "<=", ">", ">=", "!=", "not-in") else None
+    return predicate
+
+
+# --- snapshots ----------------------------------------------------------------
+
+class DocumentSnapshot:
+    def __init__(self, reference, data, exists, create_time=None, update_time=None):
+        self.reference = reference
+        self._data = data
+        self.exists = exists
+        self.create_time = create_time
+        self.update_time = update_time
+        self.read_time = _now()
+
+    @property
+    def id(self) -> str:
+        return self.reference.id
+
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self.exists else None
+
+    def get(self, field_path: str):
+        value = _get_path(self._data or {}, field_path)
+        if value is _MISSING:
+            raise KeyError(f"'{field_path}' is not contained in the data")
+        return copy.deepcopy(value)
+
+
+class _StoredDoc:
+    __slots__ = ("data", "create_time", "update_time", "version")
+
+    def __init__(self, data):
+        self.data = data
+        self.create_time = self.update_time = _now()
+        self.version = 0
+
+
+# --- references ---------------------------------------------------------------
+
+class DocumentReference:
+    def __init__(self, client, collection_path: str, doc_id: str):
+        self._client = client
+        self._collection_path = collection_path
+        self.id = doc_id
+
+    @property
+    def path(self) -> str:
+        return f"{self._collection_path}/{self.id}"
+
+    @property
+    def parent(self):
+        return CollectionReference(self._client, self._collection_path)
+
+    def collection(self, name: str):
+        return CollectionReference(self._client, f"{self.path}/{name}")
+
+    def collections(self):
+        prefix = self.path + "/"
+        names = {p[len(prefix):] for p, docs in self._client._store.items() if docs and p.startswith(prefix) and "/" not in p[len(prefix):]}
+        return [self.collection(name) for name in sorted(names)]
+
+    def __eq__(self, other):
+        return isinstance(other, DocumentReference) and other.path == self.path and other._client is self._client
+
+    def __hash__(self):
+        return hash(self.path)
+
+    def __repr__(self):
+        return f"<DocumentReference {self.path}>"
+
+    def get(self, field_paths=None, transaction=None):
+        if transaction is not None:
+            return transaction.get(self, field_paths=field_paths)
+        self._client._delay()
+        with self._client._lock:
+            return self._client._snapshot(self, field_paths)
+
+    def set(self, document_data: dict, merge=False):
+        self._client._delay()
+        return self._client._commit_writes([("set", self, document_data, merge)])[0]
+
+    def update(self, field_updates: dict):
+        self._client._delay()
+        return self._client._commit_writes([("update", self, field_updates, None)])[0]
+
+    def create(self, document_data: dict):
+        self._client._delay()
+        return self._client._commit_writes([("create", self, document_data, None)])[0]
+
+    def delete(self):
+        self._client._delay()
+        return self._client._commit_writes([("delete", self, None, None)])[0]
+
+
+class Query:
+    ASCENDING = "ASCENDING"
+    DESCENDING = "DESCENDING"
+
+    def __init__(self, client, collection_path: str, filters=(), orders=(), limit=None, limit_to_last=False,
+                 offset=0, projection=None, start=None, end=None):
+        self._client = client
+        self._collection_path = collection_path
+        self._filters = tuple(filters)
+        self._orders = tuple(orders)
+        self._limit = limit
+        self._limit_to_last = limit_to_last
+        self._offset = offset
+        self._projection = projection
+        self._start = start  # (values, before)
+        self._end = end
+
+    def _copy(self, **changes):
+        state = dict(
+            filters=self._filters, orders=self._orders, limit=self._limit, limit_to_last=self._limit_to_last,
+            offset=self._offset, projection=self._projection, start=self._start, end=self._end,
+        )
+        state.update(changes)
+        return Query(self._client, self._collection_path, **state)
+
+    # --- builders ---
+
+    def where(self, field_path=None, op_string=None, value=None, *, filter=None):
+        if filter is None:
+            if field_path is None:
+                raise ValueError("where() needs a filter or field_path/op_string/value")
+            filter = base_query.FieldFilter(field_path, op_string, value)
+        return self._copy(filters=self._filters + (_compile_filter(filter),))
+
+    def order_by(self, field_path, direction=ASCENDING):
+        field_path = field_path if isinstance(field_path, str) else field_path.to_api_repr()
+        if direction not in (self.ASCENDING, self.DESCENDING):
+            raise ValueError(f"Invalid direction: {direction}")
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count: int):
+        return self._copy(limit=count, limit_to_last=False)
+
+    def limit_to_last(self, count: int):
+        if not self._orders:
+            raise ValueError("limit_to_last() requires an order_by()")
+        return self._copy(limit=count, limit_to_last=True)
+
+    def offset(self, num_to_skip: int):
+        return self._copy(offset=num_to_skip)
+
+    def select(self, field_paths):
+        return self._copy(projection=list(field_paths))
+
+    def start_at(self, document_fields_or_snapshot):
+        return self._copy(start=(document_fields_or_snapshot, True))
+
+    def start_after(self, document_fields_or_snapshot):
+        return self._copy(start=(document_fields_or_snapshot, False))
+
+    def end_at(self, document_fields_or_snapshot):
+        return self._copy(end=(document_fields_or_snapshot, True))
+
+    def end_before(self, document_fields_or_snapshot):
+        return self._copy(end=(document_fields_or_snapshot, False))
+
+    def count(self, alias=None):
+        return AggregationQuery(self).count(alias)
+
+    def sum(self, field_ref, alias=None):
+        return AggregationQuery(self).sum(field_ref, alias)
+
+    def avg(self, field_ref, alias=None):
+        return AggregationQuery(self).avg(field_ref, alias)
+
+    # --- execution ---
+
+    def _effective_orders(self):
+        orders = list(self._orders)
+        ordered = {f for f, _ in orders}
+        for predicate in self._filters:
+            field = getattr(predicate, "inequality_field", None)
+            if field and field not in ordered:
+                orders.append((field, self.ASCENDING))
+                ordered.add(field)
+        if DOCUMENT_ID not in ordered:
+            orders.append((DOCUMENT_ID, orders[-1][1] if orders else self.ASCENDING))
+        return orders
+
+    def _cursor_values(self, cursor, orders):
+        if isinstance(cursor, DocumentSnapshot):
+            data = cursor._data or {}
+            return [_field_value(cursor.id, data, f) for f, _ in orders]
+        if isinstance(cursor, dict):
+            return [cursor.get(f, _MISSING) for f, _ in orders]
+        return list(cursor)
+
+    def _compare_cursor(self, row_key, cursor_values, orders) -> int:
+        for (field, direction), row_value, cursor_value in zip(orders, row_key, cursor_values):
+            if cursor_value is _MISSING:
+                continue
+            a, b = _sort_key(row_value), _sort_key(cursor_value)
+            if a != b:
+                result = -1 if a < b else 1
+                return -result if direction == self.DESCENDING else result
+        return 0
+
+    def _run(self):
+        """[(doc_id, data, stored)] matching the query, in query order (caller holds the lock)"""
+        docs = self._client._store.get(self._collection_path, {})
+        rows = [(doc_id, stored) for doc_id, stored in docs.items()
+                if all(p(doc_id, stored.data) for p in self._filters)]
+
+        orders = self._effective_orders()
+        keyed = []
+        for doc_id, stored in rows:
+            values = [_field_value(doc_id, stored.data, f) for f, _ in orders]
+            if any(v is _MISSING for v in values):
+                continue  # order_by excludes documents without the field
+            keyed.append((values, doc_id, stored))
+
+        for position in range(len(orders) - 1, -1, -1):
+            keyed.sort(key=lambda row: _sort_key(row[0][position]), reverse=orders[position][1] == self.DESCENDING)
+
+        if self._start is not None:
+            cursor, inclusive = self._start
+            values = self._cursor_values(cursor, orders)
+            keyed = [row for row in keyed if (c := self._compare_cursor(row[0], values, orders)) > 0 or (inclusive and c == 0)]
+        if self._end is not None:
+            cursor, inclusive = self._end
+            values = self._cursor_values(cursor, orders)
+            keyed = [row for row in keyed if (c := self._compare_cursor(row[0], values, orders)) < 0 or (inclusive and c == 0)]
+
+        keyed = keyed[self._offset:]
+        if self._limit is not None:
+            keyed = keyed[-self._limit:] if self._limit_to_last else keyed[:self._limit]
+        return [(doc_id, stored.data, stored) for _, doc_id, stored in keyed]
+
+    def _snapshots(self, transaction=None):
+        if transaction is not None:
+            transaction._check_read()
+        self._client._delay()
+        with self._client._lock:
+            rows = self._run()
+            snapshots = []
+            for doc_id, data, stored in rows:
+                ref = DocumentReference(self._client, self._collection_path, doc_id)
+                if transaction is not None:
+                    transaction._read_versions[ref.path] = stored.version
+                snapshots.append(DocumentSnapshot(ref, _project(data, self._projection), True, stored.create_time, stored.update_time))
+        return snapshots
+
+    def stream(self, transaction=None, **kwargs):
+        yield from self._snapshots(transaction)
+
+    def get(self, transaction=None, **kwargs):
+        return list(self.stream(transaction=transaction))
+
+
+class CollectionReference(Query):
+    def __init__(self, client, path: str):
+        super().__init__(client, path)
+        self._path = path
+
+    @property
+    def id(self) -> str:
+        return self._path.rsplit("/", 1)[-1]
+
+    @property
+    def parent(self):
+        if "/" not in self._path:
+            return None
+        parent_path = self._path.rsplit("/", 1)[0]
+        collection_path, doc_id = parent_path.rsplit("/", 1)
+        return DocumentReference(self._client, collection_path, doc_id)
+
+    def document(self, document_id: str = None):
+        return DocumentReference(self._client, self._path, document_id or _auto_id())
+
+    def add(self, document_data: dict, document_id: str = None):
+        ref = self.document(document_id)
+        write_result = ref.create(document_data)
+        return write_result.update_time, ref
+
+    def list_documents(self, page_size=None):
+        with self._client._lock:
+            ids = list(self._client._store.get(self._path, {}))
+        return [self.document(doc_id) for doc_id in ids]
+
+
+class AggregationQuery:
+    def __init__(self, query: Query):
+        self._query = query
+        self._aggregations = []
+
+    def _add(self, kind, field, alias):
+        self._aggregations.append((kind, field, alias or f"field_{len(self._aggregations) + 1}"))
+        return self
+
+    def count(self, alias=None):
+        return self._add("count", None, alias)
+
+    def sum(self, field_ref, alias=None):
+        return self._add("sum", str(field_ref), alias)
+
+    def avg(self, field_ref, alias=None):
+        return self._add("avg", str(field_ref), alias)
+
+    def stream(self, transaction=None, **kwargs):
+        if transaction is not None:
+            transaction._check_read()
+        self._query._client._delay()
+        with self._query._client._lock:
+            rows = self._query._run()
+        results = []
+        for kind, field, alias in self._aggregations:
+            if kind == "count":
+                value = len(rows)
+            else:
+                numbers = [v for _, data, _ in rows
+                           if isinstance(v := _get_path(data, field), (int, float)) and not isinstance(v, bool)]
+                if kind == "sum":
+                    value = sum(numbers)
+                else:
+                    value = sum(numbers) / len(numbers) if numbers else None
+            results.append(AggregationResult(alias=alias, value=value, read_time=_now()))
+        yield results
+
+    def get(self, transaction=None, **kwargs):
+        return list(self.stream(transaction=transaction))
+
+
+# --- writes -------------------------------------------------------------------
+
+class WriteResult:
+    def __init__(self, update_time):
+        self.update_time = update_time
+
+
+class WriteBatch:
+    MAX_WRITES = 500
+
+    def __init__(self, client):
+        self._client = client
+        self._writes = []
+
+    def _add(self, op, ref, data, option):
+        if len(self._writes) >= self.MAX_WRITES:
+            raise exceptions.InvalidArgument(f"maximum {self.MAX_WRITES} writes allowed per request")
+        self._writes.append((op, ref, data, option))
+
+    def set(self, reference, document_data, merge=False):
+        self._add("set", reference, document_data, merge)
+
+    def update(self, reference, field_updates, option=None):
+        self._add("update", reference, field_updates, None)
+
+    def create(self, reference, document_data):
+        self._add("create", reference, document_data, None)
+
+    def delete(self, reference, option=None):
+        self._add("delete", reference, None, None)
+
+    def commit(self, **kwargs):
+        self._client._delay()
+        results = self._client._commit_writes(self._writes)
+        self._writes = []
+        return results
+
+    def __len__(self):
+        return len(self._writes)
+
+
+class Transaction(WriteBatch):
+    """Reads record document versions; commit() raises Aborted if any of them changed."""
+
+    def __init__(self, client, read_only=False):
+        super().__init__(client)
+        self._read_versions = {}
+        self._read_only = read_only
+
+    def _check_read(self):
+        if self._writes:
+            raise exceptions.InvalidArgument("Firestore transactions require all reads to be executed before all writes.")
+
+    def _add(self, op, ref, data, option):
+        if self._read_only:
+            raise ValueError("Cannot perform write operation in read-only transaction.")
+        super()._add(op, ref, data, option)
+
+    def get(self, ref_or_query, field_paths=None):
+        self._check_read()
+        if isinstance(ref_or_query, DocumentReference):
+            self._client._delay()
+            with self._client._lock:
+                stored = self._client._store.get(ref_or_query._collection_path, {}).get(ref_or_query.id)
+                self._read_versions[ref_or_query.path] = stored.version if stored else None
+                return self._client._snapshot(ref_or_query, field_paths)
+        return ref_or_query.stream(transaction=self)
+
+    def get_all(self, references, field_paths=None):
+        return (self.get(ref, field_paths) for ref in references)
+
+    def commit(self, **kwargs):
+        self._client._delay()
+        results = self._client._commit_writes(self._writes, read_versions=self._read_versions)
+        self._writes = []
+        self._read_versions = {}
+        return results
+
+
+# --- client -------------------------------------------------------------------
+
+class MemoryFirestore:
+    def __init__(self, latency_ms: float = 0.0, jitter: float = 0.0, project: str = "luit-memory"):
+        self.project = project
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self._lock = threading.RLock()
+        self._store = {}  # collection path -> {doc_id: _StoredDoc}
+
+    def _delay(self):
+        if self.latency_ms > 0:
+            spread = self.latency_ms * self.jitter
+            time.sleep(max(0.0, self.latency_ms + random.uniform(-spread, spread)) / 1000.0)
+
+    def _snapshot(self, ref, field_paths=None):
+        stored = self._store.get(ref._collection_path, {}).get(ref.id)
+        if stored is None:
+            return DocumentSnapshot(ref, None, False)
+        return DocumentSnapshot(ref, _project(stored.data, field_paths), True, stored.create_time, stored.update_time)
+
+    def _commit_writes(self, writes, read_versions=None):
+        """Apply writes atomically: validate all first, then apply. Returns [WriteResult]."""
+        with self._lock:
+            if read_versions:
+                for path, version in read_versions.items():
+                    collection_path, doc_id = path.rsplit("/", 1)
+                    stored = self._store.get(collection_path, {}).get(doc_id)
+                    if (stored.version if stored else None) != version:
+                        raise exceptions.Aborted(f"Transaction conflict on {path}")
+
+            # Validate against the state as it evolves through the batch
+            exists = {}
+            for op, ref, _, _ in writes:
+                present = exists.get(ref.path)
+                if present is None:
+                    present = ref.id in self._store.get(ref._collection_path, {})
+                if op == "create" and present:
+                    raise exceptions.AlreadyExists(f"Document already exists: {ref.path}")
+                if op == "update" and not present:
+                    raise exceptions.NotFound(f"No document to update: {ref.path}")
+                exists[ref.path] = op != "delete"
+
+            commit_time = _now()
+            results = []
+            for op, ref, data, merge in writes:
+                docs = self._store.setdefault(ref._collection_path, {})
+                stored = docs.get(ref.id)
+                if op == "delete":
+                    docs.pop(ref.id, None)
+                elif op in ("set", "create"):
+                    if merge and stored is not None:
+                        _merge_into(stored.data, data)
+                    else:
+                        fresh = _StoredDoc({})
+                        if merge:
+                            _merge_into(fresh.data, data)
+                        else:
+                            fresh.data = _resolve_map(None, data)
+                        if stored is not None:
+                            fresh.create_time = stored.create_time
+                            fresh.version = stored.version
+                        stored = docs[ref.id] = fresh
+                else:  # update
+                    _update_paths(stored.data, data)
+                if op != "delete":
+                    stored.update_time = commit_time
+                    stored.version += 1
+                results.append(WriteResult(commit_time))
+            return results
+
+    def collection(self, *path) -> CollectionReference:
+        path = "/".join(path)
+        if path.count("/") % 2:
+            raise ValueError(f"A collection path needs an odd number of segments: {path}")
+        return CollectionReference(self, path)
+
+    def document(self, *path) -> DocumentReference:
+        path = "/".join(path)
+        collection_path, _, doc_id = path.rpartition("/")
+        if not collection_path or collection_path.count("/") % 2:
+            raise ValueError(f"A document path needs an even number of segments: {path}")
+        return DocumentReference(self, collection_path, doc_id)
+
+    def collections(self):
+        with self._lock:
+            names = sorted(p for p, docs in self._store.items() if docs and "/" not in p)
+        return [CollectionReference(self, name) for name in names]
+
+    def get_all(self, references, field_paths=None, transaction=None, **kwargs):
+        if transaction is not None:
+            yield from transaction.get_all(references, field_paths)
+            return
+        references = list(references)
+        self._delay()
+        with self._lock:
+            snapshots = [self._snapshot(ref, field_paths) for ref in references]
+        yield from snapshots
+
+    def batch(self) -> WriteBatch:
+        return WriteBatch(self)
+
+    def transaction(self, max_attempts: int = MAX_TRANSACTION_ATTEMPTS, read_only: bool = False) -> Transaction:
+        txn = Transaction(self, read_only=read_only)
+        txn._max_attempts = max_attempts
+        return txn
+
+    def run_transaction(self, fn, *args, max_attempts: int = MAX_TRANSACTION_ATTEMPTS, **kwargs):
+        """Run fn(transaction, *args, **kwargs) and commit, retrying on conflicts like firestore.transactional"""
+        for attempt in range(max_attempts):
+            txn = self.transaction(max_attempts)
+            result = fn(txn, *args, **kwargs)
+            try:
+                txn.commit()
+                return result
+            except exceptions.Aborted:
+                if attempt == max_attempts - 1:
+                    raise
+                time.sleep(random.uniform(0, 0.01 * (2 ** attempt)))
+
+    def reset(self):
+        """Drop all data (load-test setup)"""
+        with self._lock:
+            self._store.clear()
+
+    def close(self):
+        pass
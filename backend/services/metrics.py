@@ -0,0 +1,204 @@
+"""
+In-process metrics, exposed on /metrics in the Prometheus text format.
+
+Counters and histograms are plain in-memory structures guarded by a lock:
+recording is a dict lookup plus a bisect, so hot paths can time themselves
+without the per-request log lines they used to emit. Values are per process
+(scrape every worker, or aggregate in Prometheus).
+
+    with IMAGE_STAGE_SECONDS.time(stage="decode"):
+        ...
+    CACHE_REQUESTS.inc(cache="image", result="hit")
+"""
+from bisect import bisect_left
+from contextlib import contextmanager
+import threading
+import time
+
+# Prometheus client defaults (seconds)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        _registry.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+            lines += self._samples(items)
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self, items) -> list:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of the with-block (also when it raises)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self, items) -> list:
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+def render_metrics() -> str:
+    """All registered metrics in the Prometheus text exposition format (0.0.4)"""
+    lines = []
+    for metric in _registry:
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# --- metric catalogue ------------------------------------------------------
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "luit_http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+IMAGE_STAGE_SECONDS = Histogram(
+    "luit_image_stage_seconds", "Image pipeline stage latency (decode, preprocess, inference, nms, reencode)",
+    ["stage"],
+)
+CLOUDINARY_SECONDS = Histogram(
+    "luit_cloudinary_seconds", "Cloudinary API call latency",
+    ["op", "outcome"], buckets=DEFAULT_BUCKETS + (30.0,),
+)
+FIRESTORE_SECONDS = Histogram(
+    "luit_firestore_seconds", "Firestore call latency by operation",
+    ["op"],
+)
+CACHE_REQUESTS = Counter(
+    "luit_cache_requests_total", "Cache lookups by cache and result (hit, miss, coalesced)",
+    ["cache", "result"],
+)
+HEURISTIC_FALLBACKS = Counter(
+    "luit_heuristic_fallback_total", "Verifications decided by the CV heuristic instead of YOLO",
+    ["path", "reason"],
+)
+VERIFICATION_EXITS = Counter(
+    "luit_verification_exits_total", "Garbage verification cascade exits by tier and outcome",
+    ["tier", "outcome"],
+)
+
+
+# --- request timing middleware ---------------------------------------------
+
+def _route_template(scope) -> str:
+    """Path template of the matching route (e.g. /reporting/report/{report_id}) to keep label cardinality bounded"""
+    from starlette.routing import Match
+
+    app = scope.get("app")
+    router = getattr(app, "router", None)
+    for route in getattr(router, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", scope["path"])
+    return "unmatched"
+
+
+class RequestTimingMiddleware:
+    """Pure ASGI middleware recording HTTP_REQUEST_SECONDS for every HTTP request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                method=scope["method"], route=_route_template(scope), status=status["code"],
+            )
@@ -0,0 +1,230 @@
+"""
+YOLOv8n ONNX model lifecycle: download, load, warmup and hot reload.
+
+The session used to be created lazily on the first verification request, so
+that user paid for the download plus session creation, and a failed download
+only showed up as a silent fallback to the CV heuristic. The manager now loads
+and warms the model during the FastAPI lifespan and reports its state on
+/ready.
+
+Reloads (admin call or a changed file on disk) build and warm the new session
+first, then swap the reference in one assignment. Requests already running
+keep the session they picked up; the old one is released when they finish.
+
+In the multi-worker deployment (gunicorn.conf.py) INFERENCE_SOCKET is set for
+the API workers and get_model_manager() returns a RemoteModelManager that
+forwards to the shared inference server (services/inference_server.py), which
+runs the only ModelManager.
+
+Env:
+    YOLO_ONNX_PATH       model file (default services/models/yolov8n.onnx)
+    YOLO_WARMUP_RUNS     dummy inferences before a session goes live (default 2)
+    YOLO_WATCH_SECONDS   poll interval for model file changes (default 30, 0 disables)
+    INFERENCE_SOCKET     Unix socket of the shared inference server (unset: load in-process)
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+YOLO_MODEL_URL = "https://github.com/ultralytics/assets/releases/download/v0.0.0/yolov8n.onnx"
+YOLO_MODEL_PATH = os.getenv(
+    "YOLO_ONNX_PATH",
+    os.path.join(os.path.dirname(__file__), "models", "yolov8n.onnx"),
+)
+YOLO_INPUT_SIZE = 640
+WARMUP_RUNS = int(os.getenv("YOLO_WARMUP_RUNS", "2"))
+WATCH_SECONDS = float(os.getenv("YOLO_WATCH_SECONDS", "30"))
+RETRY_SECONDS = 60  # after a failed load, on-demand loads wait this long before trying again
+INFERENCE_SOCKET = os.getenv("INFERENCE_SOCKET")
+
+
+def _download_model(path: str):
+    """Download the default YOLOv8n weights to `path` (written to a temp file, then renamed)."""
+    import requests
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.download"
+    logger.info(f"⬇️ Downloading YOLOv8n ONNX to {path} ...")
+    resp = requests.get(YOLO_MODEL_URL, stream=True, timeout=20)
+    resp.raise_for_status()
+    with open(tmp_path, "wb") as f:
+        for chunk in resp.iter_content(chunk_size=8192):
+            if chunk:
+                f.write(chunk)
+    os.replace(tmp_path, path)
+    logger.info("✅ YOLOv8n ONNX download complete")
+
+
+def _create_session(path: str):
+    """ONNX Runtime session with conservative threading (CPU)."""
+    import onnxruntime as ort
+
+    sess_opts = ort.SessionOptions()
+    sess_opts.intra_op_num_threads = 1
+    sess_opts.inter_op_num_threads = 1
+    return ort.InferenceSession(path, sess_options=sess_opts, providers=["CPUExecutionProvider"])
+
+
+def _check_input(session):
+    """Reject models whose input does not match the 1x3x640x640 tensor the pipeline feeds."""
+    shape = session.get_inputs()[0].shape
+    expected = [1, 3, YOLO_INPUT_SIZE, YOLO_INPUT_SIZE]
+    if len(shape) != 4 or any(isinstance(dim, int) and dim != want for dim, want in zip(shape, expected)):
+        raise ValueError(f"Model input shape {shape} does not match {expected}")
+
+
+def _warmup(session, runs: int) -> list:
+    """Run `runs` dummy inferences on a letterbox-grey input; returns per-run latency (ms)."""
+    import numpy as np
+
+    tensor = np.full((1, 3, YOLO_INPUT_SIZE, YOLO_INPUT_SIZE), 114 / 255, dtype=np.float32)
+    feed = {session.get_inputs()[0].name: tensor}
+    latencies = []
+    for _ in range(max(1, runs)):
+        start = time.perf_counter()
+        session.run(None, feed)
+        latencies.append(round((time.perf_counter() - start) * 1000, 1))
+    return latencies
+
+
+class ModelManager:
+    def __init__(self, path: str = YOLO_MODEL_PATH):
+        self.path = path
+        self._session = None
+        self._load_lock = threading.Lock()  # one load/reload at a time
+        self.state = "not_loaded"            # not_loaded | loading | ready | failed
+        self.error = None
+        self.generation = 0
+        self.loaded_at = None
+        self.file_mtime = None
+        self.load_ms = None
+        self.warmup_ms = []
+        self._last_attempt = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self._session is not None
+
+    def get_session(self):
+        """
+        Live session for inference. Loads on demand if the lifespan warmup did
+        not run (or failed more than RETRY_SECONDS ago); raises if unavailable.
+        """
+        session = self._session
+        if session is not None:
+            return session
+        with self._load_lock:
+            if self._session is None:
+                if self.state == "failed" and time.monotonic() - self._last_attempt < RETRY_SECONDS:
+                    raise RuntimeError(f"YOLO model unavailable: {self.error}")
+                self._load_locked(self.path)
+        return self._session
+
+    def load(self, path: str = None) -> dict:
+        """Load, warm up and swap in the model at `path` (default: current path). Returns status()."""
+        with self._load_lock:
+            self._load_locked(path or self.path)
+        return self.status()
+
+    def _load_locked(self, path: str):
+        previous_state = self.state
+        self.state = "loading" if self._session is None else previous_state
+        self._last_attempt = time.monotonic()
+        try:
+            if not os.path.exists(path):
+                if path != YOLO_MODEL_PATH:
+                    raise FileNotFoundError(f"Model file not found: {path}")
+                _download_model(path)
+            mtime = os.path.getmtime(path)
+
+            start = time.perf_counter()
+            session = _create_session(path)
+            _check_input(session)
+            load_ms = round((time.perf_counter() - start) * 1000, 1)
+            warmup_ms = _warmup(session, WARMUP_RUNS)
+        except Exception as e:
+            self.error = str(e)
+            if self._session is None:
+                self.state = "failed"
+                logger.error(f"❌ YOLOv8n model load failed ({path}): {e}; verification falls back to the CV heuristic")
+            else:
+                self.state = previous_state
+                logger.error(f"❌ YOLOv8n model reload failed ({path}): {e}; keeping the current model")
+            raise
+
+        # Atomic swap: in-flight requests keep the session reference they already hold
+        self._session = session
+        self.path = path
+        self.file_mtime = mtime
+        self.load_ms = load_ms
+        self.warmup_ms = warmup_ms
+        self.loaded_at = datetime.now().isoformat()
+        self.generation += 1
+        self.state = "ready"
+        self.error = None
+        logger.info(
+            f"🔥 YOLOv8n model ready (gen {self.generation}): load {load_ms} ms, "
+            f"warmup {warmup_ms} ms, {path}"
+        )
+
+    def reload_if_changed(self) -> bool:
+        """Reload when the model file's mtime differs from the loaded one. Returns True if reloaded."""
+        if self._session is None:
+            return False
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return False
+        if mtime == self.file_mtime:
+            return False
+        logger.info(f"🔄 Model file changed, reloading {self.path}")
+        try:
+            self.load(self.path)
+        except Exception:
+            self.file_mtime = mtime  # don't retry the same broken file every poll
+            return False
+        return True
+
+    def status(self) -> dict:
+        return {
+            "state": self.state,
+            "ready": self.ready,
+            "path": self.path,
+            "generation": self.generation,
+            "loadedAt": self.loaded_at,
+            "loadMs": self.load_ms,
+            "warmupMs": self.warmup_ms,
+            "error": self.error,
+            "mode": "local",
+        }
+
+
+def _create_manager():
+    if INFERENCE_SOCKET:
+        from services.inference_server import RemoteModelManager
+        return RemoteModelManager(INFERENCE_SOCKET)
+    return ModelManager()
+
+
+_manager = _create_manager()
+
+
+def get_model_manager() -> ModelManager:
+    return _manager
+
+
+async def watch_model_file(interval: float = WATCH_SECONDS):
+    """Lifespan task: poll the model file and hot-swap when it changes."""
+    if interval <= 0 or INFERENCE_SOCKET:
+        return  # disabled, or the inference server watches the file
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(_manager.reload_if_changed)
+        except Exception as e:
+            logger.warning(f"⚠️ Model file watch failed: {e}")
@@ -0,0 +1,166 @@
+"""
+In-memory near-duplicate index over report photo perceptual hashes.
+
+Reports store a 64-bit pHash (`imageHash`, hex). Lookups use multi-index
+hashing: the hash is split into `max_distance + 1` disjoint bit chunks, and
+by the pigeonhole principle any hash within `max_distance` bits matches at
+least one chunk exactly. Candidates from the chunk buckets are then checked
+with a popcount, so a lookup touches a handful of dict buckets instead of
+every report.
+
+The index holds active reports only. It is loaded lazily from Firestore on
+first use and kept current by the report/cleaning/admin routes of this
+process. Other workers and instances cannot update it, so the scheduler
+rebuilds it every PHOTO_INDEX_REFRESH_SECONDS (services.jobs).
+"""
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+HASH_BITS = 64
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def _chunk_masks(chunks: int) -> list:
+    """(shift, mask) pairs splitting HASH_BITS into `chunks` near-equal pieces"""
+    masks = []
+    start = 0
+    for i in range(chunks):
+        width = HASH_BITS // chunks + (1 if i < HASH_BITS % chunks else 0)
+        masks.append((start, (1 << width) - 1))
+        start += width
+    return masks
+
+
+class PerceptualHashIndex:
+    def __init__(self, max_distance: int):
+        self.max_distance = max_distance
+        self._masks = _chunk_masks(max_distance + 1)
+        self._buckets = [dict() for _ in self._masks]
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def _keys(self, value: int):
+        return [(value >> shift) & mask for shift, mask in self._masks]
+
+    def add(self, item_id: str, image_hash: str):
+        value = int(image_hash, 16)
+        with self._lock:
+            self._remove_locked(item_id)
+            self._hashes[item_id] = value
+            for bucket, key in zip(self._buckets, self._keys(value)):
+                bucket.setdefault(key, set()).add(item_id)
+
+    def remove(self, item_id: str):
+        with self._lock:
+            self._remove_locked(item_id)
+
+    def _remove_locked(self, item_id: str):
+        value = self._hashes.pop(item_id, None)
+        if value is None:
+            return
+        for bucket, key in zip(self._buckets, self._keys(value)):
+            ids = bucket.get(key)
+            if ids:
+                ids.discard(item_id)
+                if not ids:
+                    del bucket[key]
+
+    def find(self, image_hash: str, max_distance: int = None) -> list:
+        """[(item_id, distance)] within max_distance (<= the index's), closest first"""
+        limit = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        value = int(image_hash, 16)
+        with self._lock:
+            candidates = set()
+            for bucket, key in zip(self._buckets, self._keys(value)):
+                candidates.update(bucket.get(key, ()))
+            matches = []
+            for item_id in candidates:
+                distance = hamming_distance(value, self._hashes[item_id])
+                if distance <= limit:
+                    matches.append((item_id, distance))
+        return sorted(matches, key=lambda m: m[1])
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def _load_index() -> PerceptualHashIndex:
+    from config import get_settings
+    from services.firebase_service import get_firestore_client
+    from google.cloud.firestore import FieldFilter
+
+    index = PerceptualHashIndex(get_settings().photo_duplicate_max_distance)
+    db = get_firestore_client()
+    query = (
+        db.collection("reports")
+        .where(filter=FieldFilter("status", "==", "active"))
+        .select(["imageHash"])
+    )
+    for doc in query.stream():
+        image_hash = (doc.to_dict() or {}).get("imageHash")
+        if image_hash:
+            index.add(doc.id, image_hash)
+    logger.info(f"🧬 Loaded photo hash index with {len(index)} active reports")
+    return index
+
+
+def get_photo_index():
+    """The process-wide index, loaded on first use (None if it cannot be loaded yet)"""
+    global _index
+    if _index is not None:
+        return _index
+    with _index_lock:
+        if _index is None:
+            try:
+                _index = _load_index()
+            except Exception as e:
+                logger.warning(f"⚠️ Photo hash index unavailable: {e}")
+                return None
+    return _index
+
+
+def find_duplicate_photo(image_hash: str):
+    """Closest active report whose photo is a near-duplicate, as (report_id, distance), or None"""
+    index = get_photo_index()
+    if index is None or not image_hash:
+        return None
+    matches = index.find(image_hash)
+    return matches[0] if matches else None
+
+
+def index_report_photo(report_id: str, image_hash: str):
+    """Register a new active report's photo hash"""
+    index = get_photo_index()
+    if index is not None and image_hash:
+        index.add(report_id, image_hash)
+
+
+def unindex_report_photo(report_id: str):
+    """Drop a report from the index (cleaned or deleted)"""
+    if _index is not None:
+        _index.remove(report_id)
+
+
+def refresh_photo_index() -> dict:
+    """Rebuild the index from Firestore and swap it in (picks up writes made by other processes)"""
+    global _index
+    index = _load_index()
+    with _index_lock:
+        _index = index
+    return {"reports": len(index)}
+
+
+def reset_photo_index():
+    """Forget the in-memory index; it is reloaded from Firestore on next use"""
+    global _index
+    with _index_lock:
+        _index = None
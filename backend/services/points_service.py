@@ -0,0 +1,347 @@
+"""
+Points ledger and per-user running totals.
+
+Every award is written once to the append-only `points_ledger` collection
+(id `report_{reportId}` / `cleaning_{reportId}`, created with a must-not-exist
+precondition) in the same atomic commit as the report or cleaning it pays for
+and as the running totals on `users/{userId}`:
+
+    points, reportingPoints, cleaningPoints, reportsCount, cleaningsCount
+
+Analytics read the user document and leaderboards query `users` ordered by
+the total (see firestore.indexes.json). Admin deletes append a reversal entry
+(`{entryId}_reversal`, negative points) instead of editing the ledger.
+Awards only ever increment the total fields; the profile's userType and name
+belong to registration and are never written from an award.
+reconcile_points() rebuilds everything from the reports and cleanings
+collections: it awards missing entries (backfill for data written before the
+ledger), reverses entries whose report/cleaning is gone and corrects any total
+that disagrees with the ledger.
+"""
+import logging
+from datetime import datetime, timezone
+
+from services.analytics_service import REPORT_POINTS
+
+logger = logging.getLogger(__name__)
+
+LEDGER_COLLECTION = "points_ledger"
+USERS_COLLECTION = "users"
+CLEANING_POINTS = {
+    "plastic": 10,
+    "organic": 20,
+    "mixed": 30,
+    "toxic": 50,
+    "sewage": 100,
+}
+DEFAULT_CLEANING_POINTS = 10
+TOTAL_FIELDS = ("points", "reportingPoints", "cleaningPoints", "reportsCount", "cleaningsCount")
+# ledger category -> (points total, count total)
+_CATEGORY_FIELDS = {
+    "reporting": ("reportingPoints", "reportsCount"),
+    "cleaning": ("cleaningPoints", "cleaningsCount"),
+}
+_WRITE_CHUNK = 400  # ledger entries per batch (plus one totals write per user)
+
+
+def cleaning_points(waste_type: str) -> int:
+    """Points for cleaning a report of `waste_type`"""
+    return CLEANING_POINTS.get(waste_type, DEFAULT_CLEANING_POINTS)
+
+
+def ledger_ref(db, entry_id: str):
+    return db.collection(LEDGER_COLLECTION).document(entry_id)
+
+
+def _entry(entry_id: str, category: str, source_id: str, data: dict, points: int, count: int = 1) -> dict:
+    return {
+        "entryId": entry_id,
+        "userId": data.get("userId"),
+        "userType": data.get("userType") or "individual",
+        "userName": data.get("userName"),
+        "category": category,
+        "sourceId": source_id,
+        "points": points,
+        "count": count,
+        "createdAt": datetime.now(timezone.utc),
+    }
+
+
+def _has_user(data: dict) -> bool:
+    return bool((data.get("userId") or "").strip())
+
+
+def report_points(report_data: dict) -> int:
+    """Points a new report earns its reporter (0 for anonymous reports)"""
+    return REPORT_POINTS if _has_user(report_data) else 0
+
+
+def report_award(report_id: str, report_data: dict):
+    """Ledger entry for a new report, or None for anonymous reports"""
+    if not _has_user(report_data):
+        return None
+    return _entry(f"report_{report_id}", "reporting", report_id, report_data, REPORT_POINTS)
+
+
+def cleaning_award(report_id: str, cleaning_data: dict):
+    """Ledger entry for cleaning `report_id`, or None when the cleaner is anonymous"""
+    if not _has_user(cleaning_data):
+        return None
+    return _entry(f"cleaning_{report_id}", "cleaning", report_id, cleaning_data, cleaning_data.get("pointsAwarded", 0))
+
+
+def _reversal(entry: dict) -> dict:
+    reversal = _entry(f"{entry['entryId']}_reversal", entry["category"], entry["sourceId"], entry,
+                      -entry.get("points", 0), -entry.get("count", 1))
+    reversal["reverses"] = entry["entryId"]
+    return reversal
+
+
+def _add_entry(totals: dict, entry: dict):
+    """Add a ledger entry's points and count to a {total field: value} dict"""
+    points_field, count_field = _CATEGORY_FIELDS[entry["category"]]
+    totals["points"] = totals.get("points", 0) + entry.get("points", 0)
+    totals[points_field] = totals.get(points_field, 0) + entry.get("points", 0)
+    totals[count_field] = totals.get(count_field, 0) + entry.get("count", 1)
+
+
+def _totals_update(entries: list) -> dict:
+    """userId -> totals increments for `entries` (total fields only)"""
+    from firebase_admin import firestore
+
+    sums = {}
+    for entry in entries:
+        _add_entry(sums.setdefault(entry["userId"], {}), entry)
+    return {
+        user_id: {field: firestore.Increment(value) for field, value in user.items()}
+        for user_id, user in sums.items()
+    }
+
+
+def stage_awards(db, writer, entries: list, existing_users=None):
+    """
+    Add ledger entries and the matching totals increments to `writer` (a
+    Transaction or WriteBatch, committed by the caller). Totals are written
+    once per user. With `existing_users`, totals are only written for those
+    user ids (used for reversals so deleted profiles are not recreated).
+    """
+    entries = [entry for entry in entries if entry]
+    for entry in entries:
+        writer.create(ledger_ref(db, entry["entryId"]), entry)
+    for user_id, update in _totals_update(entries).items():
+        if existing_users is None or user_id in existing_users:
+            writer.set(db.collection(USERS_COLLECTION).document(user_id), update, merge=True)
+
+
+def revoke_award(entry_id: str) -> bool:
+    """Append a reversal for `entry_id` (admin delete of its report/cleaning); False if there was nothing to revoke"""
+    from services.firebase_service import get_firestore_client, run_in_transaction
+
+    db = get_firestore_client()
+
+    def revoke(transaction):
+        original = ledger_ref(db, entry_id).get(transaction=transaction)
+        if not original.exists or ledger_ref(db, f"{entry_id}_reversal").get(transaction=transaction).exists:
+            return False
+        entry = original.to_dict()
+        user_exists = db.collection(USERS_COLLECTION).document(entry["userId"]).get(transaction=transaction).exists
+        stage_awards(db, transaction, [_reversal(entry)], {entry["userId"]} if user_exists else set())
+        return True
+
+    return run_in_transaction(revoke)
+
+
+def safe_revoke_award(entry_id: str) -> bool:
+    """revoke_award that never fails the calling request (the nightly reconciliation catches up)"""
+    try:
+        return revoke_award(entry_id)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not revoke points for {entry_id}: {str(e)}")
+        return False
+
+
+def add_report(report_data: dict) -> str:
+    """add_document("reports", ...) plus the reporter's award, in one transaction; returns the report id"""
+    from services.firebase_service import get_firestore_client, run_in_transaction
+
+    db = get_firestore_client()
+    ref = db.collection("reports").document()
+
+    def create(transaction):
+        transaction.set(ref, report_data)
+        stage_awards(db, transaction, [report_award(ref.id, report_data)])
+
+    run_in_transaction(create)
+    return ref.id
+
+
+def close_report(report_id: str, report_update: dict, cleaning_record: dict) -> bool:
+    """
+    Mark a report cleaned, add its `cleanings` record and award the cleaner,
+    in one transaction. False (nothing written) if the report is missing or
+    already cleaned.
+    """
+    from services.firebase_service import get_firestore_client, run_in_transaction
+
+    db = get_firestore_client()
+    report_ref = db.collection("reports").document(report_id)
+    cleaning_ref = db.collection("cleanings").document()
+
+    def close(transaction):
+        snapshot = report_ref.get(transaction=transaction)
+        if not snapshot.exists or (snapshot.to_dict() or {}).get("status") == "cleaned":
+            return False
+        transaction.update(report_ref, report_update)
+        transaction.set(cleaning_ref, cleaning_record)
+        stage_awards(db, transaction, [cleaning_award(report_id, cleaning_record)])
+        return True
+
+    return run_in_transaction(close)
+
+
+def get_user_totals(user_id: str) -> dict:
+    """Running totals for one user (zeros when they have none)"""
+    from services.firebase_service import get_firestore_client
+
+    snapshot = get_firestore_client().collection(USERS_COLLECTION).document(user_id).get(field_paths=list(TOTAL_FIELDS))
+    data = (snapshot.to_dict() if snapshot.exists else None) or {}
+    return {field: data.get(field) or 0 for field in TOTAL_FIELDS}
+
+
+def _commit_in_chunks(db, entries: list, existing_users=None) -> int:
+    from google.api_core.exceptions import AlreadyExists
+
+    for i in range(0, len(entries), _WRITE_CHUNK):
+        chunk = entries[i:i + _WRITE_CHUNK]
+        batch = db.batch()
+        stage_awards(db, batch, chunk, existing_users)
+        try:
+            batch.commit()
+        except AlreadyExists:
+            # A request awarded one of these meanwhile: write the rest one by one
+            for entry in chunk:
+                single = db.batch()
+                stage_awards(db, single, [entry], existing_users)
+                try:
+                    single.commit()
+                except AlreadyExists:
+                    pass
+    return len(entries)
+
+
+def _ledger_totals(entries) -> tuple:
+    """({userId: {total field: value}}, {userId: (userType, userName)}) summed over ledger entries (dicts)"""
+    totals, identities = {}, {}
+    for data in entries:
+        user_id = data.get("userId")
+        if not user_id or data.get("category") not in _CATEGORY_FIELDS:
+            continue
+        _add_entry(totals.setdefault(user_id, dict.fromkeys(TOTAL_FIELDS, 0)), data)
+        if not data.get("reverses"):
+            identities.setdefault(user_id, (data.get("userType"), data.get("userName")))
+    return totals, identities
+
+
+def _matches(stored: dict, totals: dict) -> bool:
+    return all((stored.get(field) or 0) == totals.get(field, 0) for field in TOTAL_FIELDS)
+
+
+def _rebuild_user_totals(db, user_id: str) -> bool:
+    """
+    Set one user's totals from their ledger entries, in a transaction. Every
+    award increments users/{userId} in the same commit as its ledger entry, so
+    reading the user document here makes a concurrent award retry this
+    instead of being overwritten. userType/name are only filled in when the
+    document has none (profile-less users). False if nothing needed writing.
+    """
+    from google.cloud.firestore import FieldFilter
+    from services.firebase_service import run_in_transaction
+
+    user_ref = db.collection(USERS_COLLECTION).document(user_id)
+    query = (
+        db.collection(LEDGER_COLLECTION)
+        .where(filter=FieldFilter("userId", "==", user_id))
+        .select(["userId", "userType", "userName", "category", "points", "count", "reverses"])
+    )
+
+    def rebuild(transaction):
+        snapshot = user_ref.get(transaction=transaction)
+        profile = (snapshot.to_dict() or {}) if snapshot.exists else None
+        totals, identities = _ledger_totals(doc.to_dict() or {} for doc in query.stream(transaction=transaction))
+        user_totals = totals.get(user_id, dict.fromkeys(TOTAL_FIELDS, 0))
+        if profile is None and not any(user_totals.values()):
+            return False  # no profile and nothing earned: don't create one
+        profile = profile or {}
+        update = {} if _matches(profile, user_totals) else dict(user_totals)
+        user_type, user_name = identities.get(user_id, (None, None))
+        if not profile.get("userType"):
+            update["userType"] = user_type or "individual"
+        if not (profile.get("name") or profile.get("ngoName")) and user_name:
+            update["name"] = user_name
+        if not update:
+            return False
+        transaction.set(user_ref, update, merge=True)
+        return True
+
+    return run_in_transaction(rebuild)
+
+
+def reconcile_points() -> dict:
+    """
+    Bring the ledger and totals in line with the reports/cleanings collections:
+    award missing entries, reverse orphaned ones, then correct every user's
+    totals that disagree with the ledger. Safe to run repeatedly (backfill +
+    nightly job) and alongside live awards.
+    """
+    from services.firebase_service import get_firestore_client
+
+    db = get_firestore_client()
+    ledger = {}  # entryId -> projected entry
+    for doc in db.collection(LEDGER_COLLECTION).select(
+            ["userId", "userType", "userName", "category", "sourceId", "points", "count", "reverses"]).stream():
+        ledger[doc.id] = doc.to_dict() or {}
+
+    live = set()
+    missing = []
+    for doc in db.collection("reports").select(["userId", "userType", "userName"]).stream():
+        entry = report_award(doc.id, doc.to_dict() or {})
+        if entry:
+            live.add(entry["entryId"])
+            if entry["entryId"] not in ledger:
+                missing.append(entry)
+    for doc in db.collection("cleanings").select(
+            ["reportId", "userId", "userType", "userName", "pointsAwarded"]).stream():
+        data = doc.to_dict() or {}
+        entry = cleaning_award(data.get("reportId") or doc.id, data)
+        if entry and entry["entryId"] not in live:
+            live.add(entry["entryId"])
+            if entry["entryId"] not in ledger:
+                missing.append(entry)
+
+    reversed_ids = {data.get("reverses") for data in ledger.values() if data.get("reverses")}
+    orphaned = [
+        _reversal({"entryId": entry_id, **data}) for entry_id, data in ledger.items()
+        if not data.get("reverses") and entry_id not in live and entry_id not in reversed_ids
+    ]
+
+    # Ledger writes only (no user ids match): the totals are corrected below
+    _commit_in_chunks(db, missing, set())
+    _commit_in_chunks(db, orphaned, set())
+
+    # Cheap pass to find the users whose totals disagree with the ledger; each of
+    # those is then rebuilt in its own transaction, so awards made while this
+    # runs are never overwritten by a stale sum
+    expected, _ = _ledger_totals(doc.to_dict() or {} for doc in db.collection(LEDGER_COLLECTION).select(
+        ["userId", "category", "points", "count", "reverses"]).stream())
+    stale = set()
+    profiles = set()
+    for doc in db.collection(USERS_COLLECTION).select([*TOTAL_FIELDS, "userType"]).stream():
+        data = doc.to_dict() or {}
+        profiles.add(doc.id)
+        if not data.get("userType") or not _matches(data, expected.get(doc.id, {})):
+            stale.add(doc.id)
+    stale.update(user_id for user_id in expected if user_id not in profiles)
+    writes = sum(_rebuild_user_totals(db, user_id) for user_id in sorted(stale))
+
+    logger.info(f"🏅 Points reconciled: {len(missing)} awarded, {len(orphaned)} reversed, {writes} users")
+    return {"awarded": len(missing), "reversed": len(orphaned), "users": writes}
@@ -0,0 +1,269 @@
+"""
+Bulk report ingestion for POST /reporting/report/batch.
+
+NGO patrols collect reports offline and submit them together once back in
+coverage. Instead of running the create_report path once per item, the batch
+runs each stage across all items, cheapest first, so rejected items drop out
+before the expensive stages:
+
+    1. geofence       one vectorized pass over all points (distances_to_river)
+    2. known location active reports within DUPLICATE_RADIUS_METERS, queried
+                      concurrently (bounded)
+    3. verification   the garbage cascade in worker threads, bounded by
+                      REPORT_BATCH_VERIFY_CONCURRENCY. The YOLO model takes one
+                      image per run, so this is parallel single-image inference
+                      (in multi-worker mode the inference server runs them)
+    4. in-batch dupes  near-duplicate photos and locations within the batch;
+                      the earliest item wins
+    5. upload         Cloudinary uploads, bounded by REPORT_BATCH_UPLOAD_CONCURRENCY
+    6. commit         Firestore batched writes (report + feature record + points
+                      ledger entry per item, one totals update per user), stats
+                      counter and analytics invalidation once per batch
+
+`ingest_reports` yields one result per item as soon as its outcome is known
+(rejections early, accepted items once their write batch commits), then a
+summary.
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_RADIUS_METERS = 100
+LOOKUP_CONCURRENCY = 8
+MAX_BATCH_WRITES = 500  # Firestore limit per batch
+
+
+def _reject(index: int, item: dict, message: str, **extra) -> dict:
+    return {"index": index, "clientId": item.get("clientId"), "success": False, "message": message, **extra}
+
+
+async def _bounded(limit: int, fn, args_list: list):
+    """Run blocking fn(*args) for every args tuple in worker threads, at most `limit`
+    at a time; yields (position, result) in completion order"""
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(position, args):
+        async with semaphore:
+            return position, await asyncio.to_thread(fn, *args)
+
+    for next_done in asyncio.as_completed([run(i, args) for i, args in enumerate(args_list)]):
+        yield await next_done
+
+
+def _known_location(latitude: float, longitude: float):
+    """Closest active report within DUPLICATE_RADIUS_METERS, or None (lookup errors count as none)"""
+    from services.location_service import find_nearby_active_reports
+
+    try:
+        nearby = find_nearby_active_reports(latitude, longitude, DUPLICATE_RADIUS_METERS)
+    except Exception as e:
+        logger.error(f"❌ Error checking duplicate location: {str(e)}")
+        return None
+    return nearby[0] if nearby else None
+
+
+def _batch_duplicates(indices: list, items: list, checks: dict) -> dict:
+    """{index: message} for items whose photo or location duplicates an earlier item in the batch"""
+    import numpy as np
+    from config import get_settings
+    from services.location_service import haversine_distances
+    from services.phash_index import PerceptualHashIndex
+
+    photos = PerceptualHashIndex(get_settings().photo_duplicate_max_distance)
+    kept = []
+    duplicates = {}
+    for index in sorted(indices):
+        item = items[index]
+        image_hash = checks[index].get("imageHash")
+        matches = photos.find(image_hash) if image_hash else []
+        if matches:
+            duplicates[index] = f"Same photo as batch item {matches[0][0]}"
+            continue
+        if kept:
+            distances = haversine_distances(
+                item["latitude"], item["longitude"],
+                [items[k]["latitude"] for k in kept], [items[k]["longitude"] for k in kept],
+            )
+            closest = int(np.argmin(distances))
+            if distances[closest] <= DUPLICATE_RADIUS_METERS:
+                duplicates[index] = f"This location already reported (batch item {kept[closest]})"
+                continue
+        kept.append(index)
+        if image_hash:
+            photos.add(index, image_hash)
+    return duplicates
+
+
+def _commit(entries: list) -> list:
+    """Write (report_data, features) pairs and the reporters' points in one Firestore batch; returns the new report ids"""
+    from services.firebase_service import get_firestore_client
+    from services.image_features import report_features_ref
+    from services.points_service import report_award, stage_awards
+
+    db = get_firestore_client()
+    collection = db.collection("reports")
+    batch = db.batch()
+    report_ids = []
+    awards = []
+    for report_data, features in entries:
+        ref = collection.document()
+        batch.set(ref, report_data)
+        if features:
+            batch.set(report_features_ref(ref), features)
+        awards.append(report_award(ref.id, report_data))
+        report_ids.append(ref.id)
+    stage_awards(db, batch, awards)
+    if report_ids:
+        batch.commit()
+    return report_ids
+
+
+def _commit_chunks(entries: list) -> list:
+    """Split entries so each Firestore batch stays within MAX_BATCH_WRITES"""
+    from services.points_service import report_points
+
+    chunks, chunk, writes = [], [], 0
+    for entry in entries:
+        # report, features, ledger entry and (at most) one totals write for its user
+        cost = (2 if entry[1] else 1) + (2 if report_points(entry[0]) else 0)
+        if chunk and writes + cost > MAX_BATCH_WRITES:
+            chunks.append(chunk)
+            chunk, writes = [], 0
+        chunk.append(entry)
+        writes += cost
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+async def ingest_reports(items: list, images: list):
+    """
+    Async generator over the per-item results of a report batch.
+    `items` are validated report dicts (latitude, longitude, wasteType, userId,
+    userName, userType, clientId), `images` the matching raw photo bytes.
+    """
+    from config import get_settings
+    from services.cloudinary_service import delete_image_from_cloudinary, upload_image_bytes
+    from services.geofence_service import check_geofence_batch
+    from services.image_verification import verify_garbage_image_sync
+    from services.location_service import encode_geohash
+    from services.phash_index import index_report_photo
+    from services.points_service import report_points
+    from services.response_cache import invalidate_analytics
+    from services.stats_service import safe_record_daily_event
+
+    settings = get_settings()
+    accepted = 0
+
+    # 1. Geofence, all points at once
+    geofence = check_geofence_batch([i["latitude"] for i in items], [i["longitude"] for i in items])
+    pending = []
+    for index, (item, check) in enumerate(zip(items, geofence)):
+        if check["allowed"]:
+            pending.append(index)
+        else:
+            yield _reject(index, item, check["message"])
+
+    # 2. Locations already reported
+    survivors = []
+    async for position, nearby in _bounded(
+        LOOKUP_CONCURRENCY, _known_location,
+        [(items[i]["latitude"], items[i]["longitude"]) for i in pending],
+    ):
+        index = pending[position]
+        if nearby:
+            yield _reject(index, items[index], "This location already reported", duplicateOf=nearby["id"])
+        else:
+            survivors.append(index)
+    pending = survivors
+
+    # 3. Garbage verification
+    verify_limit = settings.report_batch_verify_concurrency or os.cpu_count() or 1
+    checks = {}
+    async for position, check in _bounded(
+        verify_limit, verify_garbage_image_sync, [(images[i], True) for i in pending]
+    ):
+        index = pending[position]
+        if check["is_garbage"]:
+            checks[index] = check
+        else:
+            extra = {"duplicateOf": check["duplicate_of"]} if check.get("duplicate_of") else {}
+            yield _reject(index, items[index], check["message"], **extra)
+
+    # 4. Duplicates within the batch
+    duplicates = _batch_duplicates(list(checks), items, checks)
+    for index, message in sorted(duplicates.items()):
+        yield _reject(index, items[index], message)
+    pending = sorted(i for i in checks if i not in duplicates)
+
+    # 5. Uploads
+    uploads = {}
+    async for position, upload in _bounded(
+        settings.report_batch_upload_concurrency, upload_image_bytes,
+        [(images[i], "luit/reports") for i in pending],
+    ):
+        index = pending[position]
+        if upload["success"]:
+            uploads[index] = upload
+        else:
+            yield _reject(index, items[index], upload["message"])
+    pending = sorted(uploads)
+
+    # 6. Firestore writes
+    entries = []
+    for index in pending:
+        item, check, upload = items[index], checks[index], uploads[index]
+        waste_type = item["wasteType"]
+        if not waste_type or waste_type == "mixed":
+            waste_type = check.get("wasteType", "mixed")
+        report_data = {
+            "latitude": item["latitude"],
+            "longitude": item["longitude"],
+            "geohash": encode_geohash(item["latitude"], item["longitude"]),
+            "wasteType": waste_type,
+            "imageUrl": upload["url"],
+            "imagePublicId": upload["public_id"],
+            "imageHash": check.get("imageHash"),
+            "userId": item.get("userId"),
+            "userName": item.get("userName") or "Anonymous",
+            "userType": item.get("userType") or "individual",
+            "createdAt": datetime.now().isoformat(),
+            "status": "active",
+            "verified": True
+        }
+        entries.append((index, report_data, check.get("features")))
+
+    position = 0
+    for chunk in _commit_chunks([(data, features) for _, data, features in entries]):
+        chunk_entries = entries[position:position + len(chunk)]
+        position += len(chunk)
+        try:
+            report_ids = await asyncio.to_thread(_commit, chunk)
+        except Exception as e:
+            logger.error(f"❌ Batch report write failed ({len(chunk)} reports): {str(e)}")
+            for index, report_data, _ in chunk_entries:
+                await delete_image_from_cloudinary(report_data["imagePublicId"])
+                yield _reject(index, items[index], f"Could not save report: {str(e)}")
+            continue
+
+        for report_id, (index, report_data, _) in zip(report_ids, chunk_entries):
+            if report_data["imageHash"]:
+                index_report_photo(report_id, report_data["imageHash"])
+            accepted += 1
+            yield {
+                "index": index,
+                "clientId": items[index].get("clientId"),
+                "success": True,
+                "reportId": report_id,
+                "points": report_points(report_data),
+                "imageUrl": report_data["imageUrl"],
+            }
+        safe_record_daily_event("reports", chunk_entries[0][1]["createdAt"], amount=len(report_ids))
+
+    if accepted:
+        invalidate_analytics()
+    logger.info(f"📦 Report batch: {accepted}/{len(items)} accepted")
+    yield {"done": True, "total": len(items), "accepted": accepted, "rejected": len(items) - accepted}
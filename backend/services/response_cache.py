@@ -0,0 +1,264 @@
+"""
+Response cache middleware for read-heavy GET endpoints (analytics, leaderboards).
+
+- Per-route TTLs (CACHE_RULES), in-memory LRU store with a size cap
+- Single-flight: concurrent misses for the same URL share one computation
+- Strong ETags with 304 Not Modified, plus Cache-Control headers
+- Writes call invalidate_cache(prefix) to drop affected entries
+- refresh_hot_entries() recomputes recently requested entries shortly before
+  they expire (scheduled cache-warming job), so hot paths rarely miss
+
+Must be installed inside CORSMiddleware so cached bodies never carry
+another origin's CORS headers.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from urllib.parse import parse_qsl, urlencode
+import hashlib
+import logging
+import time
+import weakref
+
+from services.metrics import CACHE_REQUESTS
+from services.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CacheRule:
+    prefix: str
+    ttl: float          # seconds the server keeps the response
+    max_age: int = 0    # seconds clients may reuse it without revalidating
+
+
+CACHE_RULES = [
+    CacheRule("/analytics/global", ttl=30, max_age=10),
+    CacheRule("/analytics/leaderboard/", ttl=60, max_age=10),
+    CacheRule("/analytics/time-buckets", ttl=60, max_age=30),
+    CacheRule("/analytics/time-series", ttl=300, max_age=60),
+]
+
+MAX_ENTRIES = 256
+MAX_BODY_BYTES = 1024 * 1024
+HOT_SECONDS = 300  # keys requested within this window are kept warm
+
+
+@dataclass
+class CachedResponse:
+    status: int
+    headers: list
+    body: bytes
+    etag: str
+    expires_at: float
+    max_age: int
+
+
+class TTLCache:
+    """Size-capped LRU map whose entries expire after a per-entry TTL."""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._last_requested = {}  # key -> monotonic time of the last client request
+        self.generation = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def touch(self, key):
+        """Record a client request for key (refreshes don't count)"""
+        self._last_requested[key] = time.monotonic()
+
+    def hot_keys(self, expiring_within: float, hot_seconds: float = HOT_SECONDS) -> list:
+        """Keys requested in the last hot_seconds that are missing or expire within expiring_within"""
+        now = time.monotonic()
+        for key in [k for k, t in self._last_requested.items() if t < now - hot_seconds]:
+            del self._last_requested[key]
+        hot = []
+        for key in self._last_requested:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= now + expiring_within:
+                hot.append(key)
+        return hot
+
+    def invalidate_prefix(self, prefix: str = "") -> int:
+        """Drop entries whose key starts with prefix. Bumps the generation so
+        computations already in flight don't store a stale result."""
+        self.generation += 1
+        stale = [k for k in self._entries if k.startswith(prefix)]
+        for k in stale:
+            del self._entries[k]
+        return len(stale)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_store = TTLCache()
+_single_flight = SingleFlight()
+_middlewares = weakref.WeakSet()  # instances using the shared store (refresh_hot_entries)
+
+
+def invalidate_cache(*prefixes: str) -> int:
+    """Invalidate cached responses under the given path prefixes (all when none given)"""
+    dropped = 0
+    for prefix in prefixes or ("",):
+        dropped += _store.invalidate_prefix(prefix)
+    return dropped
+
+
+def invalidate_analytics():
+    """Drop cached analytics/leaderboard responses after a write"""
+    return invalidate_cache("/analytics/")
+
+
+def _make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match uses weak comparison (RFC 9110 13.1.2)"""
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class ResponseCacheMiddleware:
+    def __init__(self, app, rules=None, store: TTLCache = None):
+        self.app = app
+        self.rules = rules or CACHE_RULES
+        self.store = store or _store
+        self.single_flight = _single_flight if store is None else SingleFlight()
+        if store is None:
+            _middlewares.add(self)
+
+    def _match(self, path: str):
+        for rule in self.rules:
+            if path.startswith(rule.prefix):
+                return rule
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        rule = self._match(scope["path"])
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        query = urlencode(sorted(parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True)))
+        key = scope["path"] + ("?" + query if query else "")
+
+        self.store.touch(key)
+        entry = self.store.get(key)
+        cache_status = "HIT"
+        if entry is None:
+            entry, shared = await self.single_flight.do(key, lambda: self._compute(scope, receive, key, rule))
+            cache_status = "COALESCED" if shared else "MISS"
+        CACHE_REQUESTS.inc(cache="response", result=cache_status.lower())
+
+        request_headers = dict(scope.get("headers") or [])
+        if_none_match = request_headers.get(b"if-none-match", b"").decode("latin-1")
+        if entry.status == 200 and if_none_match and _etag_matches(if_none_match, entry.etag):
+            await self._send(send, 304, self._cache_headers(entry, cache_status), b"")
+            return
+
+        headers = [(k, v) for k, v in entry.headers if k.lower() not in (b"content-length", b"etag", b"cache-control")]
+        if entry.status == 200:
+            headers += self._cache_headers(entry, cache_status)
+        headers.append((b"content-length", str(len(entry.body)).encode()))
+        await self._send(send, entry.status, headers, entry.body)
+
+    def _cache_headers(self, entry: CachedResponse, cache_status: str) -> list:
+        cache_control = f"public, max-age={entry.max_age}" if entry.max_age > 0 else "no-cache"
+        return [
+            (b"etag", entry.etag.encode()),
+            (b"cache-control", cache_control.encode()),
+            (b"x-cache", cache_status.encode()),
+        ]
+
+    async def _compute(self, scope, receive, key: str, rule: CacheRule) -> CachedResponse:
+        generation = self.store.generation
+        start = {}
+        chunks = []
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+
+        body = b"".join(chunks)
+        entry = CachedResponse(
+            status=start.get("status", 500),
+            headers=list(start.get("headers", [])),
+            body=body,
+            etag=_make_etag(body),
+            expires_at=time.monotonic() + rule.ttl,
+            max_age=rule.max_age,
+        )
+        # Only successful, reasonably sized responses that weren't invalidated meanwhile
+        if entry.status == 200 and len(body) <= MAX_BODY_BYTES and generation == self.store.generation:
+            self.store.set(key, entry)
+        return entry
+
+    @staticmethod
+    async def _send(send, status: int, headers: list, body: bytes):
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+async def refresh_hot_entries(app, expiring_within: float) -> dict:
+    """
+    Recompute cached responses that clients requested recently and that expire
+    within `expiring_within` seconds. Runs the request through the cache
+    middleware's inner app (no client, metrics or CORS layers).
+    """
+    middleware = next(iter(_middlewares), None)
+    if middleware is None:
+        return {"refreshed": 0}  # app has not served a request yet
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    refreshed = 0
+    for key in _store.hot_keys(expiring_within):
+        path, _, query = key.partition("?")
+        rule = middleware._match(path)
+        if rule is None:
+            continue
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+            "query_string": query.encode(), "root_path": "", "headers": [],
+            "client": None, "server": None, "app": app,
+        }
+        try:
+            await middleware.single_flight.do(key, lambda: middleware._compute(scope, receive, key, rule))
+            refreshed += 1
+        except Exception as e:
+            logger.warning(f"⚠️ Cache refresh failed for {key}: {e}")
+    return {"refreshed": refreshed}
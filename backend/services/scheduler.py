@@ -0,0 +1,394 @@
+"""
+In-process scheduler for periodic maintenance jobs.
+
+Started from the FastAPI lifespan (main.py). Each job has a trigger:
+
+    IntervalTrigger(seconds, jitter)   every `seconds`, +/- up to `jitter` seconds
+    CronTrigger("m h dom mon dow", jitter)
+                                        5-field cron in UTC (*, lists, ranges, steps)
+
+Jitter spreads workers and instances that start at the same moment.
+
+Every API worker (and every instance) runs the scheduler, so jobs that touch
+shared state are `cluster` jobs: before running they take a lease document in
+the `scheduler_leases` collection (Firestore transaction). The lease is held
+while the job runs and records when it last ran, so a job whose timer fires on
+several workers runs once per period. Per-process jobs (cache warming) skip
+the lease.
+
+Blocking job functions run in a worker thread; coroutine functions are awaited.
+A thread cannot be cancelled, so when a blocking job times out it is marked
+"timeout" but stays running: the lease is renewed until the thread returns,
+and only then released, so no other worker starts a second copy meanwhile.
+A job never overlaps itself within a process. GET /admin/jobs shows status.
+"""
+import asyncio
+import inspect
+import logging
+import os
+import random
+import socket
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+LEASE_COLLECTION = "scheduler_leases"
+CRON_SEARCH_DAYS = 366 * 4  # "29 2 29 2 *" needs up to four years
+OVERRUN_RENEW_SECONDS = 60  # lease renewal period while a timed-out job's thread is still running
+
+
+# --- triggers -----------------------------------------------------------------
+
+class IntervalTrigger:
+    def __init__(self, seconds: float, jitter: float = 0.0):
+        if seconds <= 0:
+            raise ValueError("Interval must be positive")
+        self.seconds = seconds
+        self.jitter = jitter
+
+    def min_gap(self) -> float:
+        """Runs closer together than this are the same period (lease check)"""
+        return self.seconds * 0.5
+
+    def next_after(self, now: datetime) -> datetime:
+        return now + timedelta(seconds=self.seconds)
+
+    def describe(self) -> str:
+        return f"every {self.seconds:g}s"
+
+
+def _parse_cron_field(spec: str, low: int, high: int) -> frozenset:
+    values = set()
+    for part in spec.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+            if step <= 0:
+                raise ValueError(f"Invalid cron step: {step_text}")
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start_text, end_text = part.split("-", 1)
+            start, end = int(start_text), int(end_text)
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if start < low or end > high or start > end:
+            raise ValueError(f"Cron field out of range {low}-{high}: {spec}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronTrigger:
+    """Standard 5-field cron expression evaluated in UTC (day-of-week 0-6 = Sunday-Saturday, 7 = Sunday)"""
+
+    def __init__(self, expression: str, jitter: float = 0.0):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression}")
+        self.expression = expression
+        self.jitter = jitter
+        self.minutes = _parse_cron_field(fields[0], 0, 59)
+        self.hours = _parse_cron_field(fields[1], 0, 23)
+        self.days = _parse_cron_field(fields[2], 1, 31)
+        self.months = _parse_cron_field(fields[3], 1, 12)
+        self.weekdays = frozenset(d % 7 for d in _parse_cron_field(fields[4], 0, 7))
+        # Like cron: when both day fields are restricted, either may match
+        self._any_day = fields[2] == "*" or fields[4] == "*"
+        self._days_restricted = fields[2] != "*"
+        self._weekdays_restricted = fields[4] != "*"
+
+    def _day_matches(self, day: datetime) -> bool:
+        dom = day.day in self.days
+        dow = (day.weekday() + 1) % 7 in self.weekdays
+        if self._any_day:
+            return (dom or not self._days_restricted) and (dow or not self._weekdays_restricted)
+        return dom or dow
+
+    def next_after(self, now: datetime) -> datetime:
+        candidate = now.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = now + timedelta(days=CRON_SEARCH_DAYS)
+        while candidate <= limit:
+            if candidate.month not in self.months or not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+                continue
+            if candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+                continue
+            return candidate
+        raise ValueError(f"Cron expression never matches: {self.expression}")
+
+    def min_gap(self) -> float:
+        """Half the gap between the next two fire times (lease check)"""
+        first = self.next_after(datetime.now(timezone.utc))
+        return (self.next_after(first) - first).total_seconds() * 0.5
+
+    def describe(self) -> str:
+        return f"cron {self.expression} (UTC)"
+
+
+# --- cluster lease --------------------------------------------------------------
+
+class FirestoreLease:
+    """
+    One lease document per job: {holder, expiresAt, lastRunAt, lastStatus}.
+    acquire() succeeds when nobody holds an unexpired lease and the job did not
+    run within `min_gap` seconds (another worker already ran this period).
+    """
+
+    def __init__(self, holder: str):
+        self.holder = holder
+
+    def _ref(self, name: str):
+        from services.firebase_service import get_firestore_client
+        return get_firestore_client().collection(LEASE_COLLECTION).document(name)
+
+    def acquire(self, name: str, ttl: float, min_gap: float, force: bool = False) -> bool:
+        from services.firebase_service import run_in_transaction
+
+        ref = self._ref(name)
+
+        def claim(transaction):
+            now = datetime.now(timezone.utc)
+            snapshot = ref.get(transaction=transaction)
+            data = (snapshot.to_dict() or {}) if snapshot.exists else {}
+            expires_at = data.get("expiresAt")
+            if data.get("holder") not in (None, self.holder) and expires_at and expires_at > now:
+                return False
+            last_run = data.get("lastRunAt")
+            if not force and last_run and last_run > now - timedelta(seconds=min_gap):
+                return False
+            transaction.set(ref, {
+                **data,
+                "holder": self.holder,
+                "expiresAt": now + timedelta(seconds=ttl),
+                "lastRunAt": now,
+            })
+            return True
+
+        return run_in_transaction(claim)
+
+    def renew(self, name: str, ttl: float) -> bool:
+        """Extend a lease this holder still owns by `ttl` seconds from now"""
+        from services.firebase_service import run_in_transaction
+
+        ref = self._ref(name)
+
+        def extend(transaction):
+            snapshot = ref.get(transaction=transaction)
+            if not snapshot.exists or (snapshot.to_dict() or {}).get("holder") != self.holder:
+                return False
+            transaction.update(ref, {"expiresAt": datetime.now(timezone.utc) + timedelta(seconds=ttl)})
+            return True
+
+        return run_in_transaction(extend)
+
+    def release(self, name: str, status: str):
+        self._ref(name).set({
+            "holder": None,
+            "expiresAt": datetime.now(timezone.utc),
+            "lastStatus": status,
+            "lastHolder": self.holder,
+        }, merge=True)
+
+
+# --- jobs ---------------------------------------------------------------------------
+
+@dataclass
+class Job:
+    name: str
+    fn: object
+    trigger: object
+    cluster: bool = True        # take the Firestore lease (run once per period across workers)
+    timeout: float = 600.0
+    description: str = ""
+    # runtime state
+    next_run: datetime = None
+    last_started: datetime = None
+    last_finished: datetime = None
+    last_duration_ms: float = None
+    last_status: str = "pending"   # pending | running | ok | error | timeout | skipped
+    last_error: str = None
+    runs: int = 0
+    failures: int = 0
+    skips: int = 0
+    running: bool = field(default=False, repr=False)
+
+    def status(self) -> dict:
+        iso = lambda dt: dt.isoformat() if dt else None
+        return {
+            "name": self.name,
+            "description": self.description,
+            "trigger": self.trigger.describe(),
+            "cluster": self.cluster,
+            "running": self.running,
+            "nextRun": iso(self.next_run),
+            "lastStarted": iso(self.last_started),
+            "lastFinished": iso(self.last_finished),
+            "lastDurationMs": self.last_duration_ms,
+            "lastStatus": self.last_status,
+            "lastError": self.last_error,
+            "runs": self.runs,
+            "failures": self.failures,
+            "skips": self.skips,
+        }
+
+
+class Scheduler:
+    def __init__(self, lease=None):
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.lease = lease or FirestoreLease(self.holder)
+        self.jobs = {}
+        self._tasks = {}
+        self.started_at = None
+
+    def add_job(self, name: str, fn, trigger, **options) -> Job:
+        if name in self.jobs:
+            raise ValueError(f"Duplicate job: {name}")
+        job = Job(name=name, fn=fn, trigger=trigger, **options)
+        self.jobs[name] = job
+        return job
+
+    def start(self):
+        self.started_at = datetime.now(timezone.utc)
+        for job in self.jobs.values():
+            self._tasks[job.name] = asyncio.create_task(self._loop(job), name=f"job:{job.name}")
+        logger.info(f"⏰ Scheduler started with {len(self.jobs)} job(s) ({self.holder})")
+
+    async def stop(self):
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+
+    async def _loop(self, job: Job):
+        while True:
+            now = datetime.now(timezone.utc)
+            delay = random.uniform(-job.trigger.jitter, job.trigger.jitter) if job.trigger.jitter else 0.0
+            job.next_run = job.trigger.next_after(now) + timedelta(seconds=delay)
+            await asyncio.sleep(max(0.0, (job.next_run - datetime.now(timezone.utc)).total_seconds()))
+            await self.run_job(job)
+
+    async def run_job(self, job: Job, force: bool = False) -> dict:
+        """Run a job now (unless already running here or, for cluster jobs, elsewhere/recently)"""
+        if job.running:
+            job.skips += 1
+            return {**job.status(), "result": "already running"}
+        if job.cluster:
+            try:
+                acquired = await asyncio.to_thread(
+                    self.lease.acquire, job.name, job.timeout, job.trigger.min_gap(), force
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ Job {job.name}: could not take the lease: {e}")
+                job.skips += 1
+                return {**job.status(), "result": f"lease error: {e}"}
+            if not acquired:
+                logger.debug("⏭️  Job %s ran recently or is running elsewhere", job.name)
+                job.skips += 1
+                return {**job.status(), "result": "skipped"}
+
+        job.running = True
+        job.last_status = "running"
+        job.last_started = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        worker = None
+        try:
+            if inspect.iscoroutinefunction(job.fn):
+                result = await asyncio.wait_for(job.fn(), job.timeout)
+            else:
+                # Shielded: on timeout the thread keeps running and is waited for in _hold_overrun
+                worker = asyncio.ensure_future(asyncio.to_thread(job.fn))
+                result = await asyncio.wait_for(asyncio.shield(worker), job.timeout)
+            job.last_status = "ok"
+            job.last_error = None
+            logger.debug("✅ Job %s finished: %s", job.name, result)
+        except asyncio.TimeoutError:
+            result = None
+            job.last_status = "timeout"
+            job.last_error = f"timed out after {job.timeout:g}s"
+            job.failures += 1
+            logger.error(f"❌ Job {job.name} timed out after {job.timeout:g}s")
+        except Exception as e:
+            result = None
+            job.last_status = "error"
+            job.last_error = str(e)
+            job.failures += 1
+            logger.error(f"❌ Job {job.name} failed: {e}")
+        finally:
+            job.runs += 1
+            job.last_finished = datetime.now(timezone.utc)
+            job.last_duration_ms = round((time.perf_counter() - start) * 1000, 1)
+            if worker is not None and not worker.done():
+                self._tasks[f"overrun:{job.name}"] = asyncio.create_task(
+                    self._hold_overrun(job, worker), name=f"job-overrun:{job.name}"
+                )
+            else:
+                job.running = False
+                await self._release(job)
+        return {**job.status(), "result": result}
+
+    async def _release(self, job: Job):
+        if not job.cluster:
+            return
+        try:
+            await asyncio.to_thread(self.lease.release, job.name, job.last_status)
+        except Exception as e:
+            logger.warning(f"⚠️ Job {job.name}: could not release the lease: {e}")
+
+    async def _hold_overrun(self, job: Job, worker):
+        """Keep a timed-out job running (and its lease renewed) until its thread returns"""
+        try:
+            while not worker.done():
+                if job.cluster:
+                    try:
+                        await asyncio.to_thread(self.lease.renew, job.name, 2 * OVERRUN_RENEW_SECONDS)
+                    except Exception as e:
+                        logger.warning(f"⚠️ Job {job.name}: could not renew the lease: {e}")
+                await asyncio.wait({worker}, timeout=OVERRUN_RENEW_SECONDS)
+            error = worker.exception()
+            logger.warning(f"⚠️ Job {job.name} thread finished after its timeout" + (f" with error: {error}" if error else ""))
+            await self._release(job)
+        finally:
+            job.running = False
+            self._tasks.pop(f"overrun:{job.name}", None)
+
+    def status(self) -> dict:
+        return {
+            "holder": self.holder,
+            "startedAt": self.started_at.isoformat() if self.started_at else None,
+            "jobs": [job.status() for job in self.jobs.values()],
+        }
+
+
+_scheduler = None
+
+
+def get_scheduler():
+    """The process-wide scheduler (None until started from the lifespan)"""
+    return _scheduler
+
+
+def start_scheduler(app) -> Scheduler:
+    global _scheduler
+    from services.jobs import register_jobs
+
+    scheduler = Scheduler()
+    register_jobs(scheduler, app)
+    scheduler.start()
+    _scheduler = scheduler
+    return scheduler
+
+
+async def stop_scheduler():
+    global _scheduler
+    if _scheduler is not None:
+        await _scheduler.stop()
+        _scheduler = None
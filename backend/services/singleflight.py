@@ -0,0 +1,38 @@
+"""
+Single-flight request coalescing: concurrent callers asking for the same key
+share one in-flight computation instead of each running it.
+"""
+import asyncio
+from typing import Awaitable, Callable
+
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight = {}
+
+    async def do(self, key, fn: Callable[[], Awaitable]):
+        """Run `fn` for `key` unless a call for `key` is already running; then await that one.
+        Returns (result, shared) where shared is True for callers that joined an existing call.
+        """
+        future = self._inflight.get(key)
+        if future is not None:
+            return await asyncio.shield(future), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await fn()
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+                # Mark retrieved so a failure nobody else waited on isn't logged as unhandled
+                future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            self._inflight.pop(key, None)
+
+    def inflight(self, key) -> bool:
+        return key in self._inflight
@@ -0,0 +1,186 @@
+"""
+Per-day activity counters for analytics.
+
+Every report/cleaning write increments a counter document in `stats_daily`
+(one document per UTC day, id = "YYYY-MM-DD"), so time-bucket analytics only
+read the handful of day documents in the requested range instead of scanning
+the reports and cleanings collections.
+"""
+from datetime import date, datetime, timedelta, timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+DAILY_STATS_COLLECTION = "stats_daily"
+COUNTER_KINDS = ("reports", "cleanings")
+GRANULARITIES = ("daily", "weekly", "monthly")
+
+
+def as_dt(val, fallback: datetime) -> datetime:
+    """Parse a stored timestamp (datetime, epoch millis or ISO string) as an aware UTC datetime"""
+    try:
+        if val is None:
+            return fallback
+        if isinstance(val, datetime):
+            return val if val.tzinfo else val.replace(tzinfo=timezone.utc)
+        if isinstance(val, (int, float)):
+            # Support epoch millis
+            return datetime.fromtimestamp(val / 1000.0, tz=timezone.utc)
+        if isinstance(val, str):
+            try:
+                dt = datetime.fromisoformat(val)
+                return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+            except Exception:
+                return fallback
+        return fallback
+    except Exception:
+        return fallback
+
+
+def day_key(value) -> str:
+    """Counter document id for a timestamp or date"""
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return value.isoformat()
+    return as_dt(value, datetime.now(timezone.utc)).astimezone(timezone.utc).date().isoformat()
+
+
+def record_daily_event(kind: str, when=None, amount: int = 1):
+    """Increment the `kind` counter ("reports" or "cleanings") for the day of `when`"""
+    from firebase_admin import firestore
+    from services.firebase_service import get_firestore_client
+
+    if kind not in COUNTER_KINDS:
+        raise ValueError(f"Unknown counter kind: {kind}")
+    key = day_key(when)
+    db = get_firestore_client()
+    db.collection(DAILY_STATS_COLLECTION).document(key).set(
+        {"date": key, kind: firestore.Increment(amount)},
+        merge=True
+    )
+
+
+def safe_record_daily_event(kind: str, when=None, amount: int = 1):
+    """record_daily_event that never fails the calling request"""
+    try:
+        record_daily_event(kind, when, amount)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not update daily {kind} counter: {str(e)}")
+
+
+def get_daily_counts(start: date, end: date) -> dict:
+    """Read counter documents for start..end (inclusive). Returns {"YYYY-MM-DD": {"reports": n, "cleanings": n}}"""
+    from google.cloud.firestore import FieldFilter
+    from services.firebase_service import get_firestore_client
+
+    db = get_firestore_client()
+    query = (
+        db.collection(DAILY_STATS_COLLECTION)
+        .where(filter=FieldFilter("date", ">=", start.isoformat()))
+        .where(filter=FieldFilter("date", "<=", end.isoformat()))
+    )
+    counts = {}
+    for doc in query.stream():
+        data = doc.to_dict() or {}
+        counts[data.get("date", doc.id)] = {kind: int(data.get(kind, 0) or 0) for kind in COUNTER_KINDS}
+    return counts
+
+
+def sum_counts(counts: dict, start: date, end: date) -> dict:
+    """Total each counter kind over start..end (inclusive)"""
+    lo, hi = start.isoformat(), end.isoformat()
+    totals = {kind: 0 for kind in COUNTER_KINDS}
+    for key, day in counts.items():
+        if lo <= key <= hi:
+            for kind in COUNTER_KINDS:
+                totals[kind] += day.get(kind, 0)
+    return totals
+
+
+def period_start(day: date, granularity: str) -> date:
+    """First day of the bucket containing `day` (weeks start on Monday)"""
+    if granularity == "weekly":
+        return day - timedelta(days=day.weekday())
+    if granularity == "monthly":
+        return day.replace(day=1)
+    return day
+
+
+def build_series(counts: dict, start: date, end: date, granularity: str = "daily") -> list:
+    """Zero-filled series of buckets between start and end from daily counts"""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+
+    buckets = {}
+    day = start
+    while day <= end:
+        bucket = period_start(day, granularity).isoformat()
+        if bucket not in buckets:
+            buckets[bucket] = {"period": bucket, **{kind: 0 for kind in COUNTER_KINDS}}
+        for kind in COUNTER_KINDS:
+            buckets[bucket][kind] += counts.get(day.isoformat(), {}).get(kind, 0)
+        day += timedelta(days=1)
+    return list(buckets.values())
+
+
+def _reconcile_day(db, key: str, actual: dict) -> bool:
+    """Set one day's counters to `actual` unless they already match; False if nothing was written"""
+    from services.firebase_service import run_in_transaction
+
+    ref = db.collection(DAILY_STATS_COLLECTION).document(key)
+    values = {k: actual.get(k, 0) for k in COUNTER_KINDS}
+
+    def reconcile(transaction):
+        snapshot = ref.get(transaction=transaction)
+        stored = (snapshot.to_dict() or {}) if snapshot.exists else {}
+        if all((stored.get(k) or 0) == values[k] for k in COUNTER_KINDS):
+            return False
+        transaction.set(ref, {"date": key, **values}, merge=True)
+        return True
+
+    return run_in_transaction(reconcile)
+
+
+def backfill_daily_stats(include_today: bool = True) -> dict:
+    """
+    Reconcile every day counter with the reports and cleanings collections.
+    Used once to seed counters for existing data and for periodic reconciliation.
+
+    After the tally, each day whose counters disagree is re-read and rewritten
+    in its own transaction, so an increment landing during the write makes it
+    retry rather than being lost. An event recorded after the tally passed it
+    but before its day is rewritten is still dropped from that counter until
+    the next run; new events land on the current UTC day, so the scheduled job
+    passes include_today=False and leaves today to the live increments.
+    Returns the number of day documents corrected.
+    """
+    from services.firebase_service import get_firestore_client
+
+    db = get_firestore_client()
+    now = datetime.now(timezone.utc)
+    counts = {}
+
+    def tally(collection: str, kind: str, fields: list):
+        for doc in db.collection(collection).select(fields).stream():
+            data = doc.to_dict() or {}
+            value = next((data.get(f) for f in fields if data.get(f)), None)
+            key = day_key(as_dt(value, getattr(doc, "create_time", None) or now))
+            counts.setdefault(key, {k: 0 for k in COUNTER_KINDS})[kind] += 1
+
+    tally("reports", "reports", ["createdAt"])
+    tally("cleanings", "cleanings", ["cleanedAt", "createdAt"])
+
+    # Cheap pass to find the days that disagree; days with stored counts but no
+    # activity left are brought back to zero (e.g. after admin deletes)
+    stale, stored = set(), set()
+    for doc in db.collection(DAILY_STATS_COLLECTION).stream():
+        stored.add(doc.id)
+        data = doc.to_dict() or {}
+        actual = counts.get(doc.id, {})
+        if any((data.get(k) or 0) != actual.get(k, 0) for k in COUNTER_KINDS):
+            stale.add(doc.id)
+    stale.update(key for key in counts if key not in stored)
+    if not include_today:
+        stale.discard(day_key(now))
+
+    written = sum(_reconcile_day(db, key, counts.get(key, {})) for key in sorted(stale))
+    return {"days": written}
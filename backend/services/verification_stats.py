@@ -0,0 +1,63 @@
+"""
+Per-tier exit counters for the garbage verification cascade.
+
+Each call to verify_garbage_image exits at exactly one tier with an outcome
+(e.g. tier 0 "dark_frame", tier 2 "yolo_detected"). Counters are in-memory
+and per process; they reset on restart. Exits are also exported on /metrics
+(luit_verification_exits_total), which the admin reset does not clear.
+"""
+import threading
+from collections import Counter
+from datetime import datetime
+
+from services.metrics import VERIFICATION_EXITS
+
+TIER_NAMES = {
+    0: "cheap checks",
+    1: "thumbnail heuristic",
+    2: "YOLO model",
+}
+
+_lock = threading.Lock()
+_exits = Counter()
+_since = datetime.now().isoformat()
+
+
+def record_exit(tier: int, outcome: str):
+    with _lock:
+        _exits[(tier, outcome)] += 1
+    VERIFICATION_EXITS.inc(tier=tier, outcome=outcome)
+
+
+def get_cascade_stats() -> dict:
+    """Totals, per-tier outcome counts and the share of requests that reached the model"""
+    with _lock:
+        exits = dict(_exits)
+
+    total = sum(exits.values())
+    tiers = {}
+    for tier, name in TIER_NAMES.items():
+        outcomes = {outcome: n for (t, outcome), n in exits.items() if t == tier}
+        count = sum(outcomes.values())
+        tiers[str(tier)] = {
+            "name": name,
+            "exits": count,
+            "share": round(count / total, 4) if total else 0.0,
+            "outcomes": outcomes,
+        }
+
+    reached_model = tiers["2"]["exits"]
+    return {
+        "since": _since,
+        "total": total,
+        "reachedModel": reached_model,
+        "reachedModelShare": round(reached_model / total, 4) if total else 0.0,
+        "tiers": tiers,
+    }
+
+
+def reset_cascade_stats():
+    global _since
+    with _lock:
+        _exits.clear()
+        _since = datetime.now().isoformat()
@@ -33,6 +33,50 @@ api.interceptors.response.use(
   }
 )
 
+// Idempotency-Key for one logical submission: retries of the same payload reuse the key,
+// so the backend replays the first response instead of re-running verification/upload
+export const newIdempotencyKey = () =>
+  (window.crypto?.randomUUID?.() || `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`)
+
+const idempotent = (key) => (key ? { headers: { 'Idempotency-Key': key } } : undefined)
+
+// Photo capture settings advertised by the backend (GET /config/client), fetched once
+const DEFAULT_IMAGE_CONFIG = { maxDimension: 1600, captureFormat: 'image/jpeg', captureQuality: 0.8, maxBytes: 700 * 1024 }
+let imageConfigPromise = null
+
+export const getImageConfig = () => {
+  if (!imageConfigPromise) {
+    imageConfigPromise = api.get('/config/client')
+      .then((res) => ({ ...DEFAULT_IMAGE_CONFIG, ...res.data.image }))
+      .catch(() => {
+        imageConfigPromise = null  // retry on the next capture
+        return DEFAULT_IMAGE_CONFIG
+      })
+  }
+  return imageConfigPromise
+}
+
+// Draw the current video frame scaled down to maxDimension and encode it as a data URL
+// no larger than maxBytes (lowering quality as needed); null if the camera has no frame yet
+export const captureVideoFrame = async (video, canvas) => {
+  const config = await getImageConfig()
+  const { videoWidth, videoHeight } = video
+  if (!videoWidth || !videoHeight) return null
+
+  const scale = Math.min(1, config.maxDimension / Math.max(videoWidth, videoHeight))
+  canvas.width = Math.round(videoWidth * scale)
+  canvas.height = Math.round(videoHeight * scale)
+  canvas.getContext('2d').drawImage(video, 0, 0, canvas.width, canvas.height)
+
+  let quality = config.captureQuality
+  let imageData = canvas.toDataURL(config.captureFormat, quality)
+  while (imageData.length * 0.75 > config.maxBytes && quality > 0.3) {
+    quality -= 0.1
+    imageData = canvas.toDataURL(config.captureFormat, quality)
+  }
+  return imageData
+}
+
 // Auth endpoints
 export const authApi = {
   register: (data) => api.post('/auth/register', data),
@@ -47,7 +91,21 @@ export const reportingApi = {
   deleteImage: (public_id) => api.post('/reporting/delete-image', { public_id }),
   checkLocation: (latitude, longitude) => api.post('/reporting/check-location', { latitude, longitude }),
   checkGeofence: (latitude, longitude) => api.get('/reporting/check-geofence', { params: { latitude, longitude } }),
-  createReport: (data) => api.post('/reporting/report', data),
+  createReport: (data, idempotencyKey) => api.post('/reporting/report', data, idempotent(idempotencyKey)),
+  // Offline queue flush: reports[i] goes with images[i] (Blob/File); resolves to
+  // { results: [{ index, clientId, success, reportId | message }], summary }
+  createReportBatch: async (reports, images, idempotencyKey) => {
+    const form = new FormData()
+    form.append('reports', JSON.stringify(reports))
+    images.forEach((image, i) => form.append('images', image, `${i}.jpg`))
+    const response = await api.post('/reporting/report/batch', form, {
+      headers: { 'Content-Type': 'multipart/form-data', ...(idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {}) },
+      responseType: 'text',
+      timeout: 120000
+    })
+    const lines = response.data.split('\n').filter(Boolean).map((line) => JSON.parse(line))
+    return { results: lines.filter((line) => !line.done), summary: lines.find((line) => line.done) }
+  },
   getReports: (wasteType, limit) => api.get('/reporting/reports', { 
     params: { wasteType, limit } 
   }),
@@ -57,9 +115,9 @@ export const reportingApi = {
 // Cleaning endpoints
 export const cleaningApi = {
   verifyCleaning: (data) => api.post('/cleaning/verify', data),
-  markCleaned: (data) => api.post('/cleaning/mark-cleaned', data),
-  getAvailableCleanings: (wasteType, userType) => api.get('/cleaning/available', {
-    params: { wasteType, userType }
+  markCleaned: (data, idempotencyKey) => api.post('/cleaning/mark-cleaned', data, idempotent(idempotencyKey)),
+  getAvailableCleanings: (wasteType, userType, options = {}) => api.get('/cleaning/available', {
+    params: { wasteType, userType, ...options }
   })
 }
 
@@ -68,7 +126,10 @@ export const analyticsApi = {
   getUserAnalytics: (userId) => api.get(`/analytics/user/${userId}`),
   getNgoAnalytics: (ngoId) => api.get(`/analytics/ngo/${ngoId}`),
   getGlobalAnalytics: () => api.get('/analytics/global'),
+  // Stats, overall rank with neighbouring entries and global totals in one request
+  getDashboard: (id, userType) => api.get(`/analytics/dashboard/${id}`, { params: { userType } }),
   getTimeBuckets: () => api.get('/analytics/time-buckets'),
+  getTimeSeries: (params = {}) => api.get('/analytics/time-series', { params }),
   getUsersLeaderboard: (category = 'overall', limit = 20) => 
     api.get('/analytics/leaderboard/users', { params: { category, limit } }),
   getNgosLeaderboard: (category = 'overall', limit = 20) => 
@@ -77,8 +138,10 @@ export const analyticsApi = {
 
 // Location endpoints
 export const locationApi = {
-  getNearbyReports: (latitude, longitude, radius = 100) => 
-    api.get('/location/nearby-reports', { params: { latitude, longitude, radius } }),
+  getNearbyReports: (latitude, longitude, radius = 100, options = {}) => 
+    api.get('/location/nearby-reports', { params: { latitude, longitude, radius, ...options } }),
+  getStatus: (latitude, longitude, radius = 100) =>
+    api.get('/location/status', { params: { latitude, longitude, radius } }),
   validateCoordinates: (latitude, longitude) => 
     api.get('/location/validate-coordinates', { params: { latitude, longitude } }),
   checkDuplicateLocation: (latitude, longitude, radius = 100) => 
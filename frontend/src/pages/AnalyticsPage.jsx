@@ -19,6 +19,7 @@ export default function AnalyticsPage() {
     reports: { week: 0, month: 0, year: 0 },
     cleanings: { week: 0, month: 0, year: 0 }
   })
+  const [series, setSeries] = useState([])
 
   useEffect(() => {
     localStorage.setItem('darkMode', JSON.stringify(darkMode))
@@ -28,12 +29,14 @@ export default function AnalyticsPage() {
     const load = async () => {
       try {
         setLoading(true)
-        const [g, t] = await Promise.all([
+        const [g, t, s] = await Promise.all([
           analyticsApi.getGlobalAnalytics(),
-          analyticsApi.getTimeBuckets()
+          analyticsApi.getTimeBuckets(),
+          analyticsApi.getTimeSeries({ granularity: 'daily' })
         ])
         setGlobal(g.data || {})
         setBuckets(t.data || {})
+        setSeries(s.data?.series || [])
       } catch (e) {
         console.error('Failed to load analytics', e)
       } finally {
@@ -45,6 +48,7 @@ export default function AnalyticsPage() {
 
   const wasteItems = Object.entries(global.wasteBreakdown || {})
   const maxWaste = Math.max(1, ...wasteItems.map(([, v]) => v || 0))
+  const maxDaily = Math.max(1, ...series.map((d) => Math.max(d.reports || 0, d.cleanings || 0)))
 
   return (
     <div className={`min-h-screen flex flex-col transition-colors ${
@@ -147,6 +151,34 @@ export default function AnalyticsPage() {
           </div>
         </section>
 
+        <section className={`rounded-2xl border p-6 ${darkMode ? 'bg-slate-800 border-cyan-700' : 'bg-white border-cyan-200 shadow-md'}`}>
+          <div className="flex items-center justify-between mb-4">
+            <div>
+              <p className={`${darkMode ? 'text-cyan-300' : 'text-blue-600'} font-semibold text-sm uppercase tracking-wide`}>Trend</p>
+              <h3 className={`text-xl font-bold ${darkMode ? 'text-white' : 'text-slate-900'}`}>Last 30 days</h3>
+            </div>
+            <span className="text-2xl">📅</span>
+          </div>
+          {series.length ? (
+            <div className="flex items-end gap-1 h-32">
+              {series.map((d) => (
+                <div key={d.period} className="flex-1 flex items-end gap-px h-full" title={`${d.period}: ${d.reports} reports, ${d.cleanings} cleanings`}>
+                  <div
+                    className={`flex-1 rounded-t ${darkMode ? 'bg-cyan-500' : 'bg-blue-600'}`}
+                    style={{ height: `${((d.reports || 0) / maxDaily) * 100}%` }}
+                  />
+                  <div
+                    className={`flex-1 rounded-t ${darkMode ? 'bg-emerald-400' : 'bg-emerald-600'}`}
+                    style={{ height: `${((d.cleanings || 0) / maxDaily) * 100}%` }}
+                  />
+                </div>
+              ))}
+            </div>
+          ) : (
+            <p className={`${darkMode ? 'text-gray-400' : 'text-gray-600'} text-sm`}>No data</p>
+          )}
+        </section>
+
         <section className={`rounded-2xl border p-6 ${darkMode ? 'bg-slate-800 border-cyan-700' : 'bg-white border-cyan-200 shadow-md'}`}>
           <div className="flex items-center justify-between mb-4">
             <div>
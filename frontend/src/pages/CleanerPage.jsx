@@ -24,10 +24,24 @@ export default function CleanerPage() {
     fetchCleanings()
   }, [selectedTab])
 
+  // Resolve the user's position (if allowed) so the backend can return the closest tasks
+  const getUserPosition = () => new Promise((resolve) => {
+    if (!navigator.geolocation) return resolve(null)
+    navigator.geolocation.getCurrentPosition(
+      (pos) => resolve({ userLat: pos.coords.latitude, userLon: pos.coords.longitude }),
+      () => resolve(null),
+      { enableHighAccuracy: false, timeout: 5000, maximumAge: 60000 }
+    )
+  })
+
   const fetchCleanings = async () => {
     setLoading(true)
     try {
-      const response = await cleaningApi.getAvailableCleanings(selectedTab, userType)
+      const position = await getUserPosition()
+      const response = await cleaningApi.getAvailableCleanings(selectedTab, userType, {
+        ...(position || {}),
+        limit: 20
+      })
       const availableCleanings = response.data.cleanings || []
       setCleanings(availableCleanings)
     } catch (err) {
@@ -129,7 +143,8 @@ export default function CleanerPage() {
                 }`}
               >
                 <img
-                  src={cleaning.imageUrl}
+                  src={cleaning.thumbnailUrl || cleaning.imageUrl}
+                  loading="lazy"
                   alt="Garbage area"
                   className="w-full h-48 object-cover"
                   onError={(e) => {
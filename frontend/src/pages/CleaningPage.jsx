@@ -1,7 +1,7 @@
 import React, { useState, useRef, useEffect } from 'react'
 import { useNavigate, useParams } from 'react-router-dom'
 import { useLocationStore, useAuthStore } from '../store'
-import { cleaningApi, reportingApi } from '../api'
+import { cleaningApi, reportingApi, newIdempotencyKey, captureVideoFrame } from '../api'
 
 // Haversine distance calculation
 const calculateDistance = (lat1, lon1, lat2, lon2) => {
@@ -28,7 +28,6 @@ export default function CleaningPage() {
     return saved ? JSON.parse(saved) : false
   })
   const [beforeImage, setBeforeImage] = useState(null)
-  const [beforeImageBase64, setBeforeImageBase64] = useState(null)
   const [afterImage, setAfterImage] = useState(null)
   const [report, setReport] = useState(null)
   const [loading, setLoading] = useState(false)
@@ -39,6 +38,8 @@ export default function CleaningPage() {
   const [verification, setVerification] = useState(null)
   const [verifying, setVerifying] = useState(false)
   const videoRef = useRef(null)
+  // { afterImage, key } of the submission in progress, reused when a timed-out submit is retried
+  const submissionRef = useRef(null)
   const canvasRef = useRef(null)
   const [cameraActive, setCameraActive] = useState(false)
   const [cameraStarted, setCameraStarted] = useState(false)
@@ -97,34 +98,13 @@ export default function CleaningPage() {
       }
       
       setReport(reportData)
-      setBeforeImage(reportData.imageUrl)
+      setBeforeImage(reportData.imageVariants?.medium || reportData.imageUrl)
       
       // Check if image URL is valid; if not, navigate back silently
       if (!reportData.imageUrl) {
         navigate('/cleaner')
         return
       }
-      
-      // Convert image URL to base64
-      try {
-        const img = new Image()
-        img.crossOrigin = "anonymous"
-        img.onload = () => {
-          const canvas = document.createElement('canvas')
-          canvas.width = img.width
-          canvas.height = img.height
-          const ctx = canvas.getContext('2d')
-          ctx.drawImage(img, 0, 0)
-          const base64 = canvas.toDataURL('image/jpeg', 0.8)
-          setBeforeImageBase64(base64)
-        }
-        img.onerror = () => {
-          setBeforeImageBase64(reportData.imageUrl)
-        }
-        img.src = reportData.imageUrl
-      } catch (err) {
-        setBeforeImageBase64(reportData.imageUrl)
-      }
     } catch (err) {
       console.error('Failed to load report:', err)
       // On any failure, navigate back to cleaner list without showing errors
@@ -209,28 +189,13 @@ export default function CleaningPage() {
     }
     
     try {
-      const video = videoRef.current
-      const canvas = canvasRef.current
-      
-      canvas.width = video.videoWidth
-      canvas.height = video.videoHeight
-      
-      if (canvas.width === 0 || canvas.height === 0) {
+      // Downscaled and compressed to the limits the backend advertises
+      const imageData = await captureVideoFrame(videoRef.current, canvasRef.current)
+      if (!imageData) {
         setError('Camera not fully loaded. Please try again.')
         return
       }
       
-      const context = canvas.getContext('2d')
-      context.drawImage(video, 0, 0, canvas.width, canvas.height)
-      
-      let imageData = canvas.toDataURL('image/jpeg', 0.8)
-      
-      let quality = 0.8
-      while (imageData.length > 1000000 && quality > 0.3) {
-        quality -= 0.1
-        imageData = canvas.toDataURL('image/jpeg', quality)
-      }
-      
       setAfterImage(imageData)
       setError('')
       setVerifying(true)
@@ -240,7 +205,6 @@ export default function CleaningPage() {
       try {
         const verifyResult = await cleaningApi.verifyCleaning({
           reportId,
-          beforeImageBase64: beforeImageBase64 || beforeImage,
           afterImageBase64: imageData,
           userId: user?.id,
           userName: user?.name || 'Anonymous',
@@ -283,14 +247,16 @@ export default function CleaningPage() {
 
     setLoading(true)
     try {
+      if (submissionRef.current?.afterImage !== afterImage) {
+        submissionRef.current = { afterImage, key: newIdempotencyKey() }
+      }
       const result = await cleaningApi.markCleaned({
         reportId,
-        beforeImageBase64: beforeImageBase64 || beforeImage,
         afterImageBase64: afterImage,
         userId: user?.id,
         userName: user?.name || 'Anonymous',
         userType
-      })
+      }, submissionRef.current.key)
       navigate('/cleaner')
     } catch (err) {
       setError('Error submitting cleanup: ' + (err.response?.data?.detail || err.message))
@@ -17,6 +17,7 @@ export default function NgoDashboard() {
     totalReports: 0,
     totalCleanings: 0
   })
+  const [nextAbove, setNextAbove] = useState(null)
   const [loading, setLoading] = useState(false)
   const [showContent, setShowContent] = useState(false)
   
@@ -32,35 +33,31 @@ export default function NgoDashboard() {
   useEffect(() => {
     setShowContent(true)
     if (user?.id) {
-      fetchAnalytics(user.id)
+      fetchDashboard(user.id)
+    } else {
+      fetchGlobal()
     }
-    fetchGlobal()
   }, [user])
 
-  const fetchAnalytics = async (ngoId) => {
+  const fetchDashboard = async (ngoId) => {
     try {
       setLoading(true)
-      const res = await analyticsApi.getNgoAnalytics(ngoId)
+      // Stats, rank, neighbouring leaderboard entries and global totals in one request
+      const res = await analyticsApi.getDashboard(ngoId, 'ngo')
       setAnalytics({
         reportsCount: res.data?.reportsCount || 0,
         cleaningsCount: res.data?.cleaningsCount || 0,
         totalPoints: res.data?.totalPoints || 0,
-        ngoRank: 0
+        ngoRank: res.data?.rank || '-'
+      })
+      const above = res.data?.neighbours?.above || []
+      setNextAbove(above.length ? above[above.length - 1] : null)
+      setGlobalAnalytics({
+        totalReports: res.data?.global?.totalReports || 0,
+        totalCleanings: res.data?.global?.totalCleanings || 0
       })
-      
-      // Fetch overall leaderboard to get NGO's rank
-      try {
-        const leaderboardRes = await analyticsApi.getNgosLeaderboard('overall')
-        const leaderboard = leaderboardRes.data.leaderboard || []
-        const ngoRankIndex = leaderboard.findIndex(entry => entry.id === ngoId)
-        const ngoRank = ngoRankIndex !== -1 ? ngoRankIndex + 1 : '-'
-        
-        setAnalytics(prev => ({ ...prev, ngoRank }))
-      } catch (err) {
-        console.error('Failed to fetch NGO rank:', err)
-      }
     } catch (err) {
-      console.error('Failed to fetch NGO analytics', err.response?.data || err.message)
+      console.error('Failed to fetch NGO dashboard', err.response?.data || err.message)
     } finally {
       setLoading(false)
     }
@@ -197,7 +194,7 @@ export default function NgoDashboard() {
           }, {
             title: 'Leaderboard Rank',
             value: `#${analytics.ngoRank || 0}`,
-            desc: 'Position among NGOs',
+            desc: nextAbove ? `${nextAbove.points - analytics.totalPoints} pts behind ${nextAbove.name}` : 'Position among NGOs',
             icon: '🏆'
           }].map((card) => (
             <div
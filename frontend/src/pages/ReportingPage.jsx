@@ -1,7 +1,7 @@
 import React, { useState, useRef, useEffect } from 'react'
 import { useNavigate } from 'react-router-dom'
 import { useLocationStore, useAuthStore } from '../store'
-import { reportingApi, locationApi } from '../api'
+import { reportingApi, locationApi, newIdempotencyKey, captureVideoFrame } from '../api'
 
 export default function ReportingPage() {
   const navigate = useNavigate()
@@ -33,6 +33,9 @@ export default function ReportingPage() {
   const [cameraStarted, setCameraStarted] = useState(false)
   const streamRef = useRef(null)
   const [cameraKey, setCameraKey] = useState(0)
+  // { imageUrl, key, payload } of the submission in progress; a retry after a timeout
+  // resends the same payload and key instead of creating a second report
+  const submissionRef = useRef(null)
 
   // Get location on mount
   useEffect(() => {
@@ -64,58 +67,35 @@ export default function ReportingPage() {
           setLocation(latitude, longitude, position.coords.accuracy)
           setError('')
           
-          // Check geofence first
+          // Geofence + validated nearby active reports (within 100m) in one request
           try {
-            const geofenceResult = await reportingApi.checkGeofence(latitude, longitude)
-            setGeofenceStatus(geofenceResult.data)
+            const statusResult = await locationApi.getStatus(latitude, longitude)
+            const { geofence, nearby_reports: nearby = [] } = statusResult.data
+            setGeofenceStatus(geofence)
             
-            if (!geofenceResult.data.allowed) {
-              setError(`🚫 ${geofenceResult.data.message}`)
+            if (!geofence.allowed) {
+              setError(`🚫 ${geofence.message}`)
               setLocationConflict(null)
               setLocationLoading(false)
               return
             }
-          } catch (err) {
-            console.error('Geofence check failed:', err)
-            setGeofenceStatus(null)
-          }
-          
-          // Check for nearby active reports within 100m
-          try {
-            const checkResult = await locationApi.checkDuplicateLocation(latitude, longitude)
-            if (checkResult.data.is_duplicate) {
-              // Validate nearby reports exist to avoid showing deleted/stale entries
-              const rawNearby = checkResult.data.nearby_reports || []
-              const validated = []
-              for (const item of rawNearby) {
-                try {
-                  const res = await reportingApi.getReport(item.id)
-                  const report = res.data?.report
-                  if (report && report.imageUrl && report.status === 'active') {
-                    validated.push(item)
-                  }
-                } catch (_) {
-                  // Ignore 404/missing
-                }
-              }
 
-              if (validated.length > 0) {
-                const closest = validated.reduce((min, r) => (r.distance < min ? r.distance : min), validated[0].distance)
-                setLocationConflict({
-                  isDuplicate: true,
-                  nearbyReports: validated,
-                  closestDistance: closest,
-                  message: `Location already reported ${closest}m away`
-                })
-                setError(`❌ ${validated.length} active report(s) within 100m`)
-              } else {
-                setLocationConflict(null)
-                setError('')
-              }
+            if (nearby.length > 0) {
+              const closest = statusResult.data.distance_to_closest
+              setLocationConflict({
+                isDuplicate: true,
+                nearbyReports: nearby,
+                closestDistance: closest,
+                message: `Location already reported ${closest}m away`
+              })
+              setError(`❌ ${nearby.length} active report(s) within 100m`)
             } else {
               setLocationConflict(null)
+              setError('')
             }
           } catch (err) {
+            console.error('Location status check failed:', err)
+            setGeofenceStatus(null)
             setLocationConflict(null)
           }
           
@@ -199,27 +179,12 @@ export default function ReportingPage() {
     }
     
     try {
-      const video = videoRef.current
-      const canvas = canvasRef.current
-      
-      canvas.width = video.videoWidth
-      canvas.height = video.videoHeight
-      
-      if (canvas.width === 0 || canvas.height === 0) {
+      // Downscaled and compressed to the limits the backend advertises
+      const imageData = await captureVideoFrame(videoRef.current, canvasRef.current)
+      if (!imageData) {
         setError('Camera not fully loaded. Please try again.')
         return
       }
-      
-      const context = canvas.getContext('2d')
-      context.drawImage(video, 0, 0, canvas.width, canvas.height)
-      
-      let imageData = canvas.toDataURL('image/jpeg', 0.7)
-      
-      let quality = 0.7
-      while (imageData.length > 1000000 && quality > 0.3) {
-        quality -= 0.1
-        imageData = canvas.toDataURL('image/jpeg', quality)
-      }
 
       setImage(imageData)
       // Turn off camera immediately after capture to free device
@@ -234,6 +199,12 @@ export default function ReportingPage() {
         const verifyResult = await reportingApi.verifyImage(imageData)
         setVerification(verifyResult.data)
 
+        if (verifyResult.data.is_duplicate) {
+          setError(verifyResult.data.message || 'This photo has already been reported')
+          setVerifying(false)
+          return
+        }
+
         if (!verifyResult.data.is_garbage) {
           const detectedItems = verifyResult.data.detected_items || []
           const itemsList = detectedItems.length > 0 
@@ -304,15 +275,27 @@ export default function ReportingPage() {
     setLoading(true)
     try {
       // Create report with Cloudinary URL
-      const report = await reportingApi.createReport({
-        latitude,
-        longitude,
-        wasteType,
-        imageBase64: cloudinaryUrl,
-        userId: user?.id,
-        userName: user?.name || 'Anonymous',
-        userType: userType || 'individual'
-      })
+      if (submissionRef.current?.imageUrl !== cloudinaryUrl || submissionRef.current?.payload.wasteType !== wasteType) {
+        submissionRef.current = {
+          imageUrl: cloudinaryUrl,
+          key: newIdempotencyKey(),
+          payload: {
+            latitude,
+            longitude,
+            wasteType,
+            imageBase64: cloudinaryUrl,
+            userId: user?.id,
+            userName: user?.name || 'Anonymous',
+            userType: userType || 'individual'
+          }
+        }
+      }
+      const report = await reportingApi.createReport(submissionRef.current.payload, submissionRef.current.key)
+      submissionRef.current = null
+      if (!report.data.success) {
+        setError(report.data.message || 'Failed to submit report')
+        return
+      }
 
       setSuccess('Report submitted successfully! You earned 10 points.')
       setImage(null)
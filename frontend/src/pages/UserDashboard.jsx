@@ -21,14 +21,16 @@ export default function UserDashboard() {
     totalReports: 0,
     totalCleanings: 0
   })
+  const [neighbours, setNeighbours] = useState({ above: [], below: [] })
   const [showContent, setShowContent] = useState(false)
 
   useEffect(() => {
     setShowContent(true)
     if (user?.id) {
-      fetchUserAnalytics()
+      fetchDashboard()
+    } else {
+      fetchGlobalAnalytics()
     }
-    fetchGlobalAnalytics()
   }, [user])
 
   // Persist dark mode to localStorage
@@ -36,24 +38,24 @@ export default function UserDashboard() {
     localStorage.setItem('darkMode', JSON.stringify(darkMode))
   }, [darkMode])
 
-  const fetchUserAnalytics = async () => {
+  const fetchDashboard = async () => {
     try {
-      const response = await analyticsApi.getUserAnalytics(user.id)
-      setAnalytics(response.data)
-      
-      // Fetch overall leaderboard to get user's rank
-      try {
-        const leaderboardRes = await analyticsApi.getUsersLeaderboard('overall')
-        const leaderboard = leaderboardRes.data.leaderboard || []
-        const userRankIndex = leaderboard.findIndex(entry => entry.id === user.id)
-        const userRank = userRankIndex !== -1 ? userRankIndex + 1 : '-'
-        
-        setAnalytics(prev => ({ ...prev, userRank }))
-      } catch (err) {
-        console.error('Failed to fetch user rank:', err)
-      }
+      // Stats, rank, neighbouring leaderboard entries and global totals in one request
+      const response = await analyticsApi.getDashboard(user.id, 'individual')
+      const data = response.data
+      setAnalytics({
+        reportsCount: data.reportsCount,
+        cleaningsCount: data.cleaningsCount,
+        totalPoints: data.totalPoints,
+        userRank: data.rank || '-'
+      })
+      setNeighbours(data.neighbours || { above: [], below: [] })
+      setGlobalAnalytics({
+        totalReports: data.global.totalReports,
+        totalCleanings: data.global.totalCleanings
+      })
     } catch (error) {
-      console.error('Failed to fetch analytics:', error)
+      console.error('Failed to fetch dashboard:', error)
     }
   }
 
@@ -196,6 +198,19 @@ export default function UserDashboard() {
               <p className={`text-xs ${darkMode ? 'text-gray-400' : 'text-gray-600'}`}>Your Rank</p>
             </div>
           </div>
+          {(neighbours.above.length > 0 || neighbours.below.length > 0) && (
+            <div className={`mt-4 rounded-xl p-4 ${darkMode ? 'bg-slate-800' : 'bg-white shadow-md'} transition-colors animate-slideUp stagger-3`}>
+              <p className={`text-sm font-semibold mb-2 ${darkMode ? 'text-cyan-300' : 'text-gray-800'}`}>🏅 Around You</p>
+              {[...neighbours.above, { id: user?.id, name: 'You', points: analytics.totalPoints, rank: analytics.userRank, self: true }, ...neighbours.below].map((entry) => (
+                <div key={entry.id} className={`flex justify-between py-1 text-sm ${
+                  entry.self ? (darkMode ? 'text-orange-300 font-bold' : 'text-orange-700 font-bold') : (darkMode ? 'text-gray-300' : 'text-gray-700')
+                }`}>
+                  <span>#{entry.rank} {entry.name}</span>
+                  <span>{entry.points} pts</span>
+                </div>
+              ))}
+            </div>
+          )}
         </section>
 
         {/* Encouraging Facts Section */}